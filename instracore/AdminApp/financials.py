@@ -0,0 +1,25 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F
+
+from AdminApp.models import FinancialOverview
+
+
+def add_to_financial_overview(expenses=(), salaries=()):
+    # Add newly approved expenses and newly paid salaries (iterables of
+    # (date, amount)) to their months' totals. The totals are shifted with
+    # F() rather than recomputed, so amounts an admin entered by hand for
+    # the month stay in them.
+    deltas = defaultdict(lambda: {'expenses': Decimal('0'), 'salaries_paid': Decimal('0')})
+    for day, amount in expenses:
+        deltas[day.replace(day=1)]['expenses'] += amount
+    for day, amount in salaries:
+        deltas[day.replace(day=1)]['salaries_paid'] += amount
+
+    for month, totals in deltas.items():
+        FinancialOverview.objects.get_or_create(month=month)
+        FinancialOverview.objects.filter(month=month).update(
+            expenses=F('expenses') + totals['expenses'],
+            salaries_paid=F('salaries_paid') + totals['salaries_paid'],
+        )
@@ -2,6 +2,8 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from AuthApp.models import User
 from AdminApp.models import Event, Notice, WeekendCalendar, FinancialOverview
+from EmployeeApp.models import Course
+from StudentApp.models import Enrollment
 
 
 class UserCreationForm(forms.ModelForm):
@@ -12,7 +14,7 @@ class UserCreationForm(forms.ModelForm):
         model = User
         fields = ('username', 'first_name', 'last_name', 'email', 'role', 'sub_role', 
                   'image', 'bio', 'date_of_birth', 'phone', 'gender', 'location', 'country',
-                  'facebook', 'twitter', 'instagram', 'linkedin')
+                  'guardian_email', 'facebook', 'twitter', 'instagram', 'linkedin')
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -40,7 +42,7 @@ class UserUpdateForm(forms.ModelForm):
         model = User
         fields = ('username', 'first_name', 'last_name', 'email', 'role', 'sub_role', 
                   'image', 'bio', 'date_of_birth', 'phone', 'gender', 'location', 'country',
-                  'facebook', 'twitter', 'instagram', 'linkedin', 'is_active')
+                  'guardian_email', 'facebook', 'twitter', 'instagram', 'linkedin', 'is_active')
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -82,4 +84,40 @@ class FinancialOverviewForm(forms.ModelForm):
         fields = ('month', 'income', 'expenses', 'fees_collected', 'salaries_paid')
         widgets = {
             'month': forms.DateInput(attrs={'type': 'month'}),
-        }
\ No newline at end of file
+        }
+
+class ReconciliationUploadForm(forms.Form):
+    statement = forms.FileField(help_text='Bank or payment gateway CSV export')
+    payment_method = forms.CharField(max_length=50, initial='bank')
+
+
+class UserImportForm(forms.Form):
+    csv_file = forms.FileField(help_text='Columns: username, email, first_name, last_name, role, sub_role, password, ...')
+    default_role = forms.ChoiceField(
+        choices=[(value, label) for value, label in User.ROLE_CHOICES if value != 'admin'], initial='student'
+    )
+
+
+class CourseCapacityForm(forms.ModelForm):
+    class Meta:
+        model = Course
+        fields = ('capacity',)
+        help_texts = {
+            'capacity': 'Leave empty for unlimited seats. Raising it enrolls students from the waitlist.',
+        }
+
+
+class BulkEnrollmentForm(forms.Form):
+    csv_file = forms.FileField(required=False, help_text='CSV with a username, email or student_id column')
+    usernames = forms.CharField(required=False, widget=forms.Textarea(attrs={'rows': 4}), help_text='One username per line')
+    promote_from = forms.ModelChoiceField(
+        queryset=Course.objects.all(), required=False,
+        help_text='Enroll every student who completed this course'
+    )
+    status = forms.ChoiceField(choices=Enrollment.STATUS_CHOICES, initial='approved')
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if not (cleaned_data.get('csv_file') or cleaned_data.get('usernames') or cleaned_data.get('promote_from')):
+            raise forms.ValidationError('Upload a CSV, list usernames or choose a course to promote from')
+        return cleaned_data
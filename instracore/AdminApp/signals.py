@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from AdminApp.models import WeekendCalendar
+from AdminApp.working_days import invalidate_working_days
+
+
+@receiver([post_save, post_delete], sender=WeekendCalendar)
+def refresh_working_days(sender, instance, **kwargs):
+    # A row may have moved to another year, so drop every cached year
+    invalidate_working_days()
@@ -1,3 +1,105 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from AdminApp.models import WeekendCalendar
+from AdminApp.working_days import (
+    add_working_days, invalidate_working_days, is_working_day, next_working_day,
+    working_days_between, working_days_in_month,
+)
+from AuthApp.models import User
+
+
+class WorkingDaysTests(TestCase):
+    # 1 January 2027 is a Friday; Saturdays and Sundays are the weekly off days
+
+    def setUp(self):
+        invalidate_working_days()
+
+    def tearDown(self):
+        invalidate_working_days()
+
+    def test_weekly_off_days(self):
+        self.assertTrue(is_working_day(date(2027, 1, 1)))
+        self.assertFalse(is_working_day(date(2027, 1, 2)))
+        self.assertFalse(is_working_day(date(2027, 1, 3)))
+        self.assertTrue(is_working_day(date(2027, 1, 4)))
+
+    def test_calendar_rows_are_off_days(self):
+        WeekendCalendar.objects.create(date=date(2027, 1, 5), is_weekend=False, description='Holiday')
+        WeekendCalendar.objects.create(date=date(2027, 1, 6), is_weekend=True, description='Extra weekend')
+        self.assertFalse(is_working_day(date(2027, 1, 5)))
+        self.assertFalse(is_working_day(date(2027, 1, 6)))
+        self.assertEqual(working_days_between(date(2027, 1, 4), date(2027, 1, 8)), 3)
+
+    def test_saving_a_calendar_row_refreshes_the_cache(self):
+        self.assertTrue(is_working_day(date(2027, 1, 7)))
+        WeekendCalendar.objects.create(date=date(2027, 1, 7), is_weekend=False, description='Holiday')
+        self.assertFalse(is_working_day(date(2027, 1, 7)))
+
+    def test_working_days_between(self):
+        self.assertEqual(working_days_between(date(2027, 1, 1), date(2027, 1, 1)), 1)
+        self.assertEqual(working_days_between(date(2027, 1, 2), date(2027, 1, 3)), 0)
+        self.assertEqual(working_days_between(date(2027, 1, 8), date(2027, 1, 1)), 0)
+        self.assertEqual(working_days_between(date(2027, 1, 1), date(2027, 1, 31)), 21)
+        # Across a year boundary: Monday 28 to Thursday 31 December 2026 and 1 January 2027
+        self.assertEqual(working_days_between(date(2026, 12, 27), date(2027, 1, 3)), 5)
+
+    def test_working_days_in_month(self):
+        self.assertEqual(working_days_in_month(date(2027, 1, 15)), 21)
+        self.assertEqual(working_days_in_month(date(2027, 2, 1)), 20)
+
+    def test_next_and_added_working_days(self):
+        self.assertEqual(next_working_day(date(2027, 1, 1)), date(2027, 1, 1))
+        self.assertEqual(next_working_day(date(2027, 1, 2)), date(2027, 1, 4))
+        self.assertEqual(add_working_days(date(2027, 1, 1), 1), date(2027, 1, 4))
+        self.assertEqual(add_working_days(date(2027, 1, 1), 5), date(2027, 1, 8))
+        self.assertEqual(add_working_days(date(2026, 12, 31), 1), date(2027, 1, 1))
+
+    def test_counts_match_a_day_by_day_walk(self):
+        WeekendCalendar.objects.create(date=date(2027, 3, 17), is_weekend=False, description='Holiday')
+        start, end = date(2027, 2, 20), date(2027, 4, 10)
+        walked = sum(
+            is_working_day(date.fromordinal(ordinal))
+            for ordinal in range(start.toordinal(), end.toordinal() + 1)
+        )
+        self.assertEqual(working_days_between(start, end), walked)
+
+
+# Pages extend AuthApp/master.html; tests render them inside a bare layout so
+# they exercise only the page itself
+BARE_LAYOUT = override_settings(TEMPLATES=[{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.locmem.Loader', {'AuthApp/master.html': '{% block content %}{% endblock %}'}),
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ],
+    },
+}])
+
+
+@BARE_LAYOUT
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersViewTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='admin', role='admin'))
+
+    def test_form_uploads_files(self):
+        response = self.client.get(reverse('admin_dashboard:import_users'))
+        self.assertTemplateUsed(response, 'AdminApp/import_users.html')
+        self.assertContains(response, 'enctype="multipart/form-data"')
+        self.assertContains(response, 'name="csv_file"')
+
+    def test_upload_imports_the_rows(self):
+        upload = SimpleUploadedFile('users.csv', b'username,email,password\njane,jane@example.com,secret123\n')
+        response = self.client.post(reverse('admin_dashboard:import_users'), {'csv_file': upload, 'default_role': 'student'})
+        self.assertRedirects(response, reverse('admin_dashboard:user_management'), fetch_redirect_response=False)
+        self.assertEqual(User.objects.get(username='jane').role, 'student')
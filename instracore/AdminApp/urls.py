@@ -7,13 +7,20 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     path('users/', views.user_management, name='user_management'),
     path('users/create/', views.create_user, name='create_user'),
+    path('users/import/', views.import_users, name='import_users'),
     path('users/<int:pk>/update/', views.update_user, name='update_user'),
     path('users/<int:pk>/delete/', views.delete_user, name='delete_user'),
     path('courses/', views.courses, name='courses'),
+    path('courses/<int:pk>/enroll/', views.bulk_enroll, name='bulk_enroll'),
+    path('courses/<int:pk>/capacity/', views.course_capacity, name='course_capacity'),
+    path('certificates/issue-pending/', views.issue_pending_certificates, name='issue_pending_certificates'),
     path('attendance/', views.attendance, name='attendance'),
+    path('courses/<int:pk>/register/', views.attendance_register, name='attendance_register'),
     path('events-notices/', views.events_notices, name='events_notices'),
     path('events/create/', views.create_event, name='create_event'),
     path('notices/create/', views.create_notice, name='create_notice'),
     path('accounts/', views.accounts, name='accounts'),
+    path('accounts/reconcile/', views.reconcile_fees, name='reconcile_fees'),
     path('reports/', views.reports, name='reports'),
+    path('reports/guardian/', views.guardian_reports, name='guardian_reports'),
 ]
\ No newline at end of file
@@ -14,14 +14,22 @@ from calendar import monthcalendar
 from datetime import datetime, date
 import json
 import csv
+import io
 
 from AuthApp.models import User, Notification, AuditLog
 from AuthApp.forms import UserCreationForm
+from AuthApp.user_import import import_users as import_users_from_csv
 from AdminApp.forms import UserUpdateForm
 from AdminApp.models import Event, Notice, WeekendCalendar, FinancialOverview
-from AdminApp.forms import EventForm, NoticeForm, WeekendCalendarForm, FinancialOverviewForm
+from AdminApp.forms import EventForm, NoticeForm, WeekendCalendarForm, FinancialOverviewForm, ReconciliationUploadForm, UserImportForm, BulkEnrollmentForm, CourseCapacityForm
 from EmployeeApp.models import Course, CourseTeacher, Attendance, Salary, Expense, Transaction
+from EmployeeApp.attendance_register import REGISTER_FORMATS, build_register, parse_register_month, register_response
 from StudentApp.models import Enrollment, ExamResult, Certificate, FeePayment
+from StudentApp.certificates import pending_certificate_enrollments, issue_pending_certificates as issue_certificates
+from StudentApp.bulk_enrollment import enroll_students, promote_completed, resolve_students, students_from_csv
+from StudentApp.fees import UNPAID_STATUSES
+from StudentApp.reconciliation import reconcile_fee_payments, ReconciliationError
+from StudentApp.guardian_reports import generate_guardian_reports, REPORT_TYPES as GUARDIAN_REPORT_TYPES
 
 
 def is_admin(user):
@@ -74,6 +82,9 @@ def dashboard(request):
     teacher_attendance = Attendance.objects.filter(user__role='employee', user__sub_role='teacher', date=today).count()
     staff_attendance = Attendance.objects.filter(user__role='employee', date=today).exclude(user__sub_role='teacher').count()
     
+    # Completed courses still waiting for a certificate
+    pending_certificates = pending_certificate_enrollments().count()
+    
     context = {
         'total_students': total_students,
         'active_students': active_students,
@@ -97,6 +108,7 @@ def dashboard(request):
         'student_attendance': student_attendance,
         'teacher_attendance': teacher_attendance,
         'staff_attendance': staff_attendance,
+        'pending_certificates': pending_certificates,
         'active_page': 'dashboard',
     }
     return render(request, 'AdminApp/dashboard.html', context)
@@ -171,6 +183,39 @@ def create_user(request):
     return render(request, 'AdminApp/user_form.html', context)
 
 
+@login_required
+@user_passes_test(is_admin)
+def import_users(request):
+    if request.method == 'POST':
+        form = UserImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            csv_file = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            result = import_users_from_csv(
+                csv_file,
+                default_role=form.cleaned_data['default_role'],
+                created_by=request.user,
+                site_url=request.build_absolute_uri('/')
+            )
+            
+            messages.success(request, f'{result.created} users imported successfully.')
+            if result.invited:
+                messages.info(request, f'{result.invited} set-password emails queued.')
+            for line, error in result.errors[:10]:
+                messages.warning(request, f'Line {line}: {error}')
+            if len(result.errors) > 10:
+                messages.warning(request, f'{len(result.errors) - 10} more rows were rejected.')
+            return redirect('admin_dashboard:user_management')
+    else:
+        form = UserImportForm()
+    
+    context = {
+        'form': form,
+        'title': 'Import Users',
+        'active_page': 'user_management',
+    }
+    return render(request, 'AdminApp/import_users.html', context)
+
+
 @login_required
 @user_passes_test(is_admin)
 def update_user(request, pk):
@@ -266,6 +311,92 @@ def courses(request):
     return render(request, 'AdminApp/courses.html', context)
 
 
+@login_required
+@user_passes_test(is_admin)
+def bulk_enroll(request, pk):
+    course = get_object_or_404(Course, pk=pk)
+    
+    if request.method == 'POST':
+        form = BulkEnrollmentForm(request.POST, request.FILES)
+        if form.is_valid():
+            status = form.cleaned_data['status']
+            if form.cleaned_data['promote_from']:
+                result = promote_completed(form.cleaned_data['promote_from'], course, status=status, enrolled_by=request.user)
+                unknown = []
+            else:
+                student_ids, unknown = resolve_students(usernames=form.cleaned_data['usernames'].split())
+                if form.cleaned_data['csv_file']:
+                    csv_file = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+                    csv_ids, csv_unknown = students_from_csv(csv_file)
+                    student_ids |= csv_ids
+                    unknown += csv_unknown
+                result = enroll_students(course, student_ids, status=status, enrolled_by=request.user)
+            
+            messages.success(request, f'{result.created} students enrolled in {course.title} ({result.skipped} already enrolled).')
+            if unknown:
+                messages.warning(request, f"Unknown students: {', '.join(unknown[:20])}{' ...' if len(unknown) > 20 else ''}")
+            return redirect('admin_dashboard:courses')
+    else:
+        form = BulkEnrollmentForm()
+    
+    context = {
+        'form': form,
+        'course': course,
+        'title': f'Enroll Students in {course.title}',
+        'active_page': 'courses',
+    }
+    return render(request, 'AdminApp/bulk_enroll.html', context)
+
+
+@login_required
+@user_passes_test(is_admin)
+def course_capacity(request, pk):
+    course = get_object_or_404(Course, pk=pk)
+    
+    if request.method == 'POST':
+        form = CourseCapacityForm(request.POST, instance=course)
+        if form.is_valid():
+            # Saving the course promotes waiting students if seats were added.
+            # Only capacity is written, so seats and counters moved by enrollments
+            # since the course was loaded are not overwritten.
+            course = form.save(commit=False)
+            course.save(update_fields=['capacity'])
+            
+            AuditLog.objects.create(
+                user=request.user,
+                action=f"Set capacity of {course.title} to {course.capacity if course.capacity is not None else 'unlimited'}",
+                model_name="Course",
+                object_id=str(course.id)
+            )
+            
+            messages.success(request, f'Capacity of {course.title} updated.')
+            if course.capacity is not None and course.seats_taken > course.capacity:
+                messages.warning(request, f'{course.seats_taken} seats are already taken; no one was removed.')
+            return redirect('admin_dashboard:courses')
+    else:
+        form = CourseCapacityForm(instance=course)
+    
+    context = {
+        'form': form,
+        'course': course,
+        'title': f'Seats for {course.title}',
+        'active_page': 'courses',
+    }
+    return render(request, 'AdminApp/course_capacity.html', context)
+
+
+@login_required
+@user_passes_test(is_admin)
+def issue_pending_certificates(request):
+    if request.method == 'POST':
+        issued = issue_certificates(issued_by=request.user)
+        if issued:
+            messages.success(request, f'{issued} certificates issued successfully')
+        else:
+            messages.info(request, 'There are no pending certificates to issue')
+    return redirect('admin_dashboard:dashboard')
+
+
 @login_required
 @user_passes_test(is_admin)
 def attendance(request):
@@ -305,6 +436,18 @@ def attendance(request):
     return render(request, 'AdminApp/attendance.html', context)
 
 
+@login_required
+@user_passes_test(is_admin)
+def attendance_register(request, pk):
+    course = get_object_or_404(Course, pk=pk)
+    month = parse_register_month(request.GET.get('month'))
+    fmt = request.GET.get('format', 'html')
+    if fmt not in REGISTER_FORMATS:
+        fmt = 'html'
+    
+    return register_response(build_register(course, month), fmt)
+
+
 @login_required
 @user_passes_test(is_admin)
 def events_notices(request):
@@ -402,7 +545,7 @@ def accounts(request):
     recent_salaries = Salary.objects.all().order_by('-created_at')[:10]
     
     # Get unpaid fees
-    unpaid_fees = FeePayment.objects.filter(status='pending').order_by('due_date')[:10]
+    unpaid_fees = FeePayment.objects.filter(status__in=UNPAID_STATUSES).order_by('due_date')[:10]
     
     context = {
         'financial_overview': financial_overview,
@@ -410,11 +553,50 @@ def accounts(request):
         'recent_expenses': recent_expenses,
         'recent_salaries': recent_salaries,
         'unpaid_fees': unpaid_fees,
+        'reconciliation_form': ReconciliationUploadForm(),
         'active_page': 'accounts',
     }
     return render(request, 'AdminApp/accounts.html', context)
 
 
+@login_required
+@user_passes_test(is_admin)
+def reconcile_fees(request):
+    if request.method == 'POST':
+        form = ReconciliationUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            statement = io.TextIOWrapper(form.cleaned_data['statement'].file, encoding='utf-8-sig', newline='')
+            report = io.StringIO()
+            try:
+                result = reconcile_fee_payments(
+                    statement,
+                    report_file=report,
+                    default_method=form.cleaned_data['payment_method'],
+                    reconciled_by=request.user
+                )
+            except ReconciliationError as e:
+                messages.error(request, str(e))
+                return redirect('admin_dashboard:accounts')
+            
+            messages.success(request, f"{result.matched} fee payments reconciled")
+            if result.unmatched or result.already_settled:
+                # The review lines hold payers' statement rows, so they go back
+                # to this admin as a download instead of into public media
+                messages.warning(
+                    request,
+                    f"{result.unmatched} lines unmatched and {result.already_settled} already settled; "
+                    f"see the downloaded review file"
+                )
+                response = HttpResponse(report.getvalue(), content_type='text/csv')
+                response['Content-Disposition'] = (
+                    f'attachment; filename="reconciliation-review-{timezone.now():%Y%m%d-%H%M%S}.csv"'
+                )
+                return response
+        else:
+            messages.error(request, 'Please upload a CSV statement')
+    return redirect('admin_dashboard:accounts')
+
+
 @login_required
 @user_passes_test(is_admin)
 def reports(request):
@@ -451,6 +633,24 @@ def reports(request):
         return render(request, 'AdminApp/reports.html', context)
 
 
+@login_required
+@user_passes_test(is_admin)
+def guardian_reports(request):
+    if request.method == 'POST':
+        period = parse_date((request.POST.get('month') or '') + '-01')
+        report_types = [t for t in request.POST.getlist('report_types') if t in GUARDIAN_REPORT_TYPES]
+        if not period:
+            messages.error(request, 'Please choose a valid month')
+        else:
+            created = generate_guardian_reports(
+                period,
+                report_types=report_types or GUARDIAN_REPORT_TYPES,
+                generated_by=request.user
+            )
+            messages.success(request, f"{created} guardian reports generated for {period.strftime('%B %Y')}")
+    return redirect(f"{reverse_lazy('admin_dashboard:reports')}?type=guardian")
+
+
 def user_report(request, context):
     # Get filter parameters
     period = context['period']
@@ -0,0 +1,114 @@
+from array import array
+from bisect import bisect_left
+from calendar import isleap, monthrange
+from datetime import date, timedelta
+import threading
+import time
+
+from django.conf import settings
+
+from AdminApp.models import WeekendCalendar
+
+
+WEEKDAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+# Off every week; WeekendCalendar rows (extra weekends and holidays) come on top
+WEEKLY_OFF_DAYS = getattr(settings, 'WEEKLY_OFF_DAYS', ('saturday', 'sunday'))
+# Other processes do not see the invalidation signal, so years also expire after this long
+WORKING_DAYS_CACHE_TTL = getattr(settings, 'WORKING_DAYS_CACHE_TTL', 300)
+
+
+class WorkingYear:
+    # One byte per day of the year (1 = working day) and its prefix sums, so
+    # membership and range counts are plain index lookups
+
+    def __init__(self, year, off_dates):
+        self.year = year
+        self.first = date(year, 1, 1)
+        days = 366 if isleap(year) else 365
+        off_weekdays = {WEEKDAY_NAMES.index(day) for day in WEEKLY_OFF_DAYS}
+        first_weekday = self.first.weekday()
+        self.bitmap = bytearray(
+            0 if (first_weekday + offset) % 7 in off_weekdays else 1 for offset in range(days)
+        )
+        for day in off_dates:
+            self.bitmap[(day - self.first).days] = 0
+
+        # prefix[i] = working days among the first i days of the year
+        self.prefix = array('l', [0]) * (days + 1)
+        running = 0
+        for offset, working in enumerate(self.bitmap):
+            running += working
+            self.prefix[offset + 1] = running
+        self.built_at = time.monotonic()
+
+    def offset(self, day):
+        return (day - self.first).days
+
+    @property
+    def total(self):
+        return self.prefix[-1]
+
+
+_years = {}
+_lock = threading.Lock()
+
+
+def _working_year(year):
+    cached = _years.get(year)
+    if cached is not None and time.monotonic() - cached.built_at < WORKING_DAYS_CACHE_TTL:
+        return cached
+    off_dates = WeekendCalendar.objects.filter(date__year=year).values_list('date', flat=True)
+    working_year = WorkingYear(year, off_dates)
+    with _lock:
+        _years[year] = working_year
+    return working_year
+
+
+def invalidate_working_days(year=None):
+    with _lock:
+        if year is None:
+            _years.clear()
+        else:
+            _years.pop(year, None)
+
+
+def is_working_day(day):
+    working_year = _working_year(day.year)
+    return bool(working_year.bitmap[working_year.offset(day)])
+
+
+def working_days_between(start, end):
+    # Working days from start to end, both included
+    if end < start:
+        return 0
+    if start.year == end.year:
+        working_year = _working_year(start.year)
+        return working_year.prefix[working_year.offset(end) + 1] - working_year.prefix[working_year.offset(start)]
+
+    first_year, last_year = _working_year(start.year), _working_year(end.year)
+    count = first_year.total - first_year.prefix[first_year.offset(start)]
+    count += sum(_working_year(year).total for year in range(start.year + 1, end.year))
+    return count + last_year.prefix[last_year.offset(end) + 1]
+
+
+def working_days_in_month(month):
+    start = month.replace(day=1)
+    return working_days_between(start, start.replace(day=monthrange(start.year, start.month)[1]))
+
+
+def next_working_day(day):
+    # day itself if it is a working day, otherwise the first one after it
+    return add_working_days(day - timedelta(days=1), 1)
+
+
+def add_working_days(day, count):
+    # The date count working days after day (day itself not counted)
+    working_year = _working_year(day.year)
+    target = working_year.prefix[working_year.offset(day) + 1] + count
+    while target > working_year.total:
+        target -= working_year.total
+        working_year = _working_year(working_year.year + 1)
+    # First day whose running count reaches the target
+    offset = bisect_left(working_year.prefix, target) - 1
+    return working_year.first + timedelta(days=offset)
@@ -1,7 +1,9 @@
 from django import forms
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import UserCreationForm, PasswordResetForm
+from django.template import loader
 from django.contrib.auth.models import User
 from AuthApp.models import User as CustomUser
+from AuthApp.mail import enqueue_email
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -54,4 +56,14 @@ class UserRegistrationForm(UserCreationForm):
         user.email = self.cleaned_data['email']
         if commit:
             user.save()
-        return user
\ No newline at end of file
+        return user
+
+
+class OutboxPasswordResetForm(PasswordResetForm):
+    # Queue the reset email in the outbox instead of sending it inside the request
+    def send_mail(self, subject_template_name, email_template_name, context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = ''.join(loader.render_to_string(subject_template_name, context).splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = loader.render_to_string(html_email_template_name, context) if html_email_template_name else ''
+        enqueue_email(to_email, subject, body, html_body)
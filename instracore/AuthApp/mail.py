@@ -0,0 +1,147 @@
+from collections import namedtuple
+from datetime import timedelta
+from uuid import uuid4
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+
+OUTBOX_MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+# First retry after this many seconds, doubling on every further failure
+OUTBOX_RETRY_BACKOFF = getattr(settings, 'EMAIL_OUTBOX_RETRY_BACKOFF', 60)
+# How long a dispatcher may hold claimed rows before another one can take them over
+OUTBOX_CLAIM_TIMEOUT = getattr(settings, 'EMAIL_OUTBOX_CLAIM_TIMEOUT', 600)
+
+DispatchResult = namedtuple('DispatchResult', 'sent retried failed')
+
+
+def enqueue_email(to_email, subject, body, html_body='', dedupe_key=None):
+    return enqueue_emails([{
+        'to_email': to_email,
+        'subject': subject,
+        'body': body,
+        'html_body': html_body,
+        'dedupe_key': dedupe_key,
+    }])
+
+
+def _queued_keys(keys, batch_size):
+    return sum(
+        EmailOutbox.objects.filter(dedupe_key__in=keys[i:i + batch_size]).count()
+        for i in range(0, len(keys), batch_size)
+    )
+
+
+def enqueue_emails(messages, batch_size=1000):
+    # Rows whose dedupe_key is already queued are skipped by the unique index.
+    # Returns how many were queued: ignore_conflicts reports nothing back, so
+    # the keyed rows are counted before and after the insert.
+    rows = [
+        EmailOutbox(
+            to_email=message['to_email'],
+            subject=message['subject'][:255],
+            body=message['body'],
+            html_body=message.get('html_body', ''),
+            dedupe_key=message.get('dedupe_key'),
+        )
+        for message in messages
+    ]
+    keys = list({row.dedupe_key for row in rows if row.dedupe_key})
+    with transaction.atomic():
+        before = _queued_keys(keys, batch_size)
+        EmailOutbox.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        queued = _queued_keys(keys, batch_size) - before
+    return queued + sum(1 for row in rows if not row.dedupe_key)
+
+
+def _claim_batch(batch_size):
+    now = timezone.now()
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', next_attempt_at__lte=now)
+    ids = list(EmailOutbox.objects.filter(due).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    # Only rows still due when the UPDATE runs get this dispatcher's token
+    token = uuid4().hex
+    EmailOutbox.objects.filter(due, id__in=ids).update(
+        status='sending',
+        claim_token=token,
+        next_attempt_at=now + timedelta(seconds=OUTBOX_CLAIM_TIMEOUT),
+    )
+    return list(EmailOutbox.objects.filter(claim_token=token, status='sending'))
+
+
+def _build_message(row, connection):
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[row.to_email],
+        connection=connection,
+    )
+    if row.html_body:
+        message.attach_alternative(row.html_body, 'text/html')
+    return message
+
+
+def dispatch_outbox(batch_size=100, max_per_minute=None, limit=None):
+    sent = retried = failed = 0
+    connection = get_connection()
+    connection.open()
+    try:
+        while limit is None or sent + retried + failed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - sent - retried - failed)
+            rows = _claim_batch(size)
+            if not rows:
+                break
+
+            started = time.monotonic()
+            delivered = []
+            reconnect = False
+            for row in rows:
+                try:
+                    if reconnect:
+                        # The connection may be broken after a failure
+                        connection.close()
+                        connection.open()
+                        reconnect = False
+                    _build_message(row, connection).send()
+                except Exception as exc:
+                    attempts = row.attempts + 1
+                    if attempts >= OUTBOX_MAX_ATTEMPTS:
+                        status, failed = 'failed', failed + 1
+                    else:
+                        status, retried = 'pending', retried + 1
+                    EmailOutbox.objects.filter(pk=row.pk).update(
+                        status=status,
+                        attempts=F('attempts') + 1,
+                        next_attempt_at=timezone.now() + timedelta(seconds=OUTBOX_RETRY_BACKOFF * 2 ** row.attempts),
+                        last_error=str(exc)[:1000],
+                        claim_token='',
+                    )
+                    reconnect = True
+                else:
+                    delivered.append(row.pk)
+
+            EmailOutbox.objects.filter(pk__in=delivered).update(
+                status='sent',
+                sent_at=timezone.now(),
+                attempts=F('attempts') + 1,
+                claim_token='',
+            )
+            sent += len(delivered)
+
+            if max_per_minute:
+                # Stay under the provider's rate limit
+                pause = len(rows) * 60 / max_per_minute - (time.monotonic() - started)
+                if pause > 0:
+                    time.sleep(pause)
+    finally:
+        connection.close()
+    return DispatchResult(sent, retried, failed)
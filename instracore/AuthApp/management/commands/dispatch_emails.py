@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from AuthApp.mail import dispatch_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox over a single reused connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--rate', type=int, default=None, help='Maximum emails per minute')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many emails')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox')
+        parser.add_argument('--interval', type=int, default=10, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            result = dispatch_outbox(
+                batch_size=options['batch_size'],
+                max_per_minute=options['rate'],
+                limit=options['limit'],
+            )
+            if result.sent or result.retried or result.failed or not options['loop']:
+                self.stdout.write(
+                    f"Sent {result.sent} emails, {result.retried} will be retried, {result.failed} failed"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
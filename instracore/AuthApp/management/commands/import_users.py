@@ -0,0 +1,45 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from AuthApp.user_import import import_users
+
+
+class Command(BaseCommand):
+    help = 'Create user accounts in bulk from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='CSV with a username column and optional email, names, role, password, ...')
+        parser.add_argument('--role', default='student', help='Role for rows that do not set one')
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing processes (0 hashes in this process)')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--errors', help='Write rejected rows to this CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without creating anyone')
+        parser.add_argument('--site-url', help='Base URL for the set-password links (defaults to SITE_URL)')
+
+    def handle(self, *args, **options):
+        with open(options['csv_file'], newline='', encoding='utf-8-sig') as f:
+            result = import_users(
+                f,
+                default_role=options['role'],
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                dry_run=options['dry_run'],
+                site_url=options['site_url'],
+            )
+
+        if options['errors'] and result.errors:
+            with open(options['errors'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['line', 'error'])
+                writer.writerows(result.errors)
+
+        for line, error in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"Line {line}: {error}"))
+        if len(result.errors) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(result.errors) - 20} more errors"))
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result.created} users, {len(result.errors)} rows rejected, {result.invited} set-password emails queued"
+        ))
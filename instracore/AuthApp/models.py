@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 import uuid
 
 
@@ -31,6 +32,7 @@ class User(AbstractUser):
     gender = models.CharField(max_length=10, blank=True)
     location = models.CharField(max_length=100, blank=True)
     country = models.CharField(max_length=50, blank=True)
+    guardian_email = models.EmailField(blank=True)  # Receives guardian reports for students
     
     # Social links
     facebook = models.URLField(blank=True)
@@ -77,4 +79,33 @@ class ActivityLog(models.Model):
     action = models.CharField(max_length=255)
     timestamp = models.DateTimeField(auto_now_add=True)
     related_object_type = models.CharField(max_length=100, blank=True)
-    related_object_id = models.CharField(max_length=50, blank=True)
\ No newline at end of file
+    related_object_id = models.CharField(max_length=50, blank=True)
+
+class EmailOutbox(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    dedupe_key = models.CharField(max_length=255, unique=True, blank=True, null=True)  # Same key is only queued once
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.to_email} - {self.subject} ({self.status})"
@@ -1,3 +1,136 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+import io
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from AuthApp.mail import OUTBOX_MAX_ATTEMPTS, dispatch_outbox, enqueue_email, enqueue_emails
+from AuthApp.models import EmailOutbox, User
+from AuthApp.user_import import import_users
+
+
+def message(number, dedupe_key=None):
+    return {'to_email': f'user{number}@example.com', 'subject': f'Hello {number}', 'body': 'Body', 'dedupe_key': dedupe_key}
+
+
+class EmailOutboxTests(TestCase):
+
+    def test_enqueue_counts_only_new_rows(self):
+        self.assertEqual(enqueue_emails([message(1, 'a'), message(2, 'b'), message(3)]), 3)
+        self.assertEqual(enqueue_emails([message(1, 'a'), message(4, 'c'), message(5)]), 2)
+        self.assertEqual(enqueue_email('user1@example.com', 'Again', 'Body', dedupe_key='a'), 0)
+        self.assertEqual(EmailOutbox.objects.count(), 5)
+
+    def test_dispatch_sends_every_due_row(self):
+        enqueue_emails([message(i) for i in range(5)])
+        enqueue_email('html@example.com', 'Styled', 'Plain', html_body='<p>Styled</p>')
+        EmailOutbox.objects.filter(to_email='user4@example.com').update(next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(dispatch_outbox(batch_size=2), (5, 0, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[-1].alternatives[0][1], 'text/html')
+        self.assertEqual(EmailOutbox.objects.filter(status='sent', attempts=1).count(), 5)
+        self.assertEqual(EmailOutbox.objects.get(to_email='user4@example.com').status, 'pending')
+
+    def test_limit_caps_one_run(self):
+        enqueue_emails([message(i) for i in range(5)])
+        self.assertEqual(dispatch_outbox(batch_size=2, limit=3).sent, 3)
+        self.assertEqual(dispatch_outbox().sent, 2)
+
+    def test_failures_back_off_then_give_up(self):
+        enqueue_emails([message(1), message(2)])
+        send = EmailMultiAlternatives.send
+
+        def fail_for_user1(self, *args, **kwargs):
+            if self.to == ['user1@example.com']:
+                raise ConnectionError('refused')
+            return send(self, *args, **kwargs)
+
+        with mock.patch.object(EmailMultiAlternatives, 'send', fail_for_user1):
+            self.assertEqual(dispatch_outbox(), (1, 1, 0))
+            row = EmailOutbox.objects.get(to_email='user1@example.com')
+            self.assertEqual((row.status, row.attempts, row.last_error), ('pending', 1, 'refused'))
+            self.assertGreater(row.next_attempt_at, timezone.now())
+            # Not due yet, so the next run leaves it alone
+            self.assertEqual(dispatch_outbox(), (0, 0, 0))
+
+            EmailOutbox.objects.filter(pk=row.pk).update(attempts=OUTBOX_MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+            self.assertEqual(dispatch_outbox(), (0, 0, 1))
+        self.assertEqual(EmailOutbox.objects.get(pk=row.pk).status, 'failed')
+
+    def test_rows_held_by_a_stalled_dispatcher_are_taken_over(self):
+        enqueue_emails([message(1), message(2)])
+        EmailOutbox.objects.filter(to_email='user1@example.com').update(
+            status='sending', claim_token='stalled', next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        EmailOutbox.objects.filter(to_email='user2@example.com').update(
+            status='sending', claim_token='busy', next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(dispatch_outbox().sent, 1)
+        self.assertEqual([email.to for email in mail.outbox], [['user1@example.com']])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserImportTests(TestCase):
+
+    def setUp(self):
+        User.objects.create(username='taken', email='taken@example.com', role='student')
+
+    def run_import(self, lines, **kwargs):
+        kwargs.setdefault('workers', 0)
+        return import_users(io.StringIO('\n'.join(lines)), site_url='https://school.example/', **kwargs)
+
+    def test_valid_rows_are_created_and_bad_rows_reported(self):
+        result = self.run_import([
+            'username,email,role,sub_role,password,date_of_birth',
+            'alice,alice@example.com,,,secret123,2010-05-01',
+            'bob,bob@example.com,employee,teacher,secret123,',
+            'taken,new@example.com,,,secret123,',
+            'carol,TAKEN@example.com,,,secret123,',
+            'dave,dave@example,,,secret123,',
+            'erin,erin@example.com,wizard,,secret123,',
+            'frank,frank@example.com,,,secret123,01/02/2010',
+            'alice,other@example.com,,,secret123,',
+        ])
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, error in result.errors], [4, 5, 6, 7, 8, 9])
+        self.assertEqual(result.errors[0][1], "username 'taken' already exists")
+        alice = User.objects.get(username='alice')
+        self.assertEqual((alice.role, str(alice.date_of_birth)), ('student', '2010-05-01'))
+        self.assertTrue(alice.check_password('secret123'))
+        self.assertEqual(User.objects.get(username='bob').sub_role, 'teacher')
+
+    def test_admin_rows_are_refused(self):
+        result = self.run_import(['username,email,role,password', 'root,root@example.com,admin,secret123'])
+        self.assertEqual(result.errors, [(2, 'admin accounts cannot be imported')])
+        self.assertFalse(User.objects.filter(username='root').exists())
+
+    def test_rows_without_a_password_get_a_set_password_link(self):
+        result = self.run_import([
+            'username,email,role,password',
+            'gina,gina@example.com,employee,',
+            'hank,,student,',
+        ])
+        self.assertEqual((result.created, result.invited), (1, 1))
+        self.assertEqual(result.errors, [(3, 'a password or an email for the set-password link is required')])
+        gina = User.objects.get(username='gina')
+        self.assertFalse(gina.check_password('employee'))
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.to_email, email.dedupe_key), ('gina@example.com', f'account-created:{gina.pk}'))
+        self.assertIn('https://school.example/reset/', email.body)
+
+    def test_dry_run_creates_nothing(self):
+        result = self.run_import(['username,password', 'ivy,secret123'], dry_run=True)
+        self.assertEqual(result.created, 1)
+        self.assertFalse(User.objects.filter(username='ivy').exists())
+
+    def test_hashing_in_worker_processes(self):
+        lines = ['username,password'] + [f'user{i},secret{i}' for i in range(6)]
+        self.assertEqual(self.run_import(lines, workers=2, chunk_size=3).created, 6)
+        self.assertTrue(User.objects.get(username='user4').check_password('secret4'))
+
+    def test_file_without_a_username_column(self):
+        self.assertEqual(self.run_import(['email', 'a@example.com']), (0, [(1, 'the file has no username column')], 0))
@@ -1,6 +1,7 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
+from .forms import OutboxPasswordResetForm
 
 app_name = 'auth'
 
@@ -14,7 +15,7 @@ urlpatterns = [
     path('notifications/', views.notifications_view, name='notifications'),
     
     # Password reset URLs
-    path('password-reset/', auth_views.PasswordResetView.as_view(template_name='AuthApp/password_reset.html'), name='password_reset'),
+    path('password-reset/', auth_views.PasswordResetView.as_view(template_name='AuthApp/password_reset.html', form_class=OutboxPasswordResetForm), name='password_reset'),
     path('password-reset/done/', auth_views.PasswordResetDoneView.as_view(template_name='AuthApp/password_reset_done.html'), name='password_reset_done'),
     path('reset/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(template_name='AuthApp/password_reset_confirm.html'), name='password_reset_confirm'),
     path('reset/done/', auth_views.PasswordResetCompleteView.as_view(template_name='AuthApp/password_reset_complete.html'), name='password_reset_complete'),
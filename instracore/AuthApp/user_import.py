@@ -0,0 +1,221 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import csv
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .mail import enqueue_emails
+from .models import User, AuditLog
+
+
+IMPORT_COLUMNS = (
+    'username', 'email', 'first_name', 'last_name', 'role', 'sub_role',
+    'phone', 'gender', 'date_of_birth', 'guardian_email', 'password',
+)
+
+# Admin accounts are created one at a time, never from a file
+ROLES = {value for value, label in User.ROLE_CHOICES} - {'admin'}
+SUB_ROLES = {value for value, label in User.SUBROLE_CHOICES}
+
+# Base of the set-password links mailed to accounts imported without a password
+SITE_URL = getattr(settings, 'SITE_URL', 'http://localhost:8000')
+ACCOUNT_CREATED_TEMPLATE = 'AuthApp/account_created_email.txt'
+
+ImportResult = namedtuple('ImportResult', 'created errors invited')
+
+
+def _init_worker():
+    # Spawned workers start without Django configured; forked ones inherit it
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_passwords(passwords, executor):
+    if executor is None:
+        return [make_password(password) for password in passwords]
+    # Hashing is CPU bound and dominates the import, so spread it across processes
+    return list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // 32)))
+
+
+def _clean_row(row, default_role):
+    row = {column: (row.get(column) or '').strip() for column in IMPORT_COLUMNS}
+    if not row['username']:
+        raise ValueError('username is required')
+    if len(row['username']) > 150:
+        raise ValueError('username is longer than 150 characters')
+
+    row['role'] = (row['role'] or default_role).lower()
+    if row['role'] == 'admin':
+        raise ValueError('admin accounts cannot be imported')
+    if row['role'] not in ROLES:
+        raise ValueError(f"unknown role '{row['role']}'")
+    row['sub_role'] = row['sub_role'].lower() or None
+    if row['sub_role'] and row['sub_role'] not in SUB_ROLES:
+        raise ValueError(f"unknown sub role '{row['sub_role']}'")
+
+    for field in ('email', 'guardian_email'):
+        if row[field]:
+            try:
+                validate_email(row[field])
+            except ValidationError:
+                raise ValueError(f"invalid {field.replace('_', ' ')} '{row[field]}'")
+
+    if row['date_of_birth']:
+        try:
+            row['date_of_birth'] = datetime.strptime(row['date_of_birth'], '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('date_of_birth must be YYYY-MM-DD')
+    else:
+        row['date_of_birth'] = None
+
+    # Without a password the account gets a random one and a link to set its own
+    row['invite'] = not row['password']
+    if row['invite']:
+        if not row['email']:
+            raise ValueError('a password or an email for the set-password link is required')
+        row['password'] = get_random_string(32)
+    return row
+
+
+def _existing_accounts():
+    # Every username and email already taken, loaded in one query
+    usernames, emails = set(), set()
+    for username, email in User.objects.values_list('username', 'email').iterator(chunk_size=10000):
+        usernames.add(username)
+        if email:
+            emails.add(email.lower())
+    return usernames, emails
+
+
+def _insert(rows, passwords, errors):
+    users = [
+        User(
+            username=row['username'],
+            email=row['email'],
+            first_name=row['first_name'][:150],
+            last_name=row['last_name'][:150],
+            role=row['role'],
+            sub_role=row['sub_role'],
+            phone=row['phone'][:20],
+            gender=row['gender'][:10],
+            date_of_birth=row['date_of_birth'],
+            guardian_email=row['guardian_email'],
+            password=password,
+        )
+        for (line, row), password in zip(rows, passwords)
+    ]
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+        return [(row, user) for (line, row), user in zip(rows, users)]
+    except IntegrityError:
+        pass
+
+    # Someone registered one of these usernames meanwhile; save row by row to find it
+    created = []
+    for (line, row), user in zip(rows, users):
+        try:
+            with transaction.atomic():
+                user.save()
+            created.append((row, user))
+        except IntegrityError:
+            errors.append((line, f"username '{row['username']}' already exists"))
+    return created
+
+
+def _invite(users, site_url):
+    # Queue a set-password link for each account that was given a random password
+    site_url = site_url.rstrip('/')
+    messages = []
+    for user in users:
+        path = reverse('auth:password_reset_confirm', kwargs={
+            'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+            'token': default_token_generator.make_token(user),
+        })
+        messages.append({
+            'to_email': user.email,
+            'subject': 'Your InstaCore account is ready',
+            'body': render_to_string(ACCOUNT_CREATED_TEMPLATE, {'user': user, 'link': f"{site_url}{path}"}),
+            'dedupe_key': f"account-created:{user.pk}",
+        })
+    return enqueue_emails(messages)
+
+
+def import_users(csv_file, default_role='student', chunk_size=500, workers=None, dry_run=False, created_by=None,
+                 site_url=None):
+    # Stream a CSV of new accounts. Bad rows are reported with their line number
+    # and skipped; every valid row is created. Rows without a password are
+    # emailed a link to set one.
+    reader = csv.DictReader(csv_file)
+    if 'username' not in (reader.fieldnames or []):
+        return ImportResult(0, [(1, 'the file has no username column')], 0)
+
+    usernames, emails = _existing_accounts()
+    errors = []
+    created = 0
+    invited = 0
+    batch = []
+    executor = None
+
+    def flush():
+        nonlocal created, invited, executor
+        if not dry_run:
+            if executor is None and workers != 0 and len(batch) > 1:
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            passwords = _hash_passwords([row['password'] for line, row in batch], executor)
+            inserted = _insert(batch, passwords, errors)
+            created += len(inserted)
+            invited += _invite([user for row, user in inserted if row['invite']], site_url or SITE_URL)
+        else:
+            created += len(batch)
+        batch.clear()
+
+    try:
+        for line, raw in enumerate(reader, start=2):
+            try:
+                row = _clean_row(raw, default_role)
+            except ValueError as e:
+                errors.append((line, str(e)))
+                continue
+            if row['username'] in usernames:
+                errors.append((line, f"username '{row['username']}' already exists"))
+                continue
+            if row['email'] and row['email'].lower() in emails:
+                errors.append((line, f"email '{row['email']}' is already in use"))
+                continue
+            # Later rows in the same file must not reuse these either
+            usernames.add(row['username'])
+            if row['email']:
+                emails.add(row['email'].lower())
+
+            batch.append((line, row))
+            if len(batch) >= chunk_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if created and not dry_run:
+        AuditLog.objects.create(
+            user=created_by,
+            action=f"Imported {created} users from CSV",
+            model_name="User",
+            object_id="bulk"
+        )
+    errors.sort()
+    return ImportResult(created, errors, invited)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CandidateappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'CandidateApp'
+
+    def ready(self):
+        from CandidateApp import signals  # noqa: F401
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from CandidateApp.open_jobs import expire_job_posts
+
+
+class Command(BaseCommand):
+    help = 'Deactivate job posts whose application deadline has passed (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Expire posts with a deadline before this YYYY-MM-DD (defaults to today)')
+
+    def handle(self, *args, **options):
+        today = parse_date(options['date']) if options['date'] else timezone.now().date()
+        if not today:
+            raise CommandError('--date must be YYYY-MM-DD')
+
+        expired = expire_job_posts(today)
+        self.stdout.write(self.style.SUCCESS(f"{expired} job posts expired"))
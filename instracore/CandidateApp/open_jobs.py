@@ -0,0 +1,78 @@
+from collections import namedtuple
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from AuthApp.models import AuditLog
+from EmployeeApp.models import JobPost
+from CandidateApp.models import JobApplication
+
+
+# Other processes do not see the JobPost signal, so the cache also expires after this long
+OPEN_JOBS_CACHE_TTL = getattr(settings, 'OPEN_JOBS_CACHE_TTL', 300)
+
+# How many posts are open, the day that holds for and when it was counted
+OpenJobs = namedtuple('OpenJobs', 'count day built_at')
+
+_open_jobs = None
+# Bumped by every invalidation, so a count read before one is never stored after it
+_generation = 0
+_lock = threading.Lock()
+
+
+def open_job_posts(today=None):
+    # Served by the (is_active, deadline) index on JobPost
+    return JobPost.objects.filter(is_active=True, deadline__gte=today or timezone.now().date())
+
+
+def open_job_count(today=None):
+    global _open_jobs
+    today = today or timezone.now().date()
+    with _lock:
+        cached, generation = _open_jobs, _generation
+    # Deadlines pass at midnight, so a count made on another day is stale too
+    if cached is not None and cached.day == today and time.monotonic() - cached.built_at < OPEN_JOBS_CACHE_TTL:
+        return cached.count
+    open_jobs = OpenJobs(open_job_posts(today).count(), today, time.monotonic())
+    with _lock:
+        if generation == _generation:
+            _open_jobs = open_jobs
+    return open_jobs.count
+
+
+def invalidate_open_jobs():
+    global _open_jobs, _generation
+    with _lock:
+        _generation += 1
+        _open_jobs = None
+
+
+def open_jobs_for(candidate, today=None):
+    # Open posts the candidate has not applied to: the indexed open-post
+    # filter plus NOT EXISTS against the (candidate, job_post) unique index.
+    # When nothing is open the cached count skips the query entirely.
+    if not open_job_count(today):
+        return JobPost.objects.none()
+    return open_job_posts(today).exclude(
+        Exists(JobApplication.objects.filter(candidate=candidate, job_post=OuterRef('pk')))
+    ).order_by('-created_at', '-pk')
+
+
+def expire_job_posts(today=None, run_by=None):
+    # Deactivate every active post whose deadline has passed, in one UPDATE
+    today = today or timezone.now().date()
+    expired = JobPost.objects.filter(is_active=True, deadline__lt=today).update(is_active=False)
+    # A queryset update sends no post_save, so refresh the cache here
+    transaction.on_commit(invalidate_open_jobs)
+    if expired:
+        AuditLog.objects.create(
+            user=run_by,
+            action=f"Expired {expired} job posts past their deadline",
+            model_name="JobPost",
+            object_id="bulk"
+        )
+    return expired
@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from EmployeeApp.models import JobPost
+from CandidateApp.open_jobs import invalidate_open_jobs
+
+
+@receiver([post_save, post_delete], sender=JobPost)
+def refresh_open_jobs(sender, instance, **kwargs):
+    # After commit, so no other thread can cache the uncommitted state
+    transaction.on_commit(invalidate_open_jobs)
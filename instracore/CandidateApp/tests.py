@@ -1,6 +1,75 @@
+from datetime import date
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from AuthApp.models import AuditLog, User
+from CandidateApp import open_jobs
+from CandidateApp.models import JobApplication
+from EmployeeApp.models import JobPost
+
+
+class OpenJobsTests(TestCase):
+
+    def setUp(self):
+        open_jobs.invalidate_open_jobs()
+        self.today = date(2027, 1, 15)
+        self.admin = User.objects.create(username='hr', email='hr@example.com', role='admin')
+        self.candidate = User.objects.create(username='cand', email='cand@example.com', role='candidate')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts = [self.post('Open', date(2027, 1, 31)), self.post('Last day', self.today)]
+            self.post('Closed', date(2027, 1, 14))
+            self.post('Paused', date(2027, 2, 28), is_active=False)
+
+    def tearDown(self):
+        open_jobs.invalidate_open_jobs()
+
+    def post(self, title, deadline, **kwargs):
+        return JobPost.objects.create(
+            title=title, description='', role='teacher', min_requirements='', salary_range='', location='',
+            availability='', application_instructions='', posted_by=self.admin, deadline=deadline, **kwargs
+        )
+
+    def test_count_is_cached_until_a_post_changes(self):
+        self.assertEqual(open_jobs.open_job_count(self.today), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(open_jobs.open_job_count(self.today), 2)
+        # The count is per day, so the next day is counted afresh
+        self.assertEqual(open_jobs.open_job_count(date(2027, 1, 16)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post('New', date(2027, 3, 1))
+        self.assertEqual(open_jobs.open_job_count(date(2027, 1, 16)), 2)
+
+    def test_open_jobs_leave_out_applied_posts(self):
+        JobApplication.objects.create(candidate=self.candidate, job_post=self.posts[0])
+        self.assertEqual(list(open_jobs.open_jobs_for(self.candidate, self.today)), [self.posts[1]])
+
+    def test_nothing_open_skips_the_query(self):
+        open_jobs.open_job_count(date(2027, 6, 1))
+        with self.assertNumQueries(0):
+            self.assertEqual(list(open_jobs.open_jobs_for(self.candidate, date(2027, 6, 1))), [])
+
+    def test_expiry_deactivates_past_deadlines(self):
+        self.assertEqual(open_jobs.open_job_count(self.today), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(open_jobs.expire_job_posts(date(2027, 2, 1)), 3)
+        self.assertEqual(JobPost.objects.filter(is_active=True).count(), 0)
+        self.assertEqual(AuditLog.objects.get(model_name='JobPost').action, 'Expired 3 job posts past their deadline')
+        self.assertEqual(open_jobs.open_job_count(self.today), 0)
+        self.assertEqual(open_jobs.expire_job_posts(date(2027, 2, 1)), 0)
+
+    def test_count_read_before_an_invalidation_is_not_stored(self):
+        # Another request saves a post while this one is counting
+        open_job_posts = open_jobs.open_job_posts
+
+        def counted_during_a_save(today=None):
+            open_jobs.invalidate_open_jobs()
+            return open_job_posts(today)
+
+        with mock.patch.object(open_jobs, 'open_job_posts', counted_during_a_save):
+            self.assertEqual(open_jobs.open_job_count(self.today), 2)
+        self.assertIsNone(open_jobs._open_jobs)
 
 
 # if click on apply now, then go on another page, (like student signup) that can work for candidate related issue:
@@ -17,6 +17,7 @@ import csv
 from AuthApp.models import User, Notification, AuditLog
 from EmployeeApp.models import JobPost
 from CandidateApp.models import CandidateProfile, JobApplication, InterviewInvitation
+from CandidateApp.open_jobs import open_jobs_for
 from CandidateApp.forms import (
     CandidateProfileForm, JobApplicationForm, InterviewInvitationForm
 )
@@ -55,11 +56,7 @@ def dashboard(request):
     ).order_by('scheduled_date')[:5]
     
     # Get available jobs (excluding jobs already applied to)
-    applied_job_ids = applications.values_list('job_post_id', flat=True)
-    available_jobs = JobPost.objects.filter(
-        is_active=True,
-        deadline__gte=timezone.now().date()
-    ).exclude(id__in=applied_job_ids).order_by('-created_at')[:10]
+    available_jobs = open_jobs_for(candidate)[:10]
     
     context = {
         'profile': profile,
@@ -117,16 +114,8 @@ def profile(request):
 def available_jobs(request):
     candidate = request.user
     
-    # Get job applications to exclude already applied jobs
-    applied_job_ids = JobApplication.objects.filter(
-        candidate=candidate
-    ).values_list('job_post_id', flat=True)
-    
-    # Get available jobs
-    jobs_list = JobPost.objects.filter(
-        is_active=True,
-        deadline__gte=timezone.now().date()
-    ).exclude(id__in=applied_job_ids).order_by('-created_at')
+    # Get available jobs, excluding jobs already applied to
+    jobs_list = open_jobs_for(candidate)
     
     # Filter by role
     role_filter = request.GET.get('role')
@@ -0,0 +1,180 @@
+from calendar import monthrange
+from datetime import date
+import csv
+
+from django.db.models import FilteredRelation, Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.html import escape
+
+from AdminApp.working_days import is_working_day
+from StudentApp.models import Enrollment
+from instracore.pdf import PDFDocument, A4_LANDSCAPE
+
+
+REGISTER_ENROLLMENT_STATUSES = ('approved', 'ongoing', 'completed')
+REGISTER_FORMATS = ('html', 'csv', 'pdf')
+
+# Cell values in the register; 0 means no record for that day
+STATUSES = ('present', 'absent', 'leave', 'late')
+STATUS_INDEX = {status: index for index, status in enumerate(STATUSES, start=1)}
+CODES = ('', 'P', 'A', 'L', 'T')
+NO_RECORD = '.'
+OFF_DAY = '-'
+
+PDF_FONT_SIZE = 8
+PDF_LINE_HEIGHT = 11
+PDF_NAME_WIDTH = 24
+
+
+class _Echo:
+    # csv.writer target that hands each row back instead of buffering it
+    def write(self, value):
+        return value
+
+
+class AttendanceRegister:
+    # A month of attendance for a course's cohort: one byte per student per
+    # day in a flat bytearray, students in rows and days of the month in columns
+
+    def __init__(self, course, month, students, cells):
+        self.course = course
+        self.month = month
+        self.students = students  # [(student id, display name)]
+        self.cells = cells
+        self.days = monthrange(month.year, month.month)[1]
+        self.working = [is_working_day(month.replace(day=day)) for day in range(1, self.days + 1)]
+
+    @property
+    def title(self):
+        return f"{self.course.title} - Attendance register - {self.month:%B %Y}"
+
+    def header(self):
+        return ['Student'] + [str(day) for day in range(1, self.days + 1)] + ['P', 'A', 'L', 'T']
+
+    def rows(self):
+        # (name, [code per day], [present, absent, leave, late]) per student
+        for row, (student_id, name) in enumerate(self.students):
+            values = self.cells[row * self.days:(row + 1) * self.days]
+            codes = [
+                CODES[value] if value else (NO_RECORD if working else OFF_DAY)
+                for value, working in zip(values, self.working)
+            ]
+            yield name, codes, [values.count(index) for index in range(1, len(CODES))]
+
+
+def build_register(course, month):
+    # The cohort and its month of attendance in one LEFT JOIN; students
+    # without a single record still get a row
+    start = month.replace(day=1)
+    end = start.replace(day=monthrange(start.year, start.month)[1])
+    rows = Enrollment.objects.filter(
+        course=course, status__in=REGISTER_ENROLLMENT_STATUSES
+    ).annotate(
+        month_attendance=FilteredRelation('student__attendance_records', condition=Q(
+            student__attendance_records__date__gte=start,
+            student__attendance_records__date__lte=end,
+        ))
+    ).order_by('student__username').values_list(
+        'student_id', 'student__username', 'student__first_name', 'student__last_name',
+        'month_attendance__date', 'month_attendance__status',
+    )
+
+    days = end.day
+    students, student_index = [], {}
+    cells = bytearray()
+    for student_id, username, first_name, last_name, day, status in rows.iterator(chunk_size=5000):
+        if student_id not in student_index:
+            student_index[student_id] = len(students)
+            students.append((student_id, f"{first_name} {last_name}".strip() or username))
+            cells.extend(bytes(days))
+        if day is not None:
+            cells[student_index[student_id] * days + day.day - 1] = STATUS_INDEX.get(status, 0)
+    return AttendanceRegister(course, start, students, cells)
+
+
+def register_csv(register):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([register.title])
+    yield writer.writerow(register.header())
+    for name, codes, totals in register.rows():
+        yield writer.writerow([name] + codes + totals)
+
+
+def register_html(register):
+    # A standalone printable page, streamed a table row at a time
+    yield (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>' + escape(register.title) + '</title>'
+        '<style>body{font-family:sans-serif;font-size:11px}table{border-collapse:collapse}'
+        'th,td{border:1px solid #999;padding:1px 3px;text-align:center}td.name{text-align:left;white-space:nowrap}'
+        'th.off,td.off{background:#eee}@media print{@page{size:landscape}}</style></head><body>'
+        '<h3>' + escape(register.title) + '</h3><table><thead><tr>'
+    )
+    header = register.header()
+    off = [False] + [not working for working in register.working] + [False] * 4
+    yield ''.join(
+        f'<th class="off">{escape(label)}</th>' if is_off else f'<th>{escape(label)}</th>'
+        for label, is_off in zip(header, off)
+    ) + '</tr></thead><tbody>'
+    for name, codes, totals in register.rows():
+        yield (
+            f'<tr><td class="name">{escape(name)}</td>'
+            + ''.join(
+                f'<td class="off">{code}</td>' if not working else f'<td>{code}</td>'
+                for code, working in zip(codes, register.working)
+            )
+            + ''.join(f'<td>{total}</td>' for total in totals)
+            + '</tr>'
+        )
+    yield (
+        '</tbody></table><p>P present, A absent, L on leave, T late, '
+        f'{NO_RECORD} no record, {OFF_DAY} weekend or holiday</p></body></html>'
+    )
+
+
+def register_pdf(register):
+    # Fixed-width columns in Courier so the grid lines up without drawing
+    document = PDFDocument(A4_LANDSCAPE, title=register.title)
+    top, bottom, left = A4_LANDSCAPE[1] - 40, 40, 30
+
+    def line(name, cells, totals):
+        return f"{name[:PDF_NAME_WIDTH]:<{PDF_NAME_WIDTH}}" + ''.join(f"{cell:>3}" for cell in cells) + \
+            '  ' + ''.join(f"{total:>4}" for total in totals)
+
+    header = line('Student', range(1, register.days + 1), ['P', 'A', 'L', 'T'])
+    y = bottom
+    for name, codes, totals in register.rows():
+        if y <= bottom:
+            document.add_page()
+            document.text(left, top, register.title, size=12, font='bold')
+            document.text(left, top - 22, header, size=PDF_FONT_SIZE, font='mono')
+            y = top - 22 - PDF_LINE_HEIGHT * 1.5
+        document.text(left, y, line(name, codes, totals), size=PDF_FONT_SIZE, font='mono')
+        y -= PDF_LINE_HEIGHT
+    if not register.students:
+        document.text(left, top, register.title, size=12, font='bold')
+    return document.render()
+
+
+def register_response(register, fmt='html'):
+    file_name = f"attendance-{register.course.pk}-{register.month:%Y-%m}"
+    if fmt == 'csv':
+        response = StreamingHttpResponse(register_csv(register), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{file_name}.csv"'
+    elif fmt == 'pdf':
+        # The cross-reference table needs every object's offset, so a PDF is
+        # assembled in memory; a month register is a few dozen pages at most
+        response = HttpResponse(register_pdf(register), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="{file_name}.pdf"'
+    else:
+        response = StreamingHttpResponse(register_html(register), content_type='text/html; charset=utf-8')
+    return response
+
+
+def parse_register_month(value, default=None):
+    # 'YYYY-MM' to the first of that month, or the current month
+    try:
+        year, month = (int(part) for part in (value or '').split('-'))
+        return date(year, month, 1)
+    except ValueError:
+        return (default or timezone.now().date()).replace(day=1)
@@ -0,0 +1,109 @@
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from AdminApp.financials import add_to_financial_overview
+from AuthApp.models import AuditLog, Notification
+from EmployeeApp.models import Application, Course, Expense, Salary
+from EmployeeApp.payroll import salary_transactions
+
+
+BulkResult = namedtuple('BulkResult', 'updated skipped')
+
+Transition = namedtuple('Transition', 'sources target label')
+
+EXPENSE_TRANSITIONS = {
+    'approve': Transition(('pending',), 'approved', 'Approved'),
+    'reject': Transition(('pending',), 'rejected', 'Rejected'),
+}
+
+SALARY_TRANSITIONS = {
+    'approve': Transition(('pending',), 'approved', 'Approved'),
+    'reject': Transition(('pending',), 'rejected', 'Rejected'),
+    'pay': Transition(('approved',), 'paid', 'Paid'),
+}
+
+COURSE_TRANSITIONS = {
+    'approve': Transition(('pending_approval',), 'active', 'Approved'),
+    # Rejected requests go back to the teacher as drafts
+    'reject': Transition(('pending_approval',), 'draft', 'Rejected'),
+}
+
+APPLICATION_TRANSITIONS = {
+    'hire': Transition(('accepted',), 'hired', 'Hired'),
+    'reject': Transition(('accepted',), 'rejected', 'Rejected'),
+}
+
+
+def _apply(model, transitions, action, ids, user, fields=('id',), queryset=None, **updates):
+    # Lock the selected rows, keep only those allowed to make the transition and
+    # move them with a single UPDATE. Returns the result and the locked rows.
+    transition = transitions[action]
+    ids = set(ids)
+    queryset = model.objects.all() if queryset is None else queryset
+    rows = list(queryset.select_for_update().filter(
+        id__in=ids, status__in=transition.sources
+    ).values(*fields))
+    if not rows:
+        return BulkResult(0, len(ids)), rows
+
+    row_ids = [row['id'] for row in rows]
+    model.objects.filter(id__in=row_ids).update(status=transition.target, **updates)
+    AuditLog.objects.bulk_create([
+        AuditLog(
+            user=user,
+            action=f"{transition.label} {model._meta.verbose_name} #{row_id}",
+            model_name=model.__name__,
+            object_id=row_id,
+        )
+        for row_id in row_ids
+    ])
+    return BulkResult(len(rows), len(ids) - len(rows)), rows
+
+
+def bulk_update_expenses(ids, action, user):
+    with transaction.atomic():
+        updates = {'approved_by': user} if action == 'approve' else {}
+        result, rows = _apply(Expense, EXPENSE_TRANSITIONS, action, ids, user, ('id', 'date', 'amount'), **updates)
+        if result.updated and action == 'approve':
+            add_to_financial_overview(expenses=[(row['date'], row['amount']) for row in rows])
+    return result
+
+
+def bulk_update_salaries(ids, action, user, payment_date=None):
+    payment_date = payment_date or timezone.now().date()
+    # Only an approval records who approved; a rejection leaves approved_by empty
+    updates = {'payment_date': payment_date} if action == 'pay' else {}
+    if action == 'approve':
+        updates['approved_by'] = user
+    with transaction.atomic():
+        result, rows = _apply(
+            Salary, SALARY_TRANSITIONS, action, ids, user,
+            ('id', 'employee_id', 'amount', 'month'), **updates
+        )
+        if result.updated and action == 'pay':
+            salary_transactions(rows, payment_date)
+            add_to_financial_overview(salaries=[(row['month'], row['amount']) for row in rows])
+    return result
+
+
+def bulk_update_courses(ids, action, user):
+    with transaction.atomic():
+        result, rows = _apply(Course, COURSE_TRANSITIONS, action, ids, user, ('id', 'title', 'created_by_id'))
+        verb = 'approved' if action == 'approve' else 'returned to draft'
+        Notification.objects.bulk_create([
+            Notification(user_id=row['created_by_id'], message=f"Your course '{row['title']}' has been {verb}.")
+            for row in rows if row['created_by_id']
+        ])
+    return result
+
+
+def bulk_update_applications(ids, action, user):
+    # Only teacher applications are reviewed by faculty
+    with transaction.atomic():
+        result, rows = _apply(
+            Application, APPLICATION_TRANSITIONS, action, ids, user,
+            queryset=Application.objects.filter(job__role='teacher')
+        )
+    return result
@@ -0,0 +1,227 @@
+from collections import namedtuple
+from datetime import datetime
+from hmac import compare_digest
+import csv
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from AuthApp.models import User, AuditLog
+from EmployeeApp.models import Attendance
+from StudentApp.academic_summary import rebuild_summaries
+
+
+# Events collapsed in memory before each bulk upsert
+CHECKIN_BATCH_SIZE = getattr(settings, 'ATTENDANCE_CHECKIN_BATCH_SIZE', 5000)
+# {token: device name} for badge and biometric devices posting to the ingestion endpoint
+CHECKIN_DEVICE_TOKENS = getattr(settings, 'ATTENDANCE_DEVICE_TOKENS', {})
+
+CHECKIN_FORMATS = ('jsonl', 'csv')
+DIRECTIONS = {'in': 'in', 'checkin': 'in', 'check_in': 'in', 'out': 'out', 'checkout': 'out', 'check_out': 'out'}
+
+IngestResult = namedtuple('IngestResult', 'events created updated unchanged errors')
+
+
+class CheckinError(ValueError):
+    pass
+
+
+def read_events(stream, fmt='jsonl'):
+    # (line number, event dict) from a JSON lines or CSV stream
+    if fmt == 'csv':
+        for line, row in enumerate(csv.DictReader(stream), start=2):
+            yield line, row
+        return
+    for line, text in enumerate(stream, start=1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            event = json.loads(text)
+        except ValueError:
+            event = None
+        yield line, event if isinstance(event, dict) else {'_invalid': text}
+
+
+def _parse_event(event):
+    # (user id or username, local datetime, 'in' / 'out' / None)
+    if '_invalid' in event:
+        raise CheckinError('not a JSON object')
+    user = str(event.get('user_id') or '').strip()
+    user = int(user) if user.isdigit() else str(event.get('username') or '').strip()
+    if not user:
+        raise CheckinError('user_id or username is required')
+
+    value = str(event.get('timestamp') or event.get('time') or '').strip()
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise CheckinError(f"invalid timestamp '{value}'")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    moment = timezone.localtime(moment)
+
+    direction = str(event.get('direction') or event.get('type') or '').strip().lower()
+    if direction and direction not in DIRECTIONS:
+        raise CheckinError(f"unknown direction '{direction}'")
+    return user, moment, DIRECTIONS.get(direction)
+
+
+def _earliest(*times):
+    times = [value for value in times if value is not None]
+    return min(times) if times else None
+
+
+def _latest(*times):
+    times = [value for value in times if value is not None]
+    return max(times) if times else None
+
+
+class CheckinIngester:
+    # Collapses device events to the first check-in and last check-out per
+    # user per day, then merges each batch into Attendance. Merging only ever
+    # takes the earlier check-in and the later check-out, so the result does
+    # not depend on batching or order and re-delivered events change nothing.
+
+    def __init__(self, batch_size=CHECKIN_BATCH_SIZE, source=''):
+        self.batch_size = batch_size
+        self.source = source
+        self.pending = {}  # (user, date) -> [first in, last out]
+        self.pending_events = 0
+        self.user_ids = {}  # username -> id, kept across batches
+        self.result = IngestResult(0, 0, 0, 0, [])
+
+    def add(self, line, event):
+        try:
+            user, moment, direction = _parse_event(event)
+        except CheckinError as e:
+            self.result.errors.append((line, str(e)))
+            return
+        at = moment.time().replace(microsecond=0)
+        times = self.pending.setdefault((user, moment.date()), [None, None])
+        # Events without a direction count as both: the earliest is the
+        # check-in and the latest the check-out (the same time for a single swipe)
+        if direction != 'out':
+            times[0] = _earliest(times[0], at)
+        if direction != 'in':
+            times[1] = _latest(times[1], at)
+        self.pending_events += 1
+        if self.pending_events >= self.batch_size:
+            self.flush()
+
+    def _resolve_users(self):
+        usernames = {user for user, day in self.pending if isinstance(user, str) and user not in self.user_ids}
+        if usernames:
+            self.user_ids.update(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        ids = {user for user, day in self.pending if isinstance(user, int)}
+        known_ids = set(User.objects.filter(id__in=ids).values_list('id', flat=True)) if ids else set()
+
+        collapsed = {}
+        for (user, day), (check_in, check_out) in self.pending.items():
+            user_id = self.user_ids.get(user) if isinstance(user, str) else (user if user in known_ids else None)
+            if user_id is None:
+                self.result.errors.append((None, f"unknown user '{user}'"))
+                continue
+            times = collapsed.setdefault((user_id, day), [None, None])
+            times[0], times[1] = _earliest(times[0], check_in), _latest(times[1], check_out)
+        return collapsed
+
+    def _locked_rows(self, keys):
+        # {(user id, date): (status, check in, check out)} for the stored rows, locked
+        return {
+            (user_id, day): (status, check_in, check_out)
+            for user_id, day, status, check_in, check_out in Attendance.objects.select_for_update().filter(
+                user_id__in={user_id for user_id, day in keys},
+                date__in={day for user_id, day in keys},
+            ).values_list('user_id', 'date', 'status', 'check_in_time', 'check_out_time')
+            if (user_id, day) in keys
+        }
+
+    def _merge(self, collapsed, existing, created, updated, status_changed):
+        for (user_id, day), (check_in, check_out) in collapsed.items():
+            status, stored_in, stored_out = existing.get((user_id, day), ('present', None, None))
+            check_in, check_out = _earliest(stored_in, check_in), _latest(stored_out, check_out)
+            row = Attendance(user_id=user_id, date=day, status=status, check_in_time=check_in, check_out_time=check_out)
+            if (user_id, day) not in existing:
+                created.append(row)
+            elif (stored_in, stored_out) != (check_in, check_out):
+                if status == 'absent':
+                    # The device saw them, so they were not absent
+                    row.status = 'present'
+                    status_changed.append(user_id)
+                updated.append(row)
+
+    def flush(self):
+        if not self.pending:
+            return
+        collapsed = self._resolve_users()
+        events = self.pending_events
+        self.pending, self.pending_events = {}, 0
+
+        created, updated, status_changed = [], [], []
+        with transaction.atomic():
+            existing = self._locked_rows(collapsed)
+            self._merge(collapsed, existing, created, updated, status_changed)
+
+            # New rows are inserted with ON CONFLICT DO NOTHING so a row another
+            # writer inserted since the read is never overwritten. Those rows
+            # are locked and merged like existing ones instead, which keeps the
+            # earlier check-in and later check-out of both writers.
+            Attendance.objects.bulk_create(created, batch_size=1000, ignore_conflicts=True)
+            inserted = {(row.user_id, row.date): (row.check_in_time, row.check_out_time) for row in created}
+            raced = {
+                key: stored for key, stored in self._locked_rows(inserted).items() if stored[1:] != inserted[key]
+            }
+            if raced:
+                created = [row for row in created if (row.user_id, row.date) not in raced]
+                self._merge({key: inserted[key] for key in raced}, raced, created, updated, status_changed)
+
+            # INSERT ... ON CONFLICT UPDATE is far cheaper than bulk_update's
+            # CASE per row; every row in it is locked above
+            Attendance.objects.bulk_create(
+                updated, batch_size=1000, update_conflicts=True,
+                unique_fields=['user', 'date'], update_fields=['check_in_time', 'check_out_time', 'status'],
+            )
+
+            # bulk writes send no signals
+            summary_ids = [row.user_id for row in created] + status_changed
+            if summary_ids:
+                transaction.on_commit(lambda: rebuild_summaries(summary_ids))
+
+        self.result = self.result._replace(
+            events=self.result.events + events,
+            created=self.result.created + len(created),
+            updated=self.result.updated + len(updated),
+            unchanged=self.result.unchanged + len(collapsed) - len(created) - len(updated),
+        )
+
+    def finish(self):
+        self.flush()
+        if self.result.created or self.result.updated:
+            AuditLog.objects.create(
+                user=None,
+                action=f"Ingested {self.result.events} check-in events{' from ' + self.source if self.source else ''}: "
+                       f"{self.result.created} new, {self.result.updated} updated attendance records",
+                model_name="Attendance",
+                object_id="bulk"
+            )
+        return self.result
+
+
+def ingest_checkins(stream, fmt='jsonl', batch_size=CHECKIN_BATCH_SIZE, source=''):
+    if fmt not in CHECKIN_FORMATS:
+        raise CheckinError(f"unknown format '{fmt}'")
+    ingester = CheckinIngester(batch_size=batch_size, source=source)
+    for line, event in read_events(stream, fmt):
+        ingester.add(line, event)
+    return ingester.finish()
+
+
+def device_for_token(token):
+    # Device name for a bearer token, compared in constant time
+    for device_token, device in CHECKIN_DEVICE_TOKENS.items():
+        if token and compare_digest(token.encode(), device_token.encode()):
+            return device
+    return None
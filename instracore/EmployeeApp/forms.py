@@ -2,7 +2,7 @@ from django import forms
 from django.utils import timezone
 from AuthApp.models import User
 from EmployeeApp.models import (
-    JobPost, Application, InterviewSchedule, Salary, Expense, Transaction,
+    JobPost, Application, InterviewSchedule, Salary, BaseSalary, Expense, Transaction,
     Course, CourseTeacher, Assignment, LessonPlan, Attendance, ClassRoutine
 )
 
@@ -41,6 +41,12 @@ class SalaryForm(forms.ModelForm):
         }
 
 
+class BaseSalaryForm(forms.ModelForm):
+    class Meta:
+        model = BaseSalary
+        fields = ('employee', 'amount', 'is_active')
+
+
 class ExpenseForm(forms.ModelForm):
     class Meta:
         model = Expense
@@ -62,7 +68,7 @@ class TransactionForm(forms.ModelForm):
 class CourseForm(forms.ModelForm):
     class Meta:
         model = Course
-        fields = ('title', 'description', 'course_type', 'price', 'duration', 'status', 'syllabus')
+        fields = ('title', 'description', 'course_type', 'price', 'duration', 'status', 'capacity', 'syllabus')
 
 
 class CourseTeacherForm(forms.ModelForm):
@@ -107,4 +113,17 @@ class ClassRoutineForm(forms.ModelForm):
         widgets = {
             'start_time': forms.TimeInput(attrs={'type': 'time'}),
             'end_time': forms.TimeInput(attrs={'type': 'time'}),
-        }
\ No newline at end of file
+        }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        if start_time and end_time and end_time <= start_time:
+            raise forms.ValidationError("End time must be after start time")
+        return cleaned_data
+
+class GradebookUploadForm(forms.Form):
+    exam_name = forms.CharField(max_length=100)
+    total_marks = forms.DecimalField(max_digits=5, decimal_places=2, min_value=1, initial=100)
+    csv_file = forms.FileField(required=False, help_text='Columns: username or enrollment_id, marks, remarks')
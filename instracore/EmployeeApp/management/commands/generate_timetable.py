@@ -0,0 +1,64 @@
+from datetime import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AuthApp.models import User
+from EmployeeApp.timetable import generate_timetable
+
+
+class Command(BaseCommand):
+    help = 'Generate a conflict-free weekly class routine for active courses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Only schedule these course ids')
+        parser.add_argument('--rooms', help='Comma separated room names (defaults to rooms already in use)')
+        parser.add_argument('--availability', help='JSON file mapping teacher usernames to the days they can teach')
+        parser.add_argument('--sessions', type=int, default=2, help='Sessions per course per week')
+        parser.add_argument('--day-start', default='09:00', help='Start of the first period (HH:MM)')
+        parser.add_argument('--periods', type=int, default=6, help='Periods per day')
+        parser.add_argument('--period-minutes', type=int, default=60)
+        parser.add_argument('--time-budget', type=int, default=50, help='Search time budget in seconds')
+        parser.add_argument('--replace', action='store_true', help='Regenerate courses that already have a routine')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            day_start = datetime.strptime(options['day_start'], '%H:%M').time()
+        except ValueError:
+            raise CommandError('--day-start must be HH:MM')
+
+        availability = None
+        if options['availability']:
+            with open(options['availability']) as f:
+                by_username = json.load(f)
+            teacher_ids = dict(User.objects.filter(username__in=by_username).values_list('username', 'id'))
+            availability = {
+                teacher_ids[username]: [day.lower() for day in days]
+                for username, days in by_username.items() if username in teacher_ids
+            }
+
+        rooms = [room.strip() for room in options['rooms'].split(',') if room.strip()] if options['rooms'] else None
+
+        result = generate_timetable(
+            course_ids=options['courses'],
+            rooms=rooms,
+            availability=availability,
+            sessions_per_week=options['sessions'],
+            day_start=day_start,
+            periods=options['periods'],
+            period_minutes=options['period_minutes'],
+            time_budget=options['time_budget'],
+            replace=options['replace'],
+            commit=not options['dry_run'],
+        )
+
+        verb = 'Planned' if options['dry_run'] else 'Created'
+        self.stdout.write(f"{verb} {len(result.routines)} class routines in {result.elapsed:.1f}s")
+        if result.unscheduled:
+            self.stdout.write(self.style.WARNING(
+                f"Could not schedule {len(result.unscheduled)} sessions for courses: "
+                + ', '.join(str(course_id) for course_id in sorted(set(result.unscheduled)))
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Timetable is complete'))
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from EmployeeApp.checkins import CHECKIN_BATCH_SIZE, CHECKIN_FORMATS, ingest_checkins
+
+
+class Command(BaseCommand):
+    help = 'Load badge or biometric check-in events into Attendance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('events_file', help="JSON lines or CSV with user_id or username, timestamp and optional direction ('-' for stdin)")
+        parser.add_argument('--format', choices=CHECKIN_FORMATS, help='Defaults to csv for .csv files, otherwise jsonl')
+        parser.add_argument('--batch-size', type=int, default=CHECKIN_BATCH_SIZE)
+        parser.add_argument('--source', default='', help='Device name for the audit log')
+
+    def handle(self, *args, **options):
+        path = options['events_file']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        if path == '-':
+            result = ingest_checkins(sys.stdin, fmt=fmt, batch_size=options['batch_size'], source=options['source'])
+        else:
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                result = ingest_checkins(f, fmt=fmt, batch_size=options['batch_size'], source=options['source'])
+
+        for line, error in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"Line {line}: {error}" if line else error))
+        if len(result.errors) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(result.errors) - 20} more errors"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {result.events} events: {result.created} new, {result.updated} updated, "
+            f"{result.unchanged} unchanged attendance records"
+        ))
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from EmployeeApp.payroll import run_payroll, approve_payroll, pay_payroll
+
+
+class Command(BaseCommand):
+    help = 'Generate the monthly payroll from base salaries, prorated by attendance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', required=True, help='Payroll month (YYYY-MM)')
+        parser.add_argument('--approve', action='store_true', help='Approve the pending salaries for the month')
+        parser.add_argument('--pay', action='store_true', help='Pay the approved salaries and record transactions')
+
+    def handle(self, *args, **options):
+        try:
+            month = datetime.strptime(options['month'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError('--month must be YYYY-MM')
+
+        result = run_payroll(month)
+        self.stdout.write(
+            f"Generated {result.created} salaries over {result.working_days} working days "
+            f"({result.skipped} already existed)"
+        )
+        if options['approve']:
+            self.stdout.write(f"Approved {approve_payroll(month, approved_by=None)} salaries")
+        if options['pay']:
+            self.stdout.write(f"Paid {pay_payroll(month, paid_by=None)} salaries")
+        self.stdout.write(self.style.SUCCESS('Payroll run complete'))
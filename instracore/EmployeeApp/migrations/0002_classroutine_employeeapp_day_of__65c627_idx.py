@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EmployeeApp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classroutine',
+            index=models.Index(fields=['day_of_week', 'start_time'], name='EmployeeApp_day_of__65c627_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EmployeeApp', '0003_basesalary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('roster', models.BinaryField()),
+                ('present', models.BinaryField()),
+                ('absent', models.BinaryField()),
+                ('leave', models.BinaryField()),
+                ('late', models.BinaryField()),
+                ('marked_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='EmployeeApp.course')),
+                ('marked_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions_marked', to=settings.AUTH_USER_MODEL)),
+                ('routine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='EmployeeApp.classroutine')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'date'], name='EmployeeApp_course__7b542f_idx'), models.Index(fields=['date'], name='EmployeeApp_date_840393_idx')],
+                'unique_together': {('routine', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:19
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_course_rows(apps, schema_editor):
+    Course = apps.get_model('EmployeeApp', 'Course')
+    CourseTeacher = apps.get_model('EmployeeApp', 'CourseTeacher')
+    Enrollment = apps.get_model('StudentApp', 'Enrollment')
+    WaitlistEntry = apps.get_model('StudentApp', 'WaitlistEntry')
+
+    counts = {}
+    for course_id, status, count in Enrollment.objects.values_list('course_id', 'status').annotate(count=Count('id')).order_by():
+        counts.setdefault(course_id, {})[f'enrollments_{status}'] = count
+    for model, field in ((CourseTeacher, 'teacher_count'), (WaitlistEntry, 'waitlist_count')):
+        for course_id, count in model.objects.values_list('course_id').annotate(count=Count('id')).order_by():
+            counts.setdefault(course_id, {})[field] = count
+    for course_id, fields in counts.items():
+        Course.objects.filter(pk=course_id).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EmployeeApp', '0005_course_capacity_course_seats_taken'),
+        ('StudentApp', '0007_enrollment_idempotency_key_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollments_approved',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollments_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollments_dropped',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollments_ongoing',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollments_pending',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollments_rejected',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='teacher_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='waitlist_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_course_rows, migrations.RunPython.noop),
+    ]
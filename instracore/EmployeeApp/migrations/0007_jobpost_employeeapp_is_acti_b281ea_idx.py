@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EmployeeApp', '0006_course_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['is_active', 'deadline'], name='EmployeeApp_is_acti_b281ea_idx'),
+        ),
+    ]
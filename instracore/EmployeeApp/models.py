@@ -30,6 +30,11 @@ class JobPost(models.Model):
     deadline = models.DateField()
     is_active = models.BooleanField(default=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'deadline']),
+        ]
+    
     def __str__(self):
         return self.title
 
@@ -92,6 +97,16 @@ class Salary(models.Model):
         return f"{self.employee.username} - {self.month.strftime('%B %Y')}"
 
 
+class BaseSalary(models.Model):
+    employee = models.OneToOneField(User, on_delete=models.CASCADE, related_name="base_salary")
+    amount = models.DecimalField(max_digits=10, decimal_places=2)  # Monthly pay before proration
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.employee.username} - {self.amount}"
+
+
 class Expense(models.Model):
     CATEGORY_CHOICES = [
         ('utilities', 'Utilities'),
@@ -161,9 +176,31 @@ class Course(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="courses_created")
     created_at = models.DateTimeField(auto_now_add=True)
     syllabus = models.FileField(upload_to='syllabi/', blank=True, null=True)
+    capacity = models.PositiveIntegerField(blank=True, null=True)  # Empty means unlimited seats
+    seats_taken = models.PositiveIntegerField(default=0)  # Seat-holding enrollments, kept by StudentApp.seats
+    
+    # Counters kept by StudentApp.course_counters so listings never count rows
+    enrollments_pending = models.PositiveIntegerField(default=0)
+    enrollments_approved = models.PositiveIntegerField(default=0)
+    enrollments_rejected = models.PositiveIntegerField(default=0)
+    enrollments_ongoing = models.PositiveIntegerField(default=0)
+    enrollments_completed = models.PositiveIntegerField(default=0)
+    enrollments_dropped = models.PositiveIntegerField(default=0)
+    teacher_count = models.PositiveIntegerField(default=0)
+    waitlist_count = models.PositiveIntegerField(default=0)
     
     def __str__(self):
         return self.title
+    
+    @property
+    def enrollment_count(self):
+        return (self.enrollments_pending + self.enrollments_approved + self.enrollments_rejected
+                + self.enrollments_ongoing + self.enrollments_completed + self.enrollments_dropped)
+    
+    @property
+    def student_count(self):
+        # Students currently taking the course
+        return self.enrollments_approved + self.enrollments_ongoing
 
 
 class CourseTeacher(models.Model):
@@ -250,6 +287,35 @@ class ClassRoutine(models.Model):
     
     class Meta:
         unique_together = ('teacher', 'course', 'day_of_week', 'start_time')
+        indexes = [
+            models.Index(fields=['day_of_week', 'start_time']),
+        ]
+    
+    def __str__(self):
+        return f"{self.course.title} - {self.day_of_week} - {self.start_time}"
+
+
+class ClassSession(models.Model):
+    # Attendance for one occurrence of a ClassRoutine. The roster is the
+    # enrolled students' ids packed as ascending uint32s; each status is a
+    # bitset over roster positions (bit i set = roster[i] had that status).
+    routine = models.ForeignKey(ClassRoutine, on_delete=models.CASCADE, related_name='sessions')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='sessions')
+    date = models.DateField()
+    roster = models.BinaryField()
+    present = models.BinaryField()
+    absent = models.BinaryField()
+    leave = models.BinaryField()
+    late = models.BinaryField()
+    marked_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='sessions_marked')
+    marked_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('routine', 'date')
+        indexes = [
+            models.Index(fields=['course', 'date']),
+            models.Index(fields=['date']),
+        ]
     
     def __str__(self):
-        return f"{self.course.title} - {self.day_of_week} - {self.start_time}"
\ No newline at end of file
+        return f"{self.course.title} - {self.date} - {self.routine.start_time}"
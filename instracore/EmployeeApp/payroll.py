@@ -0,0 +1,132 @@
+from calendar import monthrange
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from AdminApp.financials import add_to_financial_overview
+from AdminApp.working_days import working_days_in_month
+from AuthApp.models import AuditLog
+from EmployeeApp.models import Attendance, BaseSalary, Salary, Transaction
+
+
+PayrollResult = namedtuple('PayrollResult', 'created skipped working_days')
+
+
+def month_range(month):
+    start = month.replace(day=1)
+    return start, start.replace(day=monthrange(start.year, start.month)[1])
+
+
+def prorate(base_amount, working_days, days_missed):
+    if working_days <= 0:
+        return base_amount
+    paid_days = max(working_days - days_missed, 0)
+    return (base_amount * paid_days / working_days).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def run_payroll(month, created_by=None):
+    start, end = month_range(month)
+    working_days = working_days_in_month(start)
+
+    base_salaries = dict(BaseSalary.objects.filter(
+        is_active=True,
+        employee__is_active=True,
+        employee__role='employee',
+    ).values_list('employee_id', 'amount'))
+
+    # Days missed per employee in one grouped query
+    missed = dict(Attendance.objects.filter(
+        user_id__in=base_salaries.keys(),
+        date__gte=start,
+        date__lte=end,
+        status__in=['absent', 'leave'],
+    ).values('user_id').annotate(days=Count('id')).values_list('user_id', 'days'))
+
+    # The (employee, month) unique key makes concurrent or repeated runs
+    # harmless. Without ignore_conflicts only real inserts are counted; if a
+    # concurrent run wins a row, the savepoint is rolled back and retried.
+    while True:
+        already_run = set(Salary.objects.filter(month=start).values_list('employee_id', flat=True))
+        salaries = [
+            Salary(
+                employee_id=employee_id,
+                amount=prorate(amount, working_days, missed.get(employee_id, 0)),
+                month=start,
+                status='pending',
+            )
+            for employee_id, amount in base_salaries.items()
+            if employee_id not in already_run
+        ]
+        try:
+            with transaction.atomic():
+                Salary.objects.bulk_create(salaries, batch_size=1000)
+        except IntegrityError:
+            continue
+        break
+    created = len(salaries)
+
+    if created:
+        AuditLog.objects.create(
+            user=created_by,
+            action=f"Generated payroll for {start.strftime('%B %Y')}: {created} salaries",
+            model_name="Salary",
+            object_id="bulk"
+        )
+    return PayrollResult(created, len(already_run), working_days)
+
+
+def approve_payroll(month, approved_by, salary_ids=None):
+    salaries = Salary.objects.filter(month=month_range(month)[0], status='pending')
+    if salary_ids is not None:
+        salaries = salaries.filter(id__in=salary_ids)
+    approved = salaries.update(status='approved', approved_by=approved_by)
+
+    if approved:
+        AuditLog.objects.create(
+            user=approved_by,
+            action=f"Approved {approved} salaries for {month.strftime('%B %Y')}",
+            model_name="Salary",
+            object_id="bulk"
+        )
+    return approved
+
+
+def salary_transactions(rows, payment_date):
+    # One salary Transaction per paid row (dicts with employee_id, amount and month)
+    return Transaction.objects.bulk_create([
+        Transaction(
+            user_id=row['employee_id'],
+            amount=row['amount'],
+            transaction_type='salary',
+            description=f"Salary for {row['month'].strftime('%B %Y')}",
+            date=payment_date,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+def pay_payroll(month, paid_by, salary_ids=None, payment_date=None):
+    payment_date = payment_date or timezone.now().date()
+    start = month_range(month)[0]
+    with transaction.atomic():
+        salaries = Salary.objects.select_for_update().filter(month=start, status='approved')
+        if salary_ids is not None:
+            salaries = salaries.filter(id__in=salary_ids)
+        rows = list(salaries.values('id', 'employee_id', 'amount', 'month'))
+        if not rows:
+            return 0
+
+        Salary.objects.filter(id__in=[row['id'] for row in rows]).update(status='paid', payment_date=payment_date)
+        salary_transactions(rows, payment_date)
+        add_to_financial_overview(salaries=[(row['month'], row['amount']) for row in rows])
+
+        AuditLog.objects.create(
+            user=paid_by,
+            action=f"Paid {len(rows)} salaries for {start.strftime('%B %Y')}",
+            model_name="Salary",
+            object_id="bulk"
+        )
+    return len(rows)
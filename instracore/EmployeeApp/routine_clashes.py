@@ -0,0 +1,195 @@
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+import heapq
+
+from EmployeeApp.models import ClassRoutine
+from StudentApp.models import Enrollment
+
+
+# Enrollment statuses whose students are expected to attend a course's classes
+COHORT_STATUSES = ('pending', 'approved', 'ongoing')
+
+ROUTINE_FIELDS = ('id', 'teacher_id', 'course_id', 'course__title', 'day_of_week', 'start_time', 'end_time', 'room')
+
+
+Clash = namedtuple('Clash', 'kind day routine_id other_id other_course start end')
+
+
+def describe_clash(clash):
+    labels = {
+        'teacher': 'Teacher is already teaching',
+        'room': 'Room is already booked for',
+        'cohort': 'Students are already attending',
+    }
+    return (
+        f"{labels[clash.kind]} {clash.other_course} on {clash.day.title()} "
+        f"({_format_minutes(clash.start)} - {_format_minutes(clash.end)})"
+    )
+
+
+def _to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _format_minutes(value):
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+def _room_key(room):
+    return (room or '').strip().lower()
+
+
+class IntervalIndex:
+    # Half-open [start, end) intervals sorted by start. add() only appends
+    # and the list is sorted once before the next lookup, so building an
+    # index of n intervals costs O(n log n). Adds made after a lookup are
+    # merged by one more sort, O(n) for a short unsorted tail. Any interval
+    # overlapping a query starts within max_length of the query start, so a
+    # lookup is a binary search, O(log n), plus a scan of that window.
+
+    def __init__(self):
+        self._items = []
+        self._max_length = 0
+        self._sorted = True
+
+    def add(self, start, end, value):
+        self._items.append((start, end, value))
+        self._max_length = max(self._max_length, end - start)
+        self._sorted = False
+
+    def overlapping(self, start, end):
+        if not self._sorted:
+            self._items.sort()
+            self._sorted = True
+        lo = bisect_left(self._items, (start - self._max_length,))
+        hi = bisect_left(self._items, (end,))
+        return [item for item in self._items[lo:hi] if item[1] > start]
+
+    def __len__(self):
+        return len(self._items)
+
+
+def load_course_cohorts(course_ids=None):
+    # Map each course to the other courses sharing at least one student
+    enrollments = Enrollment.objects.filter(status__in=COHORT_STATUSES)
+    if course_ids is not None:
+        students = enrollments.filter(course_id__in=course_ids).values('student_id')
+        enrollments = enrollments.filter(student_id__in=students)
+
+    courses_by_student = defaultdict(set)
+    for student_id, course_id in enrollments.values_list('student_id', 'course_id').iterator():
+        courses_by_student[student_id].add(course_id)
+
+    cohorts = defaultdict(set)
+    for course_set in courses_by_student.values():
+        if len(course_set) < 2:
+            continue
+        for course_id in course_set:
+            cohorts[course_id].update(course_set)
+    for course_id, linked in cohorts.items():
+        linked.discard(course_id)
+    return cohorts
+
+
+class RoutineClashIndex:
+    # Per-day interval indexes over teachers, rooms and course cohorts
+
+    def __init__(self, cohorts=None):
+        self.cohorts = cohorts if cohorts is not None else {}
+        self._indexes = defaultdict(IntervalIndex)
+        self._routines = {}
+
+    @classmethod
+    def build(cls, day=None, cohorts=None):
+        routines = ClassRoutine.objects.filter(is_active=True)
+        if day:
+            routines = routines.filter(day_of_week=day)
+        routines = list(routines.values(*ROUTINE_FIELDS))
+        if cohorts is None:
+            cohorts = load_course_cohorts({routine['course_id'] for routine in routines})
+        index = cls(cohorts)
+        for routine in routines:
+            index.add(routine)
+        return index
+
+    def add(self, routine):
+        day = routine['day_of_week']
+        start, end = _to_minutes(routine['start_time']), _to_minutes(routine['end_time'])
+        self._routines[routine['id']] = routine
+        self._indexes[(day, 'teacher', routine['teacher_id'])].add(start, end, routine['id'])
+        self._indexes[(day, 'course', routine['course_id'])].add(start, end, routine['id'])
+        room = _room_key(routine['room'])
+        if room:
+            self._indexes[(day, 'room', room)].add(start, end, routine['id'])
+
+    def conflicts_for(self, teacher_id, course_id, day, start_time, end_time, room='', exclude_id=None):
+        start, end = _to_minutes(start_time), _to_minutes(end_time)
+        lookups = [('teacher', (day, 'teacher', teacher_id))]
+        room = _room_key(room)
+        if room:
+            lookups.append(('room', (day, 'room', room)))
+        for linked_course_id in {course_id} | self.cohorts.get(course_id, set()):
+            lookups.append(('cohort', (day, 'course', linked_course_id)))
+
+        clashes = []
+        seen = set()
+        for kind, key in lookups:
+            index = self._indexes.get(key)
+            if not index:
+                continue
+            for other_start, other_end, other_id in index.overlapping(start, end):
+                if other_id == exclude_id or (kind, other_id) in seen:
+                    continue
+                seen.add((kind, other_id))
+                other = self._routines[other_id]
+                clashes.append(Clash(kind, day, exclude_id, other_id, other['course__title'], other_start, other_end))
+        return clashes
+
+
+def check_routine_clashes(routine):
+    # Conflicts a (possibly unsaved) ClassRoutine would introduce on its day
+    index = RoutineClashIndex.build(day=routine.day_of_week)
+    return index.conflicts_for(
+        routine.teacher_id, routine.course_id, routine.day_of_week,
+        routine.start_time, routine.end_time, routine.room, exclude_id=routine.pk,
+    )
+
+
+def find_all_conflicts(day=None):
+    # Sweep each day's routines in start order, comparing every routine only
+    # against the ones still running when it starts
+    routines = ClassRoutine.objects.filter(is_active=True)
+    if day:
+        routines = routines.filter(day_of_week=day)
+    routines = list(routines.values(*ROUTINE_FIELDS))
+    cohorts = load_course_cohorts({routine['course_id'] for routine in routines})
+
+    by_day = defaultdict(list)
+    for routine in routines:
+        by_day[routine['day_of_week']].append(
+            (_to_minutes(routine['start_time']), _to_minutes(routine['end_time']), routine)
+        )
+
+    clashes = []
+    for routine_day, slots in by_day.items():
+        slots.sort(key=lambda slot: (slot[0], slot[1], slot[2]['id']))
+        running = []
+        for start, end, routine in slots:
+            while running and running[0][0] <= start:
+                heapq.heappop(running)
+            linked = cohorts.get(routine['course_id'], set())
+            for other_end, _, other in running:
+                kinds = []
+                if other['teacher_id'] == routine['teacher_id']:
+                    kinds.append('teacher')
+                if _room_key(routine['room']) and _room_key(routine['room']) == _room_key(other['room']):
+                    kinds.append('room')
+                if other['course_id'] == routine['course_id'] or other['course_id'] in linked:
+                    kinds.append('cohort')
+                for kind in kinds:
+                    clashes.append(Clash(
+                        kind, routine_day, routine['id'], other['id'], other['course__title'],
+                        _to_minutes(other['start_time']), other_end,
+                    ))
+            heapq.heappush(running, (end, routine['id'], routine))
+    return clashes
@@ -0,0 +1,201 @@
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+import sys
+
+from django.db import transaction
+
+from EmployeeApp.models import Attendance, ClassSession
+from StudentApp.academic_summary import rebuild_summaries
+from StudentApp.models import Enrollment
+
+
+SESSION_STATUSES = ('present', 'absent', 'leave', 'late')
+# A student with several sessions in a day gets the first of these they had
+# in any of them as their daily Attendance status
+DAILY_STATUS_PRECEDENCE = ('present', 'late', 'leave', 'absent')
+
+SESSION_FIELDS = ('roster',) + SESSION_STATUSES
+
+
+def pack_roster(student_ids):
+    # Ascending student ids as little-endian uint32s
+    roster = array('I', sorted(student_ids))
+    if sys.byteorder == 'big':
+        roster.byteswap()
+    return roster.tobytes()
+
+
+def unpack_roster(data):
+    roster = array('I')
+    roster.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        roster.byteswap()
+    return roster
+
+
+def _positions(bits):
+    # Indexes of the set bits, lowest first
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class SessionView:
+    # Read side of a ClassSession: the unpacked roster plus one int per status
+    # so counts are popcounts and lookups are a bisect on the roster
+
+    def __init__(self, roster, **bitsets):
+        self.roster = unpack_roster(roster)
+        self.bits = {status: int.from_bytes(bytes(bitsets[status]), 'little') for status in SESSION_STATUSES}
+
+    @classmethod
+    def from_session(cls, session):
+        return cls(**{field: getattr(session, field) for field in SESSION_FIELDS})
+
+    def counts(self):
+        return {status: bits.bit_count() for status, bits in self.bits.items()}
+
+    def status_of(self, student_id):
+        position = bisect_left(self.roster, student_id)
+        if position == len(self.roster) or self.roster[position] != student_id:
+            return None
+        mask = 1 << position
+        for status, bits in self.bits.items():
+            if bits & mask:
+                return status
+        return None
+
+    def students_with(self, status):
+        return [self.roster[position] for position in _positions(self.bits[status])]
+
+    def statuses(self):
+        # {student id: status} for the whole roster
+        return {
+            student_id: status
+            for status in SESSION_STATUSES
+            for student_id in self.students_with(status)
+        }
+
+
+def session_roster(course):
+    return Enrollment.objects.filter(course=course, status='ongoing').values_list('student_id', flat=True)
+
+
+def record_session(routine, day, statuses, marked_by=None, default_status='present'):
+    # Store one class session: statuses maps student id to status, students
+    # on the roster but not in it get default_status. Re-marking a session
+    # overwrites it. The students' daily Attendance rows are rolled up after.
+    roster = sorted(session_roster(routine.course_id))
+    bits = dict.fromkeys(SESSION_STATUSES, 0)
+    for position, student_id in enumerate(roster):
+        status = statuses.get(student_id) or default_status
+        bits[status if status in bits else default_status] |= 1 << position
+    size = (len(roster) + 7) // 8
+
+    with transaction.atomic():
+        session, created = ClassSession.objects.update_or_create(
+            routine=routine, date=day,
+            defaults=dict(
+                {status: value.to_bytes(size, 'little') for status, value in bits.items()},
+                course_id=routine.course_id,
+                roster=pack_roster(roster),
+                marked_by=marked_by,
+            )
+        )
+        rollup_daily_attendance(day, roster, marked_by=marked_by)
+    return session
+
+
+def rollup_daily_attendance(day, student_ids, marked_by=None):
+    # Derive the daily Attendance rows of these students from all of the
+    # day's sessions, writing only the rows whose status changes. The daily
+    # rows stay because summaries, absentee alerts, registers and check-ins
+    # all read Attendance; sessions add per-class detail on top of them.
+    student_ids = set(student_ids)
+    rank = {}
+    # Only sessions of the students' own courses can hold them
+    sessions = ClassSession.objects.filter(
+        date=day,
+        course_id__in=Enrollment.objects.filter(student_id__in=student_ids).values('course_id'),
+    )
+    for row in sessions.values_list(*SESSION_FIELDS):
+        view = SessionView(**dict(zip(SESSION_FIELDS, row)))
+        for order, status in enumerate(DAILY_STATUS_PRECEDENCE):
+            for student_id in view.students_with(status):
+                if student_id in student_ids and order < rank.get(student_id, len(DAILY_STATUS_PRECEDENCE)):
+                    rank[student_id] = order
+
+    existing = dict(Attendance.objects.filter(date=day, user_id__in=rank.keys()).values_list('user_id', 'status'))
+    changed = [
+        Attendance(user_id=student_id, date=day, status=DAILY_STATUS_PRECEDENCE[order], marked_by=marked_by)
+        for student_id, order in rank.items()
+        if existing.get(student_id) != DAILY_STATUS_PRECEDENCE[order]
+    ]
+    Attendance.objects.bulk_create(
+        changed, batch_size=1000,
+        update_conflicts=True, unique_fields=['user', 'date'], update_fields=['status', 'marked_by'],
+    )
+    # bulk_create sends no signals
+    changed_ids = [attendance.user_id for attendance in changed]
+    transaction.on_commit(lambda: rebuild_summaries(changed_ids))
+    return len(changed)
+
+
+def record_daily_attendance(day, statuses, marked_by=None, default_status='present'):
+    # Mark the day directly for a class with no routine, such as an extra or
+    # rescheduled one; statuses maps student id to status as in record_session
+    valid = {status for status, label in Attendance.STATUS_CHOICES}
+    rows = [
+        Attendance(
+            user_id=student_id,
+            date=day,
+            status=status if status in valid else default_status,
+            marked_by=marked_by,
+        )
+        for student_id, status in statuses.items()
+    ]
+    Attendance.objects.bulk_create(
+        rows, batch_size=1000,
+        update_conflicts=True, unique_fields=['user', 'date'], update_fields=['status', 'marked_by'],
+    )
+    # bulk_create sends no signals
+    student_ids = list(statuses)
+    transaction.on_commit(lambda: rebuild_summaries(student_ids))
+    return len(rows)
+
+
+def session_totals(sessions):
+    # {status: count} summed over sessions with popcounts, no expansion
+    totals = dict.fromkeys(SESSION_STATUSES, 0)
+    for row in sessions.values_list(*SESSION_FIELDS):
+        for status, count in SessionView(**dict(zip(SESSION_FIELDS, row))).counts().items():
+            totals[status] += count
+    return totals
+
+
+def student_session_totals(sessions):
+    # {student id: {status: count}} over sessions; only set bits are visited
+    totals = defaultdict(lambda: dict.fromkeys(SESSION_STATUSES, 0))
+    for row in sessions.values_list(*SESSION_FIELDS):
+        view = SessionView(**dict(zip(SESSION_FIELDS, row)))
+        for status in SESSION_STATUSES:
+            for student_id in view.students_with(status):
+                totals[student_id][status] += 1
+    return dict(totals)
+
+
+def student_sessions(student_id, start, end):
+    # [(date, course title, start time, status)] for one student's classes
+    sessions = ClassSession.objects.filter(
+        course__enrollments__student_id=student_id, date__gte=start, date__lte=end
+    ).order_by('date', 'routine__start_time').values_list(
+        'date', 'course__title', 'routine__start_time', *SESSION_FIELDS
+    )
+    history = []
+    for day, course_title, start_time, *bitsets in sessions:
+        status = SessionView(**dict(zip(SESSION_FIELDS, bitsets))).status_of(student_id)
+        if status:
+            history.append((day, course_title, start_time, status))
+    return history
@@ -1,3 +1,529 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+import io
+import json
+import random
+
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+
+from AdminApp.models import FinancialOverview, WeekendCalendar
+from AdminApp.working_days import invalidate_working_days
+from AuthApp.models import AuditLog, Notification, User
+from EmployeeApp.attendance_register import build_register, parse_register_month, register_csv, register_response
+from EmployeeApp.checkins import CheckinIngester, ingest_checkins
+from EmployeeApp import payroll, session_attendance
+from EmployeeApp.bulk_actions import (
+    bulk_update_applications, bulk_update_courses, bulk_update_expenses, bulk_update_salaries,
+)
+from EmployeeApp.models import (
+    Application, Attendance, BaseSalary, ClassRoutine, ClassSession, Course, CourseTeacher, Expense, JobPost, Salary,
+    Transaction,
+)
+from EmployeeApp.routine_clashes import IntervalIndex, check_routine_clashes, find_all_conflicts
+from EmployeeApp.session_attendance import (
+    SESSION_STATUSES, SessionView, pack_roster, record_session, rollup_daily_attendance,
+    session_totals, unpack_roster,
+)
+from EmployeeApp.timetable import build_problem, generate_timetable, solve, weekly_off_days
+from StudentApp.models import Enrollment
+
+
+class SessionBitsetTests(TestCase):
+
+    def test_roster_round_trip(self):
+        ids = [70000, 3, 1, 2 ** 32 - 1, 512]
+        self.assertEqual(list(unpack_roster(pack_roster(ids))), sorted(ids))
+        self.assertEqual(len(pack_roster(ids)), 4 * len(ids))
+        self.assertEqual(list(unpack_roster(pack_roster([]))), [])
+
+    def test_session_view(self):
+        roster = [4, 9, 15, 30]
+        statuses = {4: 'present', 9: 'absent', 15: 'late', 30: 'present'}
+        bits = dict.fromkeys(SESSION_STATUSES, 0)
+        for position, student_id in enumerate(roster):
+            bits[statuses[student_id]] |= 1 << position
+        view = SessionView(pack_roster(roster), **{status: value.to_bytes(1, 'little') for status, value in bits.items()})
+
+        self.assertEqual(view.statuses(), statuses)
+        self.assertEqual(view.counts(), {'present': 2, 'absent': 1, 'leave': 0, 'late': 1})
+        self.assertEqual(view.students_with('present'), [4, 30])
+        self.assertEqual(view.status_of(15), 'late')
+        self.assertIsNone(view.status_of(5))
+        self.assertIsNone(view.status_of(99))
+
+
+class SessionAttendanceTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', role='employee', sub_role='teacher')
+        self.students = [User.objects.create(username=f'student{i}', role='student') for i in range(3)]
+        self.first = Course.objects.create(title='First', description='', course_type='regular', status='active')
+        self.second = Course.objects.create(title='Second', description='', course_type='regular', status='active')
+        for course in (self.first, self.second):
+            for student in self.students:
+                Enrollment.objects.create(student=student, course=course, status='ongoing')
+        self.day = date(2027, 1, 4)
+        self.morning = ClassRoutine.objects.create(
+            teacher=self.teacher, course=self.first, day_of_week='monday', start_time=time(9), end_time=time(10)
+        )
+        self.afternoon = ClassRoutine.objects.create(
+            teacher=self.teacher, course=self.second, day_of_week='monday', start_time=time(14), end_time=time(15)
+        )
+
+    def daily(self):
+        return dict(Attendance.objects.filter(date=self.day).values_list('user_id', 'status'))
+
+    def test_record_session_stores_statuses(self):
+        a, b, c = self.students
+        session = record_session(self.morning, self.day, {a.id: 'absent', b.id: 'leave'}, marked_by=self.teacher)
+        view = SessionView.from_session(ClassSession.objects.get(pk=session.pk))
+        self.assertEqual(view.statuses(), {a.id: 'absent', b.id: 'leave', c.id: 'present'})
+        self.assertEqual(self.daily(), {a.id: 'absent', b.id: 'leave', c.id: 'present'})
+
+    def test_second_session_does_not_overwrite_the_first(self):
+        a, b, c = self.students
+        record_session(self.morning, self.day, {a.id: 'absent', b.id: 'absent'})
+        record_session(self.afternoon, self.day, {a.id: 'late', b.id: 'absent', c.id: 'absent'})
+
+        self.assertEqual(ClassSession.objects.filter(date=self.day).count(), 2)
+        morning = SessionView.from_session(ClassSession.objects.get(routine=self.morning, date=self.day))
+        self.assertEqual(morning.status_of(a.id), 'absent')
+        # The daily row takes the best status of the day's sessions
+        self.assertEqual(self.daily(), {a.id: 'late', b.id: 'absent', c.id: 'present'})
+        self.assertEqual(session_totals(ClassSession.objects.filter(date=self.day)), {
+            'present': 1, 'absent': 4, 'leave': 0, 'late': 1,
+        })
+
+    def test_remarking_a_session_replaces_it(self):
+        a = self.students[0]
+        record_session(self.morning, self.day, {a.id: 'absent'})
+        record_session(self.morning, self.day, {a.id: 'present'})
+        self.assertEqual(ClassSession.objects.filter(date=self.day).count(), 1)
+        self.assertEqual(self.daily()[a.id], 'present')
+
+    def test_rollup_writes_only_changed_rows(self):
+        record_session(self.morning, self.day, {})
+        self.assertEqual(rollup_daily_attendance(self.day, [student.id for student in self.students]), 0)
+
+    def test_rollup_reads_only_the_students_courses(self):
+        other_course = Course.objects.create(title='Other', description='', course_type='regular', status='active')
+        outsider = User.objects.create(username='outsider', role='student')
+        Enrollment.objects.create(student=outsider, course=other_course, status='ongoing')
+        other = ClassRoutine.objects.create(
+            teacher=self.teacher, course=other_course, day_of_week='monday', start_time=time(11), end_time=time(12)
+        )
+        record_session(other, self.day, {})
+
+        with mock.patch.object(session_attendance, 'SessionView', wraps=SessionView) as view:
+            record_session(self.morning, self.day, {self.students[0].id: 'late'})
+        self.assertEqual(view.call_count, 1)
+        self.assertEqual(self.daily()[self.students[0].id], 'late')
+
+
+class CheckinIngestionTests(TestCase):
+
+    def setUp(self):
+        self.users = [User.objects.create(username=f'user{i}', role='employee') for i in range(4)]
+        start = timezone.make_aware(datetime(2027, 1, 4, 8, 0))
+        rng = random.Random(7)
+        self.events = [
+            {'user_id': user.id, 'timestamp': (start + timedelta(minutes=rng.randint(0, 600))).isoformat()}
+            for user in self.users for i in range(6)
+        ]
+        self.events.append({'username': self.users[0].username, 'timestamp': start.isoformat(), 'direction': 'in'})
+
+    def ingest(self, events, batch_size=1000):
+        return ingest_checkins(io.StringIO('\n'.join(json.dumps(event) for event in events)), batch_size=batch_size)
+
+    def stored(self):
+        return set(Attendance.objects.values_list('user_id', 'date', 'status', 'check_in_time', 'check_out_time'))
+
+    def test_first_check_in_and_last_check_out(self):
+        self.ingest(self.events)
+        for user in self.users:
+            moments = [
+                timezone.localtime(datetime.fromisoformat(event['timestamp'])).time()
+                for event in self.events if event.get('user_id') == user.id or event.get('username') == user.username
+            ]
+            row = Attendance.objects.get(user=user)
+            self.assertEqual((row.check_in_time, row.check_out_time), (min(moments), max(moments)))
+
+    def test_result_does_not_depend_on_order_or_batching(self):
+        self.ingest(self.events)
+        expected = self.stored()
+
+        for seed in range(3):
+            Attendance.objects.all().delete()
+            shuffled = list(self.events)
+            random.Random(seed).shuffle(shuffled)
+            self.ingest(shuffled, batch_size=seed + 2)
+            self.assertEqual(self.stored(), expected)
+
+    def test_redelivered_events_change_nothing(self):
+        self.ingest(self.events[:10])
+        self.ingest(self.events)
+        expected = self.stored()
+        result = self.ingest(self.events, batch_size=3)
+        self.assertEqual(self.stored(), expected)
+        self.assertEqual((result.created, result.updated), (0, 0))
+
+    def test_check_in_clears_an_absence(self):
+        user = self.users[0]
+        Attendance.objects.create(user=user, date=date(2027, 1, 4), status='absent')
+        self.ingest([event for event in self.events if event.get('user_id') == user.id])
+        self.assertEqual(Attendance.objects.get(user=user).status, 'present')
+
+    def test_rows_inserted_since_the_read_are_merged(self):
+        user = self.users[0]
+        locked_rows = CheckinIngester._locked_rows
+
+        def another_device_inserts_after_the_read(ingester, keys):
+            rows = locked_rows(ingester, keys)
+            if not Attendance.objects.exists():
+                Attendance.objects.create(
+                    user=user, date=date(2027, 1, 4), status='absent', check_in_time=time(7), check_out_time=time(12)
+                )
+            return rows
+
+        with mock.patch.object(CheckinIngester, '_locked_rows', another_device_inserts_after_the_read):
+            result = self.ingest([
+                {'user_id': user.id, 'timestamp': '2027-01-04T08:00', 'direction': 'in'},
+                {'user_id': user.id, 'timestamp': '2027-01-04T17:00', 'direction': 'out'},
+            ])
+        row = Attendance.objects.get(user=user)
+        self.assertEqual((row.status, row.check_in_time, row.check_out_time), ('present', time(7), time(17)))
+        self.assertEqual((result.created, result.updated), (0, 1))
+
+    def test_bad_events_are_reported(self):
+        result = self.ingest([{'user_id': self.users[0].id, 'timestamp': 'soon'}, {'username': 'nobody', 'timestamp': '2027-01-04T09:00'}])
+        self.assertEqual(len(result.errors), 2)
+        self.assertFalse(Attendance.objects.exists())
+
+
+class RoutineClashTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', role='employee', sub_role='teacher')
+        self.other_teacher = User.objects.create(username='other', role='employee', sub_role='teacher')
+        self.maths = Course.objects.create(title='Maths', description='', course_type='regular', status='active')
+        self.physics = Course.objects.create(title='Physics', description='', course_type='regular', status='active')
+        self.art = Course.objects.create(title='Art', description='', course_type='regular', status='active')
+        student = User.objects.create(username='student', role='student')
+        Enrollment.objects.create(student=student, course=self.maths, status='ongoing')
+        Enrollment.objects.create(student=student, course=self.physics, status='ongoing')
+        self.existing = ClassRoutine.objects.create(
+            teacher=self.teacher, course=self.maths, day_of_week='monday',
+            start_time=time(9), end_time=time(10), room='Lab 1',
+        )
+
+    def routine(self, teacher, course, start, end, room='', day='monday'):
+        return ClassRoutine(teacher=teacher, course=course, day_of_week=day, start_time=start, end_time=end, room=room)
+
+    def test_interval_index_matches_a_linear_scan(self):
+        rng = random.Random(3)
+        intervals = []
+        index = IntervalIndex()
+        for value in range(300):
+            start = rng.randint(0, 1400)
+            intervals.append((start, start + rng.randint(1, 120), value))
+            index.add(*intervals[-1])
+            # Lookups between adds must still see every interval
+            if value % 50 == 0:
+                self.assertEqual(len(index.overlapping(0, 1440)), len(intervals))
+        for i in range(200):
+            start = rng.randint(0, 1400)
+            end = start + rng.randint(1, 90)
+            expected = sorted(item for item in intervals if item[0] < end and item[1] > start)
+            self.assertEqual(sorted(index.overlapping(start, end)), expected)
+
+    def test_teacher_room_and_cohort_clashes(self):
+        def kinds(routine):
+            return sorted(clash.kind for clash in check_routine_clashes(routine))
+
+        self.assertEqual(kinds(self.routine(self.teacher, self.art, time(9, 30), time(10, 30))), ['teacher'])
+        self.assertEqual(kinds(self.routine(self.other_teacher, self.art, time(9, 30), time(10, 30), 'lab 1 ')), ['room'])
+        # Maths and Physics share a student
+        self.assertEqual(kinds(self.routine(self.other_teacher, self.physics, time(9, 59), time(11))), ['cohort'])
+
+    def test_back_to_back_and_other_days_do_not_clash(self):
+        self.assertEqual(check_routine_clashes(self.routine(self.teacher, self.physics, time(10), time(11), 'Lab 1')), [])
+        self.assertEqual(check_routine_clashes(self.routine(self.teacher, self.physics, time(9), time(10), 'Lab 1', 'tuesday')), [])
+
+    def test_editing_a_routine_ignores_itself_and_inactive_routines(self):
+        self.assertEqual(check_routine_clashes(self.existing), [])
+        ClassRoutine.objects.filter(pk=self.existing.pk).update(is_active=False)
+        self.assertEqual(check_routine_clashes(self.routine(self.teacher, self.art, time(9), time(10), 'Lab 1')), [])
+
+    def test_find_all_conflicts(self):
+        art = ClassRoutine.objects.create(
+            teacher=self.other_teacher, course=self.art, day_of_week='monday', start_time=time(9, 30), end_time=time(11), room='Lab 1',
+        )
+        physics = ClassRoutine.objects.create(
+            teacher=self.teacher, course=self.physics, day_of_week='monday', start_time=time(10, 30), end_time=time(12),
+        )
+        clashes = {(clash.kind, clash.routine_id, clash.other_id) for clash in find_all_conflicts()}
+        self.assertEqual(clashes, {('room', art.pk, self.existing.pk)})
+        self.assertEqual(find_all_conflicts(day='tuesday'), [])
+
+        ClassRoutine.objects.filter(pk=physics.pk).update(start_time=time(9, 45))
+        clashes = {(clash.kind, clash.routine_id, clash.other_id) for clash in find_all_conflicts('monday')}
+        self.assertEqual(clashes, {
+            ('room', art.pk, self.existing.pk),
+            ('teacher', physics.pk, self.existing.pk),
+            ('cohort', physics.pk, self.existing.pk),
+        })
+
+
+class TimetableTests(TestCase):
+
+    def setUp(self):
+        invalidate_working_days()
+        self.teachers = [User.objects.create(username=f'teacher{i}', role='employee', sub_role='teacher') for i in range(2)]
+        self.courses = [
+            Course.objects.create(title=f'Course {i}', description='', course_type='regular', status='active')
+            for i in range(4)
+        ]
+        for i, course in enumerate(self.courses):
+            CourseTeacher.objects.create(course=course, teacher=self.teachers[i % 2])
+        student = User.objects.create(username='student', role='student')
+        Enrollment.objects.create(student=student, course=self.courses[0], status='ongoing')
+        Enrollment.objects.create(student=student, course=self.courses[1], status='ongoing')
+
+    def tearDown(self):
+        invalidate_working_days()
+
+    def test_weekly_off_days_ignore_one_off_holidays(self):
+        start = date(2027, 1, 4)
+        WeekendCalendar.objects.create(date=date(2027, 1, 6), is_weekend=False, description='Holiday')
+        self.assertEqual(weekly_off_days(weeks=4, start=start), {'saturday', 'sunday'})
+
+    def test_solution_respects_every_constraint(self):
+        problem = build_problem(rooms=['A', 'B'], periods=3, sessions_per_week=2,
+                                availability={self.teachers[1].id: ['monday', 'tuesday', 'wednesday']})
+        result = solve(problem, time_budget=10)
+        self.assertTrue(result.complete)
+        self.assertEqual(result.unscheduled, [])
+        self.assertEqual(len(result.routines), 8)
+
+        teacher_slots = [(teacher_id, slot) for course_id, slot, teacher_id, room in result.routines]
+        room_slots = [(room, slot) for course_id, slot, teacher_id, room in result.routines]
+        course_days = [(course_id, slot[0]) for course_id, slot, teacher_id, room in result.routines]
+        self.assertEqual(len(set(teacher_slots)), len(teacher_slots))
+        self.assertEqual(len(set(room_slots)), len(room_slots))
+        self.assertEqual(len(set(course_days)), len(course_days))
+        shared = [slot for course_id, slot, teacher_id, room in result.routines if course_id == self.courses[0].id]
+        self.assertFalse([
+            slot for course_id, slot, teacher_id, room in result.routines
+            if course_id == self.courses[1].id and slot in shared
+        ])
+        self.assertFalse([
+            slot for course_id, slot, teacher_id, room in result.routines
+            if teacher_id == self.teachers[1].id and slot[0] not in ('monday', 'tuesday', 'wednesday')
+        ])
+
+    def test_course_without_a_teacher_is_reported(self):
+        idle = Course.objects.create(title='Idle', description='', course_type='regular', status='active')
+        result = solve(build_problem(rooms=['A']), time_budget=5)
+        self.assertIn(idle.id, result.unscheduled)
+
+    def test_replacing_keeps_recorded_sessions(self):
+        generate_timetable(time_budget=5, rooms=['A', 'B'], course_ids=[self.courses[0].id])
+        routine = ClassRoutine.objects.filter(course=self.courses[0]).first()
+        session = record_session(routine, date(2027, 1, 4), {})
+
+        generate_timetable(time_budget=5, rooms=['A', 'B'], course_ids=[self.courses[0].id], replace=True)
+        self.assertTrue(ClassSession.objects.filter(pk=session.pk).exists())
+        self.assertEqual(ClassRoutine.objects.filter(course=self.courses[0], is_active=True).count(), 2)
+
+    def test_existing_routines_are_kept_without_replace(self):
+        generate_timetable(time_budget=5, rooms=['A', 'B'])
+        routines = set(ClassRoutine.objects.values_list('id', flat=True))
+        result = generate_timetable(time_budget=5, rooms=['A', 'B'])
+        self.assertEqual(result.routines, [])
+        self.assertEqual(set(ClassRoutine.objects.values_list('id', flat=True)), routines)
+
+
+class PayrollTests(TestCase):
+    # January 2027 has 21 working days
+
+    def setUp(self):
+        invalidate_working_days()
+        self.employees = [User.objects.create(username=f'employee{i}', role='employee') for i in range(3)]
+        for employee in self.employees:
+            BaseSalary.objects.create(employee=employee, amount=Decimal('2100.00'))
+        BaseSalary.objects.filter(employee=self.employees[2]).update(is_active=False)
+        for day in (4, 5, 6):
+            Attendance.objects.create(user=self.employees[0], date=date(2027, 1, day), status='absent')
+        Attendance.objects.create(user=self.employees[0], date=date(2027, 2, 1), status='absent')
+        self.month = date(2027, 1, 20)
+
+    def tearDown(self):
+        invalidate_working_days()
+
+    def test_prorate(self):
+        self.assertEqual(payroll.prorate(Decimal('1000'), 21, 3), Decimal('857.14'))
+        self.assertEqual(payroll.prorate(Decimal('1000'), 21, 30), Decimal('0.00'))
+        self.assertEqual(payroll.prorate(Decimal('1000'), 0, 3), Decimal('1000'))
+
+    def test_run_prorates_by_missed_days(self):
+        result = payroll.run_payroll(self.month)
+        self.assertEqual(result, (2, 0, 21))
+        amounts = dict(Salary.objects.values_list('employee__username', 'amount'))
+        self.assertEqual(amounts, {'employee0': Decimal('1800.00'), 'employee1': Decimal('2100.00')})
+        self.assertEqual(set(Salary.objects.values_list('month', flat=True)), {date(2027, 1, 1)})
+
+    def test_second_run_skips_existing_salaries(self):
+        payroll.run_payroll(self.month)
+        self.assertEqual(payroll.run_payroll(self.month), (0, 2, 21))
+        self.assertEqual(Salary.objects.count(), 2)
+
+    def test_salary_inserted_by_a_concurrent_run_is_not_counted(self):
+        atomic = transaction.atomic
+        racer = self.employees[1]
+
+        def atomic_after_race(*args, **kwargs):
+            # The other run commits its row between our read and our insert
+            Salary.objects.get_or_create(employee=racer, month=date(2027, 1, 1), defaults={'amount': 1})
+            return atomic(*args, **kwargs)
+
+        with mock.patch.object(payroll, 'transaction', SimpleNamespace(atomic=atomic_after_race)):
+            result = payroll.run_payroll(self.month)
+        self.assertEqual((result.created, result.skipped), (1, 1))
+        self.assertEqual(Salary.objects.get(employee=racer).amount, 1)
+
+    def test_approve_and_pay(self):
+        payroll.run_payroll(self.month)
+        approver = User.objects.create(username='finance', role='employee')
+        first = Salary.objects.get(employee=self.employees[0])
+        self.assertEqual(payroll.approve_payroll(self.month, approver, salary_ids=[first.id]), 1)
+        self.assertEqual(payroll.pay_payroll(self.month, approver, payment_date=date(2027, 2, 1)), 1)
+        self.assertEqual(payroll.pay_payroll(self.month, approver), 0)
+
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.approved_by, first.payment_date), ('paid', approver, date(2027, 2, 1)))
+        self.assertEqual(Transaction.objects.get(user=self.employees[0]).amount, Decimal('1800.00'))
+        self.assertEqual(FinancialOverview.objects.get(month=date(2027, 1, 1)).salaries_paid, Decimal('1800.00'))
+
+
+class BulkActionTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.employee = User.objects.create(username='employee', role='employee')
+
+    def expense(self, amount, status='pending', day=date(2027, 1, 10)):
+        return Expense.objects.create(category='supplies', amount=amount, date=day, status=status)
+
+    def test_approving_expenses_adds_to_the_month(self):
+        FinancialOverview.objects.create(month=date(2027, 1, 1), expenses=Decimal('500.00'))
+        pending = [self.expense(100), self.expense(50, day=date(2027, 1, 20))]
+        done = self.expense(70, status='approved')
+
+        result = bulk_update_expenses([expense.id for expense in pending] + [done.id], 'approve', self.admin)
+        self.assertEqual(result, (2, 1))
+        self.assertEqual(set(Expense.objects.filter(status='approved').values_list('approved_by', flat=True)), {None, self.admin.id})
+        self.assertEqual(FinancialOverview.objects.get(month=date(2027, 1, 1)).expenses, Decimal('650.00'))
+        self.assertEqual(AuditLog.objects.filter(model_name='Expense').count(), 2)
+
+    def test_rejecting_expenses_leaves_totals_and_approver_alone(self):
+        expense = self.expense(100)
+        self.assertEqual(bulk_update_expenses([expense.id], 'reject', self.admin), (1, 0))
+        expense.refresh_from_db()
+        self.assertEqual((expense.status, expense.approved_by), ('rejected', None))
+        self.assertFalse(FinancialOverview.objects.exists())
+
+    def test_salaries_move_through_approve_and_pay(self):
+        salaries = [
+            Salary.objects.create(employee=self.employee, amount=Decimal('900.00'), month=date(2027, month, 1))
+            for month in (1, 2)
+        ]
+        ids = [salary.id for salary in salaries]
+        # Only approved salaries can be paid
+        self.assertEqual(bulk_update_salaries(ids, 'pay', self.admin), (0, 2))
+        self.assertEqual(bulk_update_salaries(ids[:1], 'reject', self.admin), (1, 0))
+        self.assertEqual(bulk_update_salaries(ids, 'approve', self.admin), (1, 1))
+        self.assertEqual(bulk_update_salaries(ids, 'pay', self.admin, payment_date=date(2027, 3, 1)), (1, 1))
+
+        rejected, paid = Salary.objects.get(pk=ids[0]), Salary.objects.get(pk=ids[1])
+        self.assertEqual((rejected.status, rejected.approved_by), ('rejected', None))
+        self.assertEqual((paid.status, paid.approved_by, paid.payment_date), ('paid', self.admin, date(2027, 3, 1)))
+        self.assertEqual(Transaction.objects.get().amount, Decimal('900.00'))
+        self.assertEqual(FinancialOverview.objects.get(month=date(2027, 2, 1)).salaries_paid, Decimal('900.00'))
+
+    def test_course_requests_notify_their_teacher(self):
+        teacher = User.objects.create(username='teacher', role='employee', sub_role='teacher')
+        approved = Course.objects.create(title='New', description='', course_type='regular', status='pending_approval', created_by=teacher)
+        returned = Course.objects.create(title='Draft', description='', course_type='regular', status='pending_approval', created_by=teacher)
+
+        self.assertEqual(bulk_update_courses([approved.id], 'approve', self.admin), (1, 0))
+        self.assertEqual(bulk_update_courses([returned.id, approved.id], 'reject', self.admin), (1, 1))
+        self.assertEqual(set(Course.objects.values_list('title', 'status')), {('New', 'active'), ('Draft', 'draft')})
+        self.assertEqual(sorted(Notification.objects.values_list('message', flat=True)), [
+            "Your course 'Draft' has been returned to draft.",
+            "Your course 'New' has been approved.",
+        ])
+
+    def test_only_teacher_applications_are_hired(self):
+        jobs = {
+            role: JobPost.objects.create(
+                title=role, description='', role=role, min_requirements='', salary_range='', location='',
+                availability='', application_instructions='', posted_by=self.admin, deadline=date(2027, 1, 31),
+            )
+            for role in ('teacher', 'it')
+        }
+        applications = [
+            Application.objects.create(job=jobs[role], applicant_name=role, applicant_email=f'{role}@example.com', status='accepted')
+            for role in ('teacher', 'it')
+        ]
+        self.assertEqual(bulk_update_applications([application.id for application in applications], 'hire', self.admin), (1, 1))
+        self.assertEqual(dict(Application.objects.values_list('applicant_name', 'status')), {'teacher': 'hired', 'it': 'accepted'})
+
+
+class AttendanceRegisterTests(TestCase):
+    # January 2027 starts on a Friday; Saturdays and Sundays are off
+
+    def setUp(self):
+        invalidate_working_days()
+        self.course = Course.objects.create(title='Chemistry', description='', course_type='regular', status='active')
+        self.students = [
+            User.objects.create(username=name, email=f'{name}@example.com', role='student', first_name=first)
+            for name, first in (('amy', 'Amy'), ('bo', ''), ('cy', ''))
+        ]
+        for student, status in zip(self.students, ('ongoing', 'approved', 'dropped')):
+            Enrollment.objects.create(student=student, course=self.course, status=status)
+        for day, status in ((1, 'present'), (4, 'absent'), (5, 'late'), (6, 'present')):
+            Attendance.objects.create(user=self.students[0], date=date(2027, 1, day), status=status)
+        Attendance.objects.create(user=self.students[0], date=date(2027, 2, 1), status='leave')
+        Attendance.objects.create(user=self.students[2], date=date(2027, 1, 4), status='present')
+
+    def tearDown(self):
+        invalidate_working_days()
+
+    def test_cohort_rows_with_and_without_records(self):
+        register = build_register(self.course, date(2027, 1, 20))
+        self.assertEqual((register.month, register.days), (date(2027, 1, 1), 31))
+        rows = list(register.rows())
+        self.assertEqual([name for name, codes, totals in rows], ['Amy', 'bo'])
+        amy_codes, amy_totals = rows[0][1], rows[0][2]
+        self.assertEqual(amy_codes[:7], ['P', '-', '-', 'A', 'T', 'P', '.'])
+        self.assertEqual(amy_totals, [2, 1, 0, 1])
+        self.assertEqual(rows[1][1][:4], ['.', '-', '-', '.'])
+        self.assertEqual(rows[1][2], [0, 0, 0, 0])
+
+    def test_formats(self):
+        register = build_register(self.course, date(2027, 1, 1))
+        lines = ''.join(register_csv(register)).splitlines()
+        self.assertEqual(lines[0], 'Chemistry - Attendance register - January 2027')
+        self.assertEqual(lines[2].split(',')[:5], ['Amy', 'P', '-', '-', 'A'])
+
+        html = b''.join(register_response(register).streaming_content).decode()
+        self.assertIn('<td class="name">Amy</td><td>P</td><td class="off">-</td>', html)
+        self.assertTrue(register_response(register, 'pdf').content.startswith(b'%PDF'))
 
-# Create your tests here.
+    def test_parse_register_month(self):
+        self.assertEqual(parse_register_month('2027-03'), date(2027, 3, 1))
+        self.assertEqual(parse_register_month('March', default=date(2027, 5, 17)), date(2027, 5, 1))
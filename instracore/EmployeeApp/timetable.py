@@ -0,0 +1,266 @@
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from AdminApp.working_days import is_working_day
+from EmployeeApp.models import ClassRoutine, Course, CourseTeacher
+from EmployeeApp.routine_clashes import load_course_cohorts
+
+
+DAYS = [day for day, _ in ClassRoutine.DAY_CHOICES]
+
+TimetableResult = namedtuple('TimetableResult', 'routines unscheduled complete elapsed')
+
+
+def weekly_off_days(weeks=16, start=None):
+    # Weekdays that are off in every week of the coming term. A one-off
+    # holiday only takes out its own date, not that weekday all term.
+    start = start or timezone.now().date()
+    working = set()
+    for offset in range(weeks * 7):
+        day = start + timedelta(days=offset)
+        if is_working_day(day):
+            working.add(DAYS[day.weekday()])
+    return set(DAYS) - working
+
+
+def _period_blocks(start_time, end_time, day_start, period_minutes, periods):
+    # Periods of the generated grid overlapped by an existing routine
+    day_start_minutes = day_start.hour * 60 + day_start.minute
+    start = start_time.hour * 60 + start_time.minute - day_start_minutes
+    end = end_time.hour * 60 + end_time.minute - day_start_minutes
+    return [
+        period for period in range(periods)
+        if period * period_minutes < end and (period + 1) * period_minutes > start
+    ]
+
+
+def build_problem(course_ids=None, rooms=None, availability=None, sessions_per_week=2,
+                  day_start=None, periods=6, period_minutes=60, weeks=16, replace=False):
+    day_start = day_start or datetime.strptime('09:00', '%H:%M').time()
+    courses = Course.objects.filter(status='active')
+    if course_ids:
+        courses = courses.filter(id__in=course_ids)
+    if not replace:
+        courses = courses.exclude(class_routines__is_active=True)
+    course_ids = list(courses.values_list('id', flat=True))
+
+    teachers = defaultdict(list)
+    for course_id, teacher_id in CourseTeacher.objects.filter(
+        course_id__in=course_ids
+    ).order_by('-is_primary', 'assigned_at').values_list('course_id', 'teacher_id'):
+        teachers[course_id].append(teacher_id)
+
+    off_days = weekly_off_days(weeks)
+    days = [day for day in DAYS if day not in off_days]
+
+    # Routines that stay in place are fixed constraints for the search
+    existing = ClassRoutine.objects.filter(is_active=True)
+    if replace:
+        existing = existing.exclude(course_id__in=course_ids)
+    blocked = {'teacher': set(), 'room': set(), 'course': set()}
+    existing_rooms = set()
+    for routine in existing.values('teacher_id', 'course_id', 'room', 'day_of_week', 'start_time', 'end_time'):
+        if routine['room']:
+            existing_rooms.add(routine['room'])
+        for period in _period_blocks(routine['start_time'], routine['end_time'], day_start, period_minutes, periods):
+            slot = (routine['day_of_week'], period)
+            blocked['teacher'].add((routine['teacher_id'], slot))
+            blocked['course'].add((routine['course_id'], slot))
+            if routine['room']:
+                blocked['room'].add((routine['room'], slot))
+
+    return {
+        'courses': [course_id for course_id in course_ids if teachers[course_id]],
+        'unassigned': [course_id for course_id in course_ids if not teachers[course_id]],
+        'teachers': dict(teachers),
+        'rooms': sorted(rooms or existing_rooms),
+        'days': days,
+        'periods': periods,
+        'sessions_per_week': sessions_per_week,
+        'availability': {teacher_id: set(allowed) for teacher_id, allowed in (availability or {}).items()},
+        'cohorts': {course_id: linked for course_id, linked in load_course_cohorts(course_ids).items()},
+        'blocked': blocked,
+        'day_start': day_start,
+        'period_minutes': period_minutes,
+    }
+
+
+class _State:
+    def __init__(self, problem):
+        self.problem = problem
+        self.teacher_busy = set(problem['blocked']['teacher'])
+        self.room_busy = set(problem['blocked']['room'])
+        self.courses_at = defaultdict(set)
+        for course_id, slot in problem['blocked']['course']:
+            self.courses_at[slot].add(course_id)
+        self.course_days = set()
+        self.day_load = defaultdict(int)
+
+    def free_room(self, slot):
+        rooms = self.problem['rooms']
+        if not rooms:
+            return ''
+        for room in rooms:
+            if (room, slot) not in self.room_busy:
+                return room
+        return None
+
+    def candidates(self, course_id):
+        problem = self.problem
+        linked = problem['cohorts'].get(course_id, set())
+        days = sorted(
+            (day for day in problem['days'] if (course_id, day) not in self.course_days),
+            key=lambda day: self.day_load[day],
+        )
+        options = []
+        for day in days:
+            for period in range(problem['periods']):
+                slot = (day, period)
+                scheduled = self.courses_at[slot]
+                if course_id in scheduled or not linked.isdisjoint(scheduled):
+                    continue
+                if self.free_room(slot) is None:
+                    continue
+                for teacher_id in problem['teachers'][course_id]:
+                    allowed = problem['availability'].get(teacher_id)
+                    if allowed is not None and day not in allowed:
+                        continue
+                    if (teacher_id, slot) not in self.teacher_busy:
+                        options.append((slot, teacher_id))
+        return options
+
+    def place(self, course_id, slot, teacher_id):
+        room = self.free_room(slot)
+        self.teacher_busy.add((teacher_id, slot))
+        if room:
+            self.room_busy.add((room, slot))
+        self.courses_at[slot].add(course_id)
+        self.course_days.add((course_id, slot[0]))
+        self.day_load[slot[0]] += 1
+        return (course_id, slot, teacher_id, room)
+
+    def remove(self, placement):
+        course_id, slot, teacher_id, room = placement
+        self.teacher_busy.discard((teacher_id, slot))
+        if room:
+            self.room_busy.discard((room, slot))
+        self.courses_at[slot].discard(course_id)
+        self.course_days.discard((course_id, slot[0]))
+        self.day_load[slot[0]] -= 1
+
+
+def solve(problem, time_budget=50):
+    # Depth-first search over course sessions, most constrained courses first,
+    # with chronological backtracking until the time budget runs out. On
+    # timeout the deepest partial timetable is completed greedily.
+    started = time.monotonic()
+    deadline = started + time_budget
+    cohorts = problem['cohorts']
+    teachers = problem['teachers']
+    teacher_load = defaultdict(int)
+    for course_id in problem['courses']:
+        for teacher_id in teachers[course_id]:
+            teacher_load[teacher_id] += 1
+
+    courses = sorted(
+        problem['courses'],
+        key=lambda course_id: (
+            len(teachers[course_id]),
+            -len(cohorts.get(course_id, ())),
+            -max(teacher_load[teacher_id] for teacher_id in teachers[course_id]),
+            course_id,
+        ),
+    )
+    sessions = [course_id for course_id in courses for _ in range(problem['sessions_per_week'])]
+
+    state = _State(problem)
+    options = [None] * len(sessions)
+    placements = [None] * len(sessions)
+    best = []
+    depth = 0
+    while 0 <= depth < len(sessions):
+        if time.monotonic() > deadline:
+            break
+        course_id = sessions[depth]
+        if options[depth] is None:
+            options[depth] = iter(state.candidates(course_id))
+        elif placements[depth] is not None:
+            state.remove(placements[depth])
+            placements[depth] = None
+
+        option = next(options[depth], None)
+        if option is None:
+            options[depth] = None
+            depth -= 1
+            continue
+        placements[depth] = state.place(course_id, *option)
+        depth += 1
+        if depth > len(best):
+            best = placements[:depth]
+
+    complete = depth == len(sessions)
+    if complete:
+        best = placements
+    unscheduled = []
+    if not complete:
+        # Rebuild the best partial timetable and place the rest where possible
+        state = _State(problem)
+        for placement in best:
+            state.place(placement[0], placement[1], placement[2])
+        best = list(best)
+        for course_id in sessions[len(best):]:
+            candidates = state.candidates(course_id)
+            if candidates:
+                best.append(state.place(course_id, *candidates[0]))
+            else:
+                unscheduled.append(course_id)
+
+    return TimetableResult(best, unscheduled + problem['unassigned'], complete, time.monotonic() - started)
+
+
+def _slot_times(problem, period):
+    day_start = datetime.combine(datetime.min, problem['day_start'])
+    start = day_start + timedelta(minutes=period * problem['period_minutes'])
+    end = start + timedelta(minutes=problem['period_minutes'])
+    return start.time(), end.time()
+
+
+def generate_timetable(time_budget=50, replace=False, commit=True, **options):
+    problem = build_problem(replace=replace, **options)
+
+    # The search is CPU bound, so run it in a worker process
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        result = executor.submit(solve, problem, time_budget).result(timeout=time_budget + 30)
+
+    routines = []
+    for course_id, (day, period), teacher_id, room in result.routines:
+        start_time, end_time = _slot_times(problem, period)
+        routines.append(ClassRoutine(
+            teacher_id=teacher_id,
+            course_id=course_id,
+            day_of_week=day,
+            start_time=start_time,
+            end_time=end_time,
+            room=room,
+        ))
+
+    if commit:
+        with transaction.atomic():
+            # Old routines are deactivated, not deleted: their ClassSessions hold
+            # the recorded attendance. A new slot that matches one reactivates it
+            # instead of adding a duplicate.
+            ClassRoutine.objects.filter(course_id__in=problem['courses'], is_active=True).update(is_active=False)
+            ClassRoutine.objects.bulk_create(
+                routines,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['teacher', 'course', 'day_of_week', 'start_time'],
+                update_fields=['end_time', 'room', 'is_active'],
+            )
+
+    return result._replace(routines=routines)
@@ -13,11 +13,17 @@ urlpatterns = [
     
     # Finance URLs
     path('salaries/', views.salaries, name='salaries'),
+    path('salaries/payroll/', views.payroll, name='payroll'),
+    path('salaries/base/', views.base_salary, name='base_salary'),
+    path('salaries/bulk/', views.bulk_salaries, name='bulk_salaries'),
     path('expenses/', views.expenses, name='expenses'),
+    path('expenses/bulk/', views.bulk_expenses, name='bulk_expenses'),
     
     # Faculty URLs
     path('faculty-courses/', views.courses, name='faculty_courses'),
     path('requests/', views.requests, name='requests'),
+    path('requests/bulk/', views.bulk_requests, name='bulk_requests'),
+    path('class-routine/conflicts/', views.routine_conflicts, name='routine_conflicts'),
     
     # Teacher URLs
     path('class-routine/', views.class_routine, name='class_routine'),
@@ -27,8 +33,13 @@ urlpatterns = [
     path('lesson-plan/', views.lesson_plan, name='lesson_plan'),
     path('teacher-courses/', views.teacher_courses, name='teacher_courses'),
     path('teacher-courses/create/', views.create_teacher_course, name='create_teacher_course'),
+    path('teacher-courses/<int:pk>/gradebook/', views.gradebook, name='gradebook'),
+    path('teacher-courses/<int:pk>/results/', views.course_results, name='course_results'),
+    path('teacher-courses/<int:pk>/results/json/', views.course_results_json, name='course_results_json'),
+    path('teacher-courses/<int:pk>/register/', views.attendance_register, name='attendance_register'),
     path('assignments/', views.assignments, name='assignments'),
     
     # Other Employee URLs
     path('mark-attendance/', views.mark_attendance, name='mark_attendance'),
+    path('attendance/checkins/', views.checkin_events, name='checkin_events'),
 ]
\ No newline at end of file
@@ -4,26 +4,55 @@ from django.contrib import messages
 from django.db.models import Count, Sum, Q
 from django.utils import timezone
 from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 from django.db.models import F
 from django.utils.dateparse import parse_date
+from django.utils.http import urlencode
+from collections import defaultdict
 from datetime import datetime, date, timedelta
 import json
 import csv
+import io
 
 from AuthApp.models import User, Notification, AuditLog
 from EmployeeApp.models import (
-    JobPost, Application, InterviewSchedule, Salary, Expense, Transaction,
+    JobPost, Application, InterviewSchedule, Salary, BaseSalary, Expense, Transaction,
     Course, CourseTeacher, Assignment, LessonPlan, Attendance, ClassRoutine
 )
 from EmployeeApp.forms import (
-    JobPostForm, ApplicationForm, InterviewScheduleForm, SalaryForm, ExpenseForm, TransactionForm,
-    CourseForm, CourseTeacherForm, AssignmentForm, LessonPlanForm, AttendanceForm, ClassRoutineForm
+    JobPostForm, ApplicationForm, InterviewScheduleForm, SalaryForm, BaseSalaryForm, ExpenseForm, TransactionForm,
+    CourseForm, CourseTeacherForm, AssignmentForm, LessonPlanForm, AttendanceForm, ClassRoutineForm,
+    GradebookUploadForm
 )
-from StudentApp.models import Enrollment
+from EmployeeApp.attendance_register import REGISTER_FORMATS, build_register, parse_register_month, register_response
+from EmployeeApp.checkins import CheckinError, device_for_token, ingest_checkins
+from EmployeeApp.session_attendance import record_daily_attendance, record_session, session_roster
+from EmployeeApp.payroll import run_payroll, approve_payroll, pay_payroll
+from EmployeeApp.bulk_actions import (
+    EXPENSE_TRANSITIONS, SALARY_TRANSITIONS, COURSE_TRANSITIONS, APPLICATION_TRANSITIONS,
+    bulk_update_expenses, bulk_update_salaries, bulk_update_courses, bulk_update_applications
+)
+from EmployeeApp.routine_clashes import check_routine_clashes, describe_clash, find_all_conflicts
+from StudentApp.models import Enrollment, ExamResult, ExamStatistics
+from StudentApp.gradebook import course_gradebook
+from StudentApp.grading import GRADEBOOK_ENROLLMENT_STATUSES, GradebookError, marks_from_csv, parse_marks, record_exam_marks
+
+
+def _selected_ids(request):
+    # Primary keys ticked in a multi-select list
+    return [int(pk) for pk in request.POST.getlist('ids') if pk.isdigit()]
+
+
+def _bulk_message(request, result, noun):
+    if result.updated:
+        messages.success(request, f'Updated {result.updated} {noun}.')
+    if result.skipped:
+        messages.warning(request, f'Skipped {result.skipped} {noun} that could not make this change.')
 
 
 # Role check functions
@@ -172,7 +201,10 @@ def teacher_dashboard(request, context):
     # Teacher specific data
     teacher = request.user
     active_courses = CourseTeacher.objects.filter(teacher=teacher, course__status='active').count()
-    total_students = Enrollment.objects.filter(course__teachers__teacher=teacher).count()
+    # Students currently taking the teacher's courses, from the Course counters
+    total_students = Course.objects.filter(teachers__teacher=teacher).aggregate(
+        total=Sum(F('enrollments_approved') + F('enrollments_ongoing'))
+    )['total'] or 0
     pending_tasks = Assignment.objects.filter(course__teachers__teacher=teacher, due_date__gte=timezone.now()).count()
     
     # Classes this week
@@ -385,6 +417,71 @@ def salaries(request):
     return render(request, 'EmployeeApp/salaries.html', context)
 
 
+@login_required
+@user_passes_test(is_finance)
+def payroll(request):
+    if request.method != 'POST':
+        return redirect('employee:salaries')
+    
+    month = parse_date((request.POST.get('month') or '') + '-01')
+    if not month:
+        messages.error(request, 'Choose a month in YYYY-MM format.')
+        return redirect('employee:salaries')
+    
+    action = request.POST.get('action', 'generate')
+    label = month.strftime('%B %Y')
+    if action == 'generate':
+        result = run_payroll(month, created_by=request.user)
+        messages.success(request, f'Generated {result.created} salaries for {label} ({result.skipped} already existed).')
+    elif action == 'approve':
+        count = approve_payroll(month, approved_by=request.user)
+        messages.success(request, f'Approved {count} salaries for {label}.')
+    elif action == 'pay':
+        count = pay_payroll(month, paid_by=request.user)
+        messages.success(request, f'Paid {count} salaries for {label}.')
+    else:
+        messages.error(request, 'Unknown payroll action.')
+    
+    return redirect(f"{reverse_lazy('employee:salaries')}?month={month.strftime('%Y-%m')}")
+
+
+@login_required
+@user_passes_test(is_finance)
+def base_salary(request):
+    if request.method != 'POST':
+        return redirect('employee:salaries')
+    
+    existing = BaseSalary.objects.filter(employee_id=request.POST.get('employee')).first()
+    form = BaseSalaryForm(request.POST, instance=existing)
+    if form.is_valid():
+        base = form.save()
+        
+        AuditLog.objects.create(
+            user=request.user,
+            action=f"Set base salary for {base.employee.username} to {base.amount}",
+            model_name="BaseSalary",
+            object_id=base.id
+        )
+        
+        messages.success(request, f'Base salary for {base.employee.username} saved.')
+    else:
+        messages.error(request, 'Please correct the base salary details.')
+    
+    return redirect('employee:salaries')
+
+
+@login_required
+@user_passes_test(is_finance)
+def bulk_salaries(request):
+    action = request.POST.get('action')
+    if request.method != 'POST' or action not in SALARY_TRANSITIONS:
+        return redirect('employee:salaries')
+    
+    result = bulk_update_salaries(_selected_ids(request), action, request.user)
+    _bulk_message(request, result, 'salaries')
+    return redirect('employee:salaries')
+
+
 @login_required
 @user_passes_test(is_finance)
 def expenses(request):
@@ -414,6 +511,18 @@ def expenses(request):
     return render(request, 'EmployeeApp/expenses.html', context)
 
 
+@login_required
+@user_passes_test(is_finance)
+def bulk_expenses(request):
+    action = request.POST.get('action')
+    if request.method != 'POST' or action not in EXPENSE_TRANSITIONS:
+        return redirect('employee:expenses')
+    
+    result = bulk_update_expenses(_selected_ids(request), action, request.user)
+    _bulk_message(request, result, 'expenses')
+    return redirect('employee:expenses')
+
+
 # Faculty Views
 @login_required
 @user_passes_test(is_faculty)
@@ -473,6 +582,45 @@ def requests(request):
     return render(request, 'EmployeeApp/requests.html', context)
 
 
+@login_required
+@user_passes_test(is_faculty)
+def bulk_requests(request):
+    if request.method != 'POST':
+        return redirect('employee:requests')
+    
+    action = request.POST.get('action')
+    kind = request.POST.get('kind')
+    if kind == 'course' and action in COURSE_TRANSITIONS:
+        result = bulk_update_courses(_selected_ids(request), action, request.user)
+        _bulk_message(request, result, 'course requests')
+    elif kind == 'application' and action in APPLICATION_TRANSITIONS:
+        result = bulk_update_applications(_selected_ids(request), action, request.user)
+        _bulk_message(request, result, 'teacher applications')
+    else:
+        messages.error(request, 'Unknown bulk action.')
+    return redirect('employee:requests')
+
+
+@login_required
+@user_passes_test(is_faculty)
+def routine_conflicts(request):
+    # Report every teacher, room and cohort clash across the routine in one sweep
+    day_filter = request.GET.get('day') or None
+    clashes = find_all_conflicts(day=day_filter)
+    
+    data = [
+        {
+            'kind': clash.kind,
+            'day': clash.day,
+            'routine_id': clash.routine_id,
+            'other_id': clash.other_id,
+            'message': describe_clash(clash),
+        }
+        for clash in clashes
+    ]
+    return JsonResponse({'count': len(data), 'conflicts': data})
+
+
 # Teacher Views
 @login_required
 @user_passes_test(is_teacher)
@@ -504,18 +652,25 @@ def create_class_routine(request):
         if form.is_valid():
             routine = form.save(commit=False)
             routine.teacher = teacher
-            routine.save()
             
-            # Log the action
-            AuditLog.objects.create(
-                user=request.user,
-                action=f"Created class routine: {routine.course.title} on {routine.day_of_week}",
-                model_name="ClassRoutine",
-                object_id=str(routine.id)
-            )
+            # Reject slots overlapping the teacher, the room or the course cohort
+            clashes = check_routine_clashes(routine) if routine.is_active else []
+            for clash in clashes:
+                form.add_error(None, describe_clash(clash))
             
-            messages.success(request, f'Class routine for {routine.course.title} on {routine.day_of_week} created successfully')
-            return redirect('employee:class_routine')
+            if not clashes:
+                routine.save()
+                
+                # Log the action
+                AuditLog.objects.create(
+                    user=request.user,
+                    action=f"Created class routine: {routine.course.title} on {routine.day_of_week}",
+                    model_name="ClassRoutine",
+                    object_id=str(routine.id)
+                )
+                
+                messages.success(request, f'Class routine for {routine.course.title} on {routine.day_of_week} created successfully')
+                return redirect('employee:class_routine')
     else:
         form = ClassRoutineForm()
         # Filter courses to only show courses this teacher teaches
@@ -592,33 +747,31 @@ def take_attendance(request):
         course_id = request.POST.get('course')
         course = get_object_or_404(Course, pk=course_id, teachers__teacher=teacher)
         
-        # Get students enrolled in this course
-        enrollments = Enrollment.objects.filter(course=course, status='ongoing')
+        statuses = {
+            student_id: request.POST.get(f'attendance_{student_id}')
+            for student_id in session_roster(course)
+        }
         
-        # Process attendance for each student
-        for enrollment in enrollments:
-            student = enrollment.student
-            status = request.POST.get(f'attendance_{student.id}')
-            
-            # Create or update attendance record
-            attendance, created = Attendance.objects.get_or_create(
-                user=student,
-                date=today,
-                defaults={
-                    'status': status or 'present',
-                    'marked_by': teacher
-                }
-            )
-            
-            if not created:
-                attendance.status = status or 'present'
-                attendance.marked_by = teacher
-                attendance.save()
+        # Attendance is stored per class session, so the form says which of
+        # today's classes it is for and a second class never overwrites the first
+        course_routines = today_routines.filter(course=course)
+        if course_routines.exists():
+            routine_id = request.POST.get('routine', '')
+            routine = course_routines.filter(pk=routine_id).first() if routine_id.isdigit() else None
+            if not routine:
+                messages.error(request, f'Choose which class of {course.title} this attendance is for')
+                return redirect('employee:take_attendance')
+            record_session(routine, today, statuses, marked_by=teacher)
+            action = f"Marked attendance for course: {course.title} ({routine.start_time:%H:%M})"
+        else:
+            # An extra class with no routine today is marked for the day as before
+            record_daily_attendance(today, statuses, marked_by=teacher)
+            action = f"Marked attendance for course: {course.title} (unscheduled class)"
         
         # Log the action
         AuditLog.objects.create(
             user=request.user,
-            action=f"Marked attendance for course: {course.title}",
+            action=action,
             model_name="Attendance",
             object_id=str(course.id)
         )
@@ -626,8 +779,19 @@ def take_attendance(request):
         messages.success(request, f'Attendance for {course.title} marked successfully')
         return redirect('employee:take_attendance')
     
+    # Each of today's classes with the students on its roster
+    today_routines = today_routines.select_related('course')
+    students = User.objects.filter(
+        enrollments__course__in=[routine.course_id for routine in today_routines], enrollments__status='ongoing'
+    ).annotate(roster_course_id=F('enrollments__course_id')).order_by('first_name', 'last_name', 'username')
+    rosters = defaultdict(list)
+    for student in students:
+        rosters[student.roster_course_id].append(student)
+    
     context = {
         'today_routines': today_routines,
+        'classes': [(routine, rosters[routine.course_id]) for routine in today_routines],
+        'status_choices': Attendance.STATUS_CHOICES,
         'active_page': 'teacher_attendance',
     }
     return render(request, 'EmployeeApp/take_attendance.html', context)
@@ -759,6 +923,105 @@ def create_teacher_course(request):
     return render(request, 'EmployeeApp/course_form.html', context)
 
 
+@login_required
+@user_passes_test(is_teacher)
+def gradebook(request, pk):
+    course = get_object_or_404(Course, pk=pk, teachers__teacher=request.user)
+    enrollments = Enrollment.objects.filter(
+        course=course, status__in=GRADEBOOK_ENROLLMENT_STATUSES
+    ).select_related('student').order_by('student__username')
+    
+    if request.method == 'POST':
+        form = GradebookUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            exam_name = form.cleaned_data['exam_name']
+            total_marks = form.cleaned_data['total_marks']
+            errors = []
+            if form.cleaned_data['csv_file']:
+                csv_file = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+                marks, csv_errors = marks_from_csv(csv_file, course, total_marks)
+                errors += [f'Line {line}: {error}' for line, error in csv_errors]
+            else:
+                # Grid entry: one marks_<enrollment id> input per student
+                marks = {}
+                for enrollment in enrollments:
+                    value = request.POST.get(f'marks_{enrollment.id}', '').strip()
+                    if not value:
+                        continue
+                    try:
+                        marks[enrollment.id] = (parse_marks(value, total_marks), request.POST.get(f'remarks_{enrollment.id}', ''))
+                    except GradebookError as e:
+                        errors.append(f'{enrollment.student.username}: {e}')
+            
+            if marks:
+                try:
+                    result = record_exam_marks(course, exam_name, total_marks, marks, recorded_by=request.user)
+                except GradebookError as e:
+                    messages.error(request, str(e))
+                else:
+                    errors += result.errors
+                    messages.success(
+                        request,
+                        f'{exam_name}: {result.created} results added, {result.updated} updated. '
+                        f'Mean {result.statistics.mean}, median {result.statistics.median}.'
+                    )
+            for error in errors[:10]:
+                messages.warning(request, error)
+            return redirect(f"{reverse_lazy('employee:gradebook', args=[course.pk])}?{urlencode({'exam': exam_name})}")
+    else:
+        form = GradebookUploadForm(initial={'exam_name': request.GET.get('exam', '')})
+    
+    exam_name = request.GET.get('exam', '')
+    current_marks = dict(ExamResult.objects.filter(
+        enrollment__course=course, exam_name=exam_name
+    ).values_list('enrollment_id', 'marks_obtained')) if exam_name else {}
+    
+    context = {
+        'course': course,
+        'form': form,
+        'exam_name': exam_name,
+        'rows': [(enrollment, current_marks.get(enrollment.id)) for enrollment in enrollments],
+        'exam_statistics': ExamStatistics.objects.filter(course=course).order_by('-computed_at'),
+        'active_page': 'teacher_courses',
+    }
+    return render(request, 'EmployeeApp/gradebook.html', context)
+
+
+@login_required
+@user_passes_test(is_teacher)
+def course_results(request, pk):
+    course = get_object_or_404(Course, pk=pk, teachers__teacher=request.user)
+    matrix = course_gradebook(course.pk)
+    
+    context = {
+        'course': course,
+        'exams': matrix.exams,
+        'rows': list(matrix.rows()),
+        'exam_statistics': matrix.exam_statistics,
+        'active_page': 'teacher_courses',
+    }
+    return render(request, 'EmployeeApp/course_results.html', context)
+
+
+@login_required
+@user_passes_test(is_teacher)
+def course_results_json(request, pk):
+    course = get_object_or_404(Course, pk=pk, teachers__teacher=request.user)
+    return JsonResponse(course_gradebook(course.pk).as_dict())
+
+
+@login_required
+@user_passes_test(is_teacher)
+def attendance_register(request, pk):
+    course = get_object_or_404(Course, pk=pk, teachers__teacher=request.user)
+    month = parse_register_month(request.GET.get('month'))
+    fmt = request.GET.get('format', 'html')
+    if fmt not in REGISTER_FORMATS:
+        fmt = 'html'
+    
+    return register_response(build_register(course, month), fmt)
+
+
 @login_required
 @user_passes_test(is_teacher)
 def assignments(request):
@@ -831,4 +1094,29 @@ def mark_attendance(request):
     context = {
         'active_page': 'attendance',
     }
-    return render(request, 'EmployeeApp/mark_attendance.html', context)
\ No newline at end of file
+    return render(request, 'EmployeeApp/mark_attendance.html', context)
+
+
+# Badge and biometric devices post JSON lines or CSV with a bearer token
+# from ATTENDANCE_DEVICE_TOKENS instead of a session
+@csrf_exempt
+@require_POST
+def checkin_events(request):
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    device = device_for_token(token)
+    if not device:
+        return JsonResponse({'error': 'invalid device token'}, status=403)
+    
+    fmt = 'csv' if request.content_type == 'text/csv' else 'jsonl'
+    try:
+        result = ingest_checkins(io.StringIO(request.body.decode('utf-8-sig')), fmt=fmt, source=device)
+    except (CheckinError, UnicodeDecodeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'events': result.events,
+        'created': result.created,
+        'updated': result.updated,
+        'unchanged': result.unchanged,
+        'errors': [{'line': line, 'error': error} for line, error in result.errors[:100]],
+    })
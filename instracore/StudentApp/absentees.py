@@ -0,0 +1,144 @@
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Min, OuterRef, Subquery
+from django.db.models.functions import TruncDate
+from django.template.loader import get_template
+from django.utils import timezone
+
+from AdminApp.working_days import is_working_day, working_days_between
+from AuthApp.mail import enqueue_emails
+from AuthApp.models import User, Notification, AuditLog
+from EmployeeApp.models import Attendance, CourseTeacher
+from StudentApp.models import Enrollment
+
+
+# Working days in a row after which an absence is called out as a streak
+ABSENCE_STREAK_THRESHOLD = getattr(settings, 'ABSENCE_STREAK_THRESHOLD', 3)
+# How far back the stored history is searched for the last day attended
+ABSENCE_LOOKBACK_DAYS = getattr(settings, 'ABSENCE_LOOKBACK_DAYS', 60)
+# Names listed in a teacher's notification before it switches to "and N more"
+ABSENCE_NAMES_PER_NOTIFICATION = 10
+
+ABSENCE_EMAIL_TEMPLATE = 'StudentApp/absence_alert.txt'
+
+Absentee = namedtuple('Absentee', 'student_id name guardian_email streak')
+AbsenteeResult = namedtuple('AbsenteeResult', 'absentees streaks notified emailed')
+
+
+def _audit_marker(day):
+    return f"absentees:{day.isoformat()}"
+
+
+def find_absentees(day):
+    # Students with an ongoing enrollment and no attendance other than
+    # 'absent' on the day, in one anti-join. The last day each of them did
+    # attend comes from a correlated subquery on the (user, date) index.
+    ongoing = Enrollment.objects.filter(student=OuterRef('pk'), status='ongoing')
+    attended = Attendance.objects.filter(user=OuterRef('pk')).exclude(status='absent')
+    rows = User.objects.filter(
+        Exists(ongoing), role='student', is_active=True
+    ).exclude(
+        Exists(attended.filter(date=day))
+    ).annotate(
+        last_attended=Subquery(attended.filter(
+            date__lt=day, date__gte=day - timedelta(days=ABSENCE_LOOKBACK_DAYS)
+        ).order_by('-date').values('date')[:1]),
+        enrolled_since=Subquery(ongoing.annotate(
+            enrolled_on=TruncDate('enrolled_at')
+        ).order_by('enrolled_on').values('enrolled_on')[:1]),
+    ).order_by('id').values_list(
+        'id', 'username', 'first_name', 'last_name', 'guardian_email', 'last_attended', 'enrolled_since'
+    )
+
+    lookback_start = day - timedelta(days=ABSENCE_LOOKBACK_DAYS)
+    absentees = []
+    for student_id, username, first_name, last_name, guardian_email, last_attended, enrolled_since in rows:
+        # The streak runs from the day after they last attended (or enrolled)
+        # up to today, counted in working days with O(1) calendar lookups
+        streak_start = last_attended + timedelta(days=1) if last_attended else lookback_start
+        if enrolled_since:
+            streak_start = max(streak_start, enrolled_since)
+        absentees.append(Absentee(
+            student_id,
+            f"{first_name} {last_name}".strip() or username,
+            guardian_email,
+            max(working_days_between(streak_start, day), 1),
+        ))
+    return absentees
+
+
+def _teacher_notifications(day, absentees):
+    # One notification per teacher and course listing that course's absentees
+    by_student = {absentee.student_id: absentee for absentee in absentees}
+    per_course = defaultdict(list)
+    course_titles = {}
+    for student_id, course_id, title in Enrollment.objects.filter(
+        student_id__in=by_student.keys(), status='ongoing'
+    ).values_list('student_id', 'course_id', 'course__title'):
+        per_course[course_id].append(by_student[student_id])
+        course_titles[course_id] = title
+
+    notifications = []
+    for course_id, teacher_id in CourseTeacher.objects.filter(course_id__in=per_course.keys()).values_list('course_id', 'teacher_id'):
+        students = sorted(per_course[course_id], key=lambda absentee: (-absentee.streak, absentee.name))
+        names = [
+            f"{absentee.name} ({absentee.streak} days)" if absentee.streak >= ABSENCE_STREAK_THRESHOLD else absentee.name
+            for absentee in students[:ABSENCE_NAMES_PER_NOTIFICATION]
+        ]
+        if len(students) > ABSENCE_NAMES_PER_NOTIFICATION:
+            names.append(f"and {len(students) - ABSENCE_NAMES_PER_NOTIFICATION} more")
+        notifications.append(Notification(
+            user_id=teacher_id,
+            message=f"{len(students)} absent from {course_titles[course_id]} on {day:%d %b %Y}: {', '.join(names)}",
+        ))
+    return notifications
+
+
+def _guardian_emails(day, absentees):
+    template = get_template(ABSENCE_EMAIL_TEMPLATE)
+    return [
+        {
+            'to_email': absentee.guardian_email,
+            'subject': f"Absence alert - {absentee.name} - {day:%d %B %Y}",
+            'body': template.render({
+                'student_name': absentee.name,
+                'day': day,
+                'streak': absentee.streak,
+                'is_streak': absentee.streak >= ABSENCE_STREAK_THRESHOLD,
+            }).strip(),
+            'dedupe_key': f"absence:{absentee.student_id}:{day.isoformat()}",
+        }
+        for absentee in absentees if absentee.guardian_email
+    ]
+
+
+def detect_absentees(day=None, notify=True, force=False, run_by=None):
+    # Daily job: find the day's absentees and alert their teachers and
+    # guardians in bulk. Non-working days have no absentees. A day already
+    # alerted is not alerted again unless force is set; guardian emails are
+    # deduplicated by the outbox either way.
+    day = day or timezone.now().date()
+    if not is_working_day(day):
+        return AbsenteeResult([], [], 0, 0)
+
+    absentees = find_absentees(day)
+    streaks = [absentee for absentee in absentees if absentee.streak >= ABSENCE_STREAK_THRESHOLD]
+    if not notify or not absentees:
+        return AbsenteeResult(absentees, streaks, 0, 0)
+    if not force and AuditLog.objects.filter(model_name="Attendance", object_id=_audit_marker(day)).exists():
+        return AbsenteeResult(absentees, streaks, 0, 0)
+
+    with transaction.atomic():
+        notifications = _teacher_notifications(day, absentees)
+        Notification.objects.bulk_create(notifications, batch_size=1000)
+        emailed = enqueue_emails(_guardian_emails(day, absentees))
+        AuditLog.objects.create(
+            user=run_by,
+            action=f"Flagged {len(absentees)} absentees ({len(streaks)} on a streak) for {day:%d %b %Y}",
+            model_name="Attendance",
+            object_id=_audit_marker(day)
+        )
+    return AbsenteeResult(absentees, streaks, len(notifications), emailed)
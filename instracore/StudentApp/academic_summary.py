@@ -0,0 +1,146 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+
+from AuthApp.models import User
+from EmployeeApp.models import Attendance
+from StudentApp.models import AcademicSummary, Enrollment, ExamResult
+
+
+# Points per grade (see EXAM_GRADE_BOUNDARIES) for the GPA shown to students
+GRADE_POINTS = getattr(settings, 'EXAM_GRADE_POINTS', {
+    'A+': 5.0, 'A': 4.0, 'A-': 3.5, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0,
+})
+
+SUMMARY_FIELDS = [
+    field.name for field in AcademicSummary._meta.concrete_fields
+    if field.name not in ('student', 'updated_at')
+]
+
+ATTENDANCE_STATUSES = ('present', 'absent', 'leave', 'late')
+
+
+def attendance_contribution(status):
+    deltas = {'attendance_total': 1}
+    if status in ATTENDANCE_STATUSES:
+        deltas[f'attendance_{status}'] = 1
+    return deltas
+
+
+def exam_contribution(passed, marks_obtained, grade):
+    deltas = {
+        'exams_total': 1,
+        'exams_passed': int(bool(passed)),
+        'marks_obtained_sum': marks_obtained or Decimal('0'),
+    }
+    if grade in GRADE_POINTS:
+        deltas['exams_graded'] = 1
+        deltas['grade_points_sum'] = Decimal(str(GRADE_POINTS[grade]))
+    return deltas
+
+
+def enrollment_contribution(status):
+    if status == 'ongoing':
+        return {'enrollments_active': 1}
+    if status == 'completed':
+        return {'enrollments_completed': 1}
+    return {}
+
+
+def apply_change(student_id, old=None, new=None, old_student_id=None):
+    # Move a row's contribution from its old values to its new ones with F()
+    # increments. Students without a summary yet get one built from scratch.
+    old_student_id = old_student_id or student_id
+    if old and old_student_id != student_id:
+        _shift(old_student_id, old, -1)
+        old = None
+    deltas = dict(new or {})
+    for field, value in (old or {}).items():
+        deltas[field] = deltas.get(field, 0) - value
+    _shift(student_id, deltas, 1)
+
+
+def _shift(student_id, deltas, sign):
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas or not student_id:
+        return
+    updated = AcademicSummary.objects.filter(pk=student_id).update(
+        **{field: F(field) + sign * value for field, value in deltas.items()}
+    )
+    if not updated:
+        # Built after the change was saved, so it already includes it
+        rebuild_summaries([student_id])
+
+
+def rebuild_summaries(student_ids=None, batch_size=1000):
+    # Recompute summaries with three grouped queries and upsert them in bulk
+    students = User.objects.filter(role='student')
+    if student_ids is not None:
+        students = students.filter(id__in=student_ids)
+    student_ids = list(students.values_list('id', flat=True))
+
+    rebuilt = 0
+    for start in range(0, len(student_ids), batch_size):
+        rebuilt += _rebuild_batch(student_ids[start:start + batch_size])
+    return rebuilt
+
+
+def _rebuild_batch(student_ids):
+    summaries = {student_id: AcademicSummary(student_id=student_id) for student_id in student_ids}
+
+    attendance = Attendance.objects.filter(user_id__in=student_ids).values('user_id').annotate(
+        total=Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status in ATTENDANCE_STATUSES}
+    )
+    for row in attendance:
+        summary = summaries[row['user_id']]
+        summary.attendance_total = row['total']
+        for status in ATTENDANCE_STATUSES:
+            setattr(summary, f'attendance_{status}', row[status])
+
+    grade_points = Case(
+        *[When(grade=grade, then=Value(Decimal(str(points)))) for grade, points in GRADE_POINTS.items()],
+        default=Value(Decimal('0')),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    results = ExamResult.objects.filter(enrollment__student_id__in=student_ids).values('enrollment__student_id').annotate(
+        total=Count('id'),
+        passed=Count('id', filter=Q(passed=True)),
+        graded=Count('id', filter=Q(grade__in=list(GRADE_POINTS))),
+        marks=Sum('marks_obtained'),
+        points=Sum(grade_points),
+    )
+    for row in results:
+        summary = summaries[row['enrollment__student_id']]
+        summary.exams_total = row['total']
+        summary.exams_passed = row['passed']
+        summary.exams_graded = row['graded']
+        summary.marks_obtained_sum = row['marks'] or Decimal('0')
+        summary.grade_points_sum = row['points'] or Decimal('0')
+
+    enrollments = Enrollment.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        active=Count('id', filter=Q(status='ongoing')),
+        completed=Count('id', filter=Q(status='completed')),
+    )
+    for row in enrollments:
+        summary = summaries[row['student_id']]
+        summary.enrollments_active = row['active']
+        summary.enrollments_completed = row['completed']
+
+    AcademicSummary.objects.bulk_create(
+        summaries.values(),
+        update_conflicts=True,
+        unique_fields=['student'],
+        update_fields=SUMMARY_FIELDS + ['updated_at'],
+    )
+    return len(summaries)
+
+
+def academic_summary(student):
+    # One primary-key lookup in the common case
+    summary = AcademicSummary.objects.filter(pk=student.pk).first()
+    if summary is None:
+        rebuild_summaries([student.pk])
+        summary = AcademicSummary.objects.filter(pk=student.pk).first() or AcademicSummary(student=student)
+    return summary
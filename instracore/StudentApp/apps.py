@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StudentappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'StudentApp'
+
+    def ready(self):
+        from StudentApp import signals  # noqa: F401
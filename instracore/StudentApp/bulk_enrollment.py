@@ -0,0 +1,124 @@
+from collections import namedtuple
+import csv
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from AuthApp.models import User, Notification, AuditLog
+from EmployeeApp.models import Course
+from StudentApp.academic_summary import rebuild_summaries
+from StudentApp.course_counters import ENROLLMENT_COUNTERS, shift_counters
+from StudentApp.gradebook import invalidate_gradebook
+from StudentApp.models import Enrollment, FeePayment
+from StudentApp.seats import SEAT_HOLDING_STATUSES, clear_waitlist, fee_due_date, take_seat
+
+
+EnrollmentResult = namedtuple('EnrollmentResult', 'created skipped')
+
+
+def students_from_csv(csv_file):
+    # Student ids for a CSV with a username, email or student_id column,
+    # plus the values that did not match an active student
+    reader = csv.DictReader(csv_file)
+    keys = {'usernames': set(), 'emails': set(), 'ids': set()}
+    for row in reader:
+        row = {(name or '').strip().lower(): (value or '').strip() for name, value in row.items()}
+        if row.get('username'):
+            keys['usernames'].add(row['username'])
+        elif row.get('email'):
+            keys['emails'].add(row['email'].lower())
+        elif row.get('student_id', '').isdigit():
+            keys['ids'].add(int(row['student_id']))
+    return resolve_students(**keys)
+
+
+def resolve_students(usernames=(), emails=(), ids=()):
+    usernames, emails, ids = set(usernames), {email.lower() for email in emails}, set(ids)
+    rows = User.objects.filter(role='student', is_active=True).filter(
+        Q(username__in=usernames) | Q(email__in=emails) | Q(id__in=ids)
+    ).values_list('id', 'username', 'email')
+
+    student_ids = set()
+    for student_id, username, email in rows:
+        student_ids.add(student_id)
+        usernames.discard(username)
+        emails.discard((email or '').lower())
+        ids.discard(student_id)
+    unknown = sorted(usernames) + sorted(emails) + [str(student_id) for student_id in sorted(ids)]
+    return student_ids, unknown
+
+
+def _insert_enrollments(course, student_ids, status, batch_size):
+    # (id, student id) of the enrollments this call inserted. Without
+    # ignore_conflicts bulk_create returns the new primary keys; a single
+    # enrollment that slips in between the check and the insert makes it
+    # fail, so the savepoint is rolled back and the check runs again.
+    while True:
+        already_enrolled = set(Enrollment.objects.filter(
+            course=course, student_id__in=student_ids
+        ).values_list('student_id', flat=True))
+        enrollments = [
+            Enrollment(student_id=student_id, course=course, status=status)
+            for student_id in student_ids - already_enrolled
+        ]
+        try:
+            with transaction.atomic():
+                Enrollment.objects.bulk_create(enrollments, batch_size=batch_size)
+        except IntegrityError:
+            continue
+        return [(enrollment.id, enrollment.student_id) for enrollment in enrollments]
+
+
+def enroll_students(course, student_ids, status='approved', due_date=None, enrolled_by=None, batch_size=1000):
+    # Enroll many students in one transaction. Students already enrolled in the
+    # course are skipped by the (student, course) unique constraint.
+    student_ids = set(User.objects.filter(
+        id__in=set(student_ids), role='student', is_active=True
+    ).values_list('id', flat=True))
+    # Same due date the single enrollment view gives a course fee
+    due_date = due_date or fee_due_date()
+
+    with transaction.atomic():
+        # Lock the course so two bulk runs for it cannot interleave
+        course = Course.objects.select_for_update().get(pk=course.pk)
+        created = _insert_enrollments(course, student_ids, status, batch_size)
+        # Everyone in the run is now enrolled, so none of them is still waiting
+        clear_waitlist(course.pk, student_ids)
+
+        # Admin enrollments count against the capacity but are not refused by it
+        if created and status in SEAT_HOLDING_STATUSES:
+            take_seat(course.pk, len(created))
+        if created:
+            shift_counters(course.pk, **{ENROLLMENT_COUNTERS[status]: len(created)})
+
+        if course.price > 0:
+            FeePayment.objects.bulk_create([
+                FeePayment(enrollment_id=enrollment_id, amount=course.price, due_date=due_date)
+                for enrollment_id, student_id in created
+            ], batch_size=batch_size)
+
+        Notification.objects.bulk_create([
+            Notification(user_id=student_id, message=f"You have been enrolled in {course.title}")
+            for enrollment_id, student_id in created
+        ], batch_size=batch_size)
+
+        # bulk_create sends no signals
+        transaction.on_commit(lambda: invalidate_gradebook(course.pk))
+        transaction.on_commit(lambda: rebuild_summaries([student_id for enrollment_id, student_id in created]))
+
+        if created:
+            AuditLog.objects.create(
+                user=enrolled_by,
+                action=f"Bulk enrolled {len(created)} students in course: {course.title}",
+                model_name="Enrollment",
+                object_id="bulk"
+            )
+    return EnrollmentResult(len(created), len(student_ids) - len(created))
+
+
+def promote_completed(from_course, to_course, status='approved', due_date=None, enrolled_by=None):
+    # Term rollover: everyone who completed from_course starts to_course
+    student_ids = Enrollment.objects.filter(
+        course=from_course, status='completed'
+    ).values_list('student_id', flat=True)
+    return enroll_students(to_course, student_ids, status=status, due_date=due_date, enrolled_by=enrolled_by)
@@ -0,0 +1,126 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Case, CharField, Count, Exists, F, IntegerField, OuterRef, Q, Value, When
+
+from EmployeeApp.models import Course, CourseTeacher
+from StudentApp.models import Enrollment, WaitlistEntry
+
+
+# Facet counts only move when courses are added or change, so a short
+# cache absorbs the start-of-term spike without going noticeably stale
+CATALOG_FACET_CACHE_TIMEOUT = getattr(settings, 'CATALOG_FACET_CACHE_TIMEOUT', 60)
+CATALOG_FACET_CACHE_KEY = 'catalog:facets'
+CATALOG_PAGE_SIZE = 6
+
+# (key, label, above, up to and including); None means unbounded
+PRICE_BANDS = getattr(settings, 'CATALOG_PRICE_BANDS', (
+    ('free', 'Free', None, 0),
+    ('low', 'Up to 1,000', 0, 1000),
+    ('mid', '1,000 to 5,000', 1000, 5000),
+    ('high', 'Over 5,000', 5000, None),
+))
+
+CatalogPage = namedtuple('CatalogPage', 'page facets filters')
+
+
+def _band_condition(above, up_to):
+    condition = Q()
+    if above is not None:
+        condition &= Q(price__gt=above)
+    if up_to is not None:
+        condition &= Q(price__lte=up_to)
+    return condition
+
+
+def _price_band():
+    return Case(
+        *[When(_band_condition(above, up_to), then=Value(key)) for key, label, above, up_to in PRICE_BANDS],
+        output_field=CharField(),
+    )
+
+
+def catalog_filters(params):
+    # The facet selections from a GET query, with unknown values dropped
+    teacher = params.get('teacher', '')
+    return {
+        'type': params.get('type') if params.get('type') in dict(Course.TYPE_CHOICES) else '',
+        'price': params.get('price') if params.get('price') in {band[0] for band in PRICE_BANDS} else '',
+        'duration': params.get('duration', '').strip(),
+        'teacher': int(teacher) if teacher.isdigit() else None,
+        'search': params.get('search', '').strip(),
+    }
+
+
+def catalog_courses(student, filters):
+    courses = Course.objects.filter(status='active')
+    if filters['type']:
+        courses = courses.filter(course_type=filters['type'])
+    if filters['price']:
+        above, up_to = next((above, up_to) for key, label, above, up_to in PRICE_BANDS if key == filters['price'])
+        courses = courses.filter(_band_condition(above, up_to))
+    if filters['duration']:
+        courses = courses.filter(duration=filters['duration'])
+    if filters['teacher']:
+        courses = courses.filter(Exists(CourseTeacher.objects.filter(course=OuterRef('pk'), teacher_id=filters['teacher'])))
+    if filters['search']:
+        courses = courses.filter(Q(title__icontains=filters['search']) | Q(description__icontains=filters['search']))
+
+    # Per-row flags come from correlated EXISTS subqueries and seats from
+    # the Course counters, so the page is a single query with no joins
+    return courses.annotate(
+        is_enrolled=Exists(Enrollment.objects.filter(course=OuterRef('pk'), student=student)),
+        is_waitlisted=Exists(WaitlistEntry.objects.filter(course=OuterRef('pk'), student=student)),
+        seats_left=Case(
+            When(capacity__isnull=True, then=Value(None)),
+            When(seats_taken__gte=F('capacity'), then=Value(0)),
+            default=F('capacity') - F('seats_taken'),
+            output_field=IntegerField(),
+        ),
+    ).order_by('title', 'pk')
+
+
+def build_catalog_facets():
+    # Type, price band and duration counts come from one GROUP BY over the
+    # active courses. A course can have several teachers, so the teacher
+    # counts are grouped over CourseTeacher separately.
+    facets = {'type': {}, 'price': {}, 'duration': {}, 'teacher': []}
+    rows = Course.objects.filter(status='active').annotate(price_band=_price_band()).values_list(
+        'course_type', 'price_band', 'duration'
+    ).annotate(count=Count('id')).order_by()
+    for course_type, price_band, duration, count in rows:
+        facets['type'][course_type] = facets['type'].get(course_type, 0) + count
+        facets['price'][price_band] = facets['price'].get(price_band, 0) + count
+        facets['duration'][duration] = facets['duration'].get(duration, 0) + count
+
+    type_labels = dict(Course.TYPE_CHOICES)
+    facets['type'] = [(value, type_labels.get(value, value), count) for value, count in sorted(facets['type'].items())]
+    facets['price'] = [
+        (key, label, facets['price'][key]) for key, label, above, up_to in PRICE_BANDS if key in facets['price']
+    ]
+    facets['duration'] = [(value, value, count) for value, count in sorted(facets['duration'].items()) if value]
+
+    teachers = CourseTeacher.objects.filter(course__status='active').values_list(
+        'teacher_id', 'teacher__first_name', 'teacher__last_name', 'teacher__username'
+    ).annotate(count=Count('id')).order_by('teacher__first_name', 'teacher__last_name', 'teacher__username')
+    facets['teacher'] = [
+        (teacher_id, f"{first_name} {last_name}".strip() or username, count)
+        for teacher_id, first_name, last_name, username, count in teachers
+    ]
+    return facets
+
+
+def catalog_facets():
+    facets = cache.get(CATALOG_FACET_CACHE_KEY)
+    if facets is None:
+        facets = build_catalog_facets()
+        cache.set(CATALOG_FACET_CACHE_KEY, facets, CATALOG_FACET_CACHE_TIMEOUT)
+    return facets
+
+
+def course_catalog(student, params, page_number=None):
+    filters = catalog_filters(params)
+    page = Paginator(catalog_courses(student, filters), CATALOG_PAGE_SIZE).get_page(page_number)
+    return CatalogPage(page, catalog_facets(), filters)
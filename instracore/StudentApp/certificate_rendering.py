@@ -0,0 +1,118 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import os
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from StudentApp.models import Certificate
+from instracore.pdf import PDFDocument, A4_LANDSCAPE
+
+
+CERTIFICATE_TEMPLATE = 'StudentApp/certificate.txt'
+# Bump whenever the template or layout changes so cached PDFs are rendered again
+CERTIFICATE_TEMPLATE_VERSION = 1
+
+CERTIFICATE_FIELDS = (
+    'certificate_number', 'certificate_type', 'issue_date',
+    'student__username', 'student__first_name', 'student__last_name', 'course__title',
+)
+
+RenderResult = namedtuple('RenderResult', 'rendered cached')
+
+
+def certificate_cache_dir(version=CERTIFICATE_TEMPLATE_VERSION):
+    return os.path.join(settings.MEDIA_ROOT, 'certificates', f'v{version}')
+
+
+def _file_name(certificate_number):
+    return f"{certificate_number}.pdf"
+
+
+def render_certificate_pdf(row):
+    full_name = f"{row['student__first_name']} {row['student__last_name']}".strip()
+    text = render_to_string(CERTIFICATE_TEMPLATE, {
+        'student_name': full_name or row['student__username'],
+        'course_title': row['course__title'],
+        'certificate_type': dict(Certificate.TYPE_CHOICES).get(row['certificate_type'], ''),
+        'issue_date': row['issue_date'],
+        'certificate_number': row['certificate_number'],
+    })
+
+    document = PDFDocument(A4_LANDSCAPE, title=f"Certificate {row['certificate_number']}")
+    y = 470
+    for line in text.strip().splitlines():
+        # "# " and "## " mark heading lines in the template
+        if line.startswith('# '):
+            document.centered_text(y, line[2:], size=32, font='bold')
+            y -= 48
+        elif line.startswith('## '):
+            document.centered_text(y, line[3:], size=22, font='bold')
+            y -= 34
+        elif line.strip():
+            document.centered_text(y, line.strip(), size=15)
+            y -= 26
+        else:
+            y -= 18
+    return document.render()
+
+
+def _write_certificate(row, cache_dir):
+    path = os.path.join(cache_dir, _file_name(row['certificate_number']))
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(render_certificate_pdf(row))
+    # Readers only ever see complete files
+    os.replace(temp_path, path)
+    return path
+
+
+def _render_chunk(rows, cache_dir):
+    for row in rows:
+        _write_certificate(row, cache_dir)
+    return len(rows)
+
+
+def _init_worker():
+    # Spawned workers start without Django configured; forked ones inherit it
+    if not apps.ready:
+        django.setup()
+
+
+def render_certificates(certificates=None, workers=None, force=False, chunk_size=100):
+    if certificates is None:
+        certificates = Certificate.objects.filter(status='issued')
+    cache_dir = certificate_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+
+    cached_files = set() if force else set(os.listdir(cache_dir))
+    rows = []
+    cached = 0
+    for row in certificates.exclude(certificate_number='').values(*CERTIFICATE_FIELDS).iterator(chunk_size=2000):
+        if _file_name(row['certificate_number']) in cached_files:
+            cached += 1
+        else:
+            rows.append(row)
+
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    if len(chunks) <= 1:
+        # Not worth starting a process pool for a single chunk
+        rendered = sum(_render_chunk(chunk, cache_dir) for chunk in chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            rendered = sum(executor.map(_render_chunk, chunks, repeat(cache_dir)))
+    return RenderResult(rendered, cached)
+
+
+def certificate_pdf_path(certificate):
+    # Cached PDF for one certificate, rendered on first request; None when
+    # there is nothing to serve (no number allocated yet, or rendering failed)
+    if not certificate.certificate_number:
+        return None
+    path = os.path.join(certificate_cache_dir(), _file_name(certificate.certificate_number))
+    if not os.path.exists(path):
+        render_certificates(Certificate.objects.filter(pk=certificate.pk))
+    return path if os.path.exists(path) else None
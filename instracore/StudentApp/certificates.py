@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, F
+from django.utils import timezone
+
+from AuthApp.models import Notification, AuditLog
+from EmployeeApp.models import Course
+from StudentApp.models import Enrollment, Certificate, CertificateSequence
+
+
+def certificate_type_for(course_type):
+    # Certificate type follows the course type
+    if course_type == 'online':
+        return 'online'
+    elif course_type == 'diploma':
+        return 'diploma'
+    return 'offline'
+
+
+def allocate_certificate_numbers(count, year=None):
+    # Reserve a block of numbers with one conditional UPDATE on the year's
+    # sequence row, so concurrent batches never hand out the same number
+    year = year or timezone.now().year
+    with transaction.atomic():
+        CertificateSequence.objects.get_or_create(year=year)
+        CertificateSequence.objects.filter(year=year).update(last_number=F('last_number') + count)
+        last_number = CertificateSequence.objects.get(year=year).last_number
+    return [f"IC-{year}-{number:06d}" for number in range(last_number - count + 1, last_number + 1)]
+
+
+def generate_certificate_number():
+    return allocate_certificate_numbers(1)[0]
+
+
+def pending_certificate_enrollments(student=None):
+    # Completed enrollments without a certificate, as a single NOT EXISTS anti-join
+    has_certificate = Certificate.objects.filter(
+        student_id=OuterRef('student_id'),
+        course_id=OuterRef('course_id'),
+    )
+    enrollments = Enrollment.objects.filter(status='completed').filter(~Exists(has_certificate))
+    if student is not None:
+        enrollments = enrollments.filter(student=student)
+    return enrollments
+
+
+def courses_without_certificate(student):
+    has_certificate = Certificate.objects.filter(student=student, course_id=OuterRef('pk'))
+    return Course.objects.filter(
+        enrollments__student=student,
+        enrollments__status='completed',
+    ).filter(~Exists(has_certificate))
+
+
+def issue_pending_certificates(issued_by=None, batch_size=500):
+    today = timezone.now().date()
+    pending = pending_certificate_enrollments().values_list(
+        'student_id', 'course_id', 'course__title', 'course__course_type'
+    ).order_by('id')
+
+    # Issued rows drop out of the anti-join, so keep taking the first batch until none are left
+    issued = 0
+    while True:
+        batch = list(pending[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            numbers = allocate_certificate_numbers(len(batch))
+            Certificate.objects.bulk_create([
+                Certificate(
+                    student_id=student_id,
+                    course_id=course_id,
+                    certificate_type=certificate_type_for(course_type),
+                    status='issued',
+                    issue_date=today,
+                    certificate_number=number,
+                )
+                for (student_id, course_id, course_title, course_type), number in zip(batch, numbers)
+            ])
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=student_id,
+                    message=f"Your certificate for {course_title} has been issued",
+                )
+                for student_id, course_id, course_title, course_type in batch
+            ])
+        issued += len(batch)
+
+    if issued:
+        AuditLog.objects.create(
+            user=issued_by,
+            action=f"Issued {issued} pending certificates",
+            model_name="Certificate",
+            object_id="bulk"
+        )
+    return issued
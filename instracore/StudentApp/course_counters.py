@@ -0,0 +1,83 @@
+from collections import defaultdict, namedtuple
+
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from EmployeeApp.models import Course, CourseTeacher
+from StudentApp.models import Enrollment, WaitlistEntry
+
+
+ENROLLMENT_COUNTERS = {status: f'enrollments_{status}' for status, label in Enrollment.STATUS_CHOICES}
+COUNTER_FIELDS = tuple(ENROLLMENT_COUNTERS.values()) + ('teacher_count', 'waitlist_count')
+
+CounterMismatch = namedtuple('CounterMismatch', 'course_id field stored actual')
+
+
+def shift_counters(course_id, **deltas):
+    # One UPDATE with F() arithmetic; decrements stop at zero so a counter
+    # that has drifted cannot break the column's non-negative constraint
+    updates = {
+        field: F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items() if delta
+    }
+    if updates:
+        Course.objects.filter(pk=course_id).update(**updates)
+
+
+def enrollment_count_change(previous, enrollment):
+    # previous is the (course id, status) the enrollment had, or None
+    if previous == (enrollment.course_id, enrollment.status):
+        return
+    if previous is None or previous[0] == enrollment.course_id:
+        deltas = defaultdict(int)
+        if previous:
+            deltas[ENROLLMENT_COUNTERS[previous[1]]] -= 1
+        deltas[ENROLLMENT_COUNTERS[enrollment.status]] += 1
+        shift_counters(enrollment.course_id, **deltas)
+    else:
+        shift_counters(previous[0], **{ENROLLMENT_COUNTERS[previous[1]]: -1})
+        shift_counters(enrollment.course_id, **{ENROLLMENT_COUNTERS[enrollment.status]: 1})
+
+
+def count_course_rows(course_ids=None):
+    # {course id: {counter field: actual count}} from three grouped queries
+    actual = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    enrollments = Enrollment.objects.all()
+    teachers = CourseTeacher.objects.all()
+    waitlist = WaitlistEntry.objects.all()
+    if course_ids is not None:
+        enrollments = enrollments.filter(course_id__in=course_ids)
+        teachers = teachers.filter(course_id__in=course_ids)
+        waitlist = waitlist.filter(course_id__in=course_ids)
+
+    for course_id, status, count in enrollments.values_list('course_id', 'status').annotate(count=Count('id')).order_by():
+        actual[course_id][ENROLLMENT_COUNTERS[status]] = count
+    for course_id, count in teachers.values_list('course_id').annotate(count=Count('id')).order_by():
+        actual[course_id]['teacher_count'] = count
+    for course_id, count in waitlist.values_list('course_id').annotate(count=Count('id')).order_by():
+        actual[course_id]['waitlist_count'] = count
+    return actual
+
+
+def check_course_counters(course_ids=None, fix=False):
+    # Compare the stored counters with real counts; fix rewrites the wrong ones
+    actual = count_course_rows(course_ids)
+    courses = Course.objects.all()
+    if course_ids is not None:
+        courses = courses.filter(pk__in=course_ids)
+
+    mismatches = []
+    empty = dict.fromkeys(COUNTER_FIELDS, 0)
+    for course_id, *stored in courses.order_by('pk').values_list('pk', *COUNTER_FIELDS).iterator(chunk_size=2000):
+        counts = actual.get(course_id, empty)
+        wrong = {
+            field: counts[field]
+            for field, value in zip(COUNTER_FIELDS, stored) if value != counts[field]
+        }
+        mismatches.extend(
+            CounterMismatch(course_id, field, value, counts[field])
+            for field, value in zip(COUNTER_FIELDS, stored) if field in wrong
+        )
+        if fix and wrong:
+            Course.objects.filter(pk=course_id).update(**wrong)
+    return mismatches
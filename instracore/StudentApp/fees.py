@@ -0,0 +1,53 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from AuthApp.models import Notification, AuditLog
+from StudentApp.models import FeePayment
+
+
+UNPAID_STATUSES = ('pending', 'overdue')
+
+
+def sweep_overdue_fees(today=None, chunk_size=1000):
+    # Move past-due pending payments to overdue in chunked UPDATEs driven by
+    # the (status, due_date) index. Safe to re-run: nothing matches twice.
+    today = today or timezone.now().date()
+    past_due = FeePayment.objects.filter(status='pending', due_date__lt=today).order_by('due_date', 'id')
+
+    swept = 0
+    per_student = defaultdict(lambda: [0, Decimal('0')])
+    while True:
+        rows = list(past_due.values_list('id', 'enrollment__student_id', 'amount')[:chunk_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            # Re-check the status so payments settled meanwhile are left alone
+            updated_ids = set(FeePayment.objects.select_for_update().filter(
+                id__in=[row[0] for row in rows], status='pending'
+            ).values_list('id', flat=True))
+            FeePayment.objects.filter(id__in=updated_ids).update(status='overdue')
+        for payment_id, student_id, amount in rows:
+            if payment_id in updated_ids:
+                per_student[student_id][0] += 1
+                per_student[student_id][1] += amount
+        swept += len(updated_ids)
+
+    if swept:
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=student_id,
+                message=f"{count} fee payment{'s' if count > 1 else ''} totalling {total} "
+                        f"{'are' if count > 1 else 'is'} now overdue",
+            )
+            for student_id, (count, total) in per_student.items()
+        ], batch_size=1000)
+        AuditLog.objects.create(
+            user=None,
+            action=f"Marked {swept} fee payments overdue for {len(per_student)} students",
+            model_name="FeePayment",
+            object_id="bulk"
+        )
+    return swept
@@ -0,0 +1,133 @@
+from array import array
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+
+from StudentApp.models import Enrollment
+
+
+# Kept until an ExamResult of the course changes; the timeout is only a safety net
+GRADEBOOK_CACHE_TIMEOUT = getattr(settings, 'GRADEBOOK_CACHE_TIMEOUT', 24 * 60 * 60)
+
+GRADEBOOK_STATUSES = ('approved', 'ongoing', 'completed')
+
+MISSING = math.nan
+
+
+def _cache_key(course_id):
+    return f"gradebook:{course_id}"
+
+
+class GradebookMatrix:
+    # Students x exams percentages in one flat array of doubles (NaN where a
+    # student has no result), with per-student and per-exam summaries
+
+    def __init__(self, course_id, students, exams, scores):
+        self.course_id = course_id
+        self.students = students  # [(enrollment id, student id, display name)]
+        self.exams = exams  # exam names, alphabetical
+        self.scores = scores
+        self.averages = array('d', [MISSING] * len(students))
+        self.ranks = array('l', [0] * len(students))
+        self.exam_statistics = []
+        self._summarize()
+
+    def _summarize(self):
+        width = len(self.exams)
+        for row in range(len(self.students)):
+            values = [value for value in self.scores[row * width:(row + 1) * width] if not math.isnan(value)]
+            if values:
+                self.averages[row] = sum(values) / len(values)
+
+        # Competition ranking on the average: equal averages share a rank
+        ranked = sorted(
+            (row for row in range(len(self.students)) if not math.isnan(self.averages[row])),
+            key=lambda row: -self.averages[row]
+        )
+        for position, row in enumerate(ranked):
+            previous = ranked[position - 1] if position else None
+            if previous is not None and self.averages[previous] == self.averages[row]:
+                self.ranks[row] = self.ranks[previous]
+            else:
+                self.ranks[row] = position + 1
+
+        for column, exam_name in enumerate(self.exams):
+            values = sorted(value for value in self.scores[column::width] if not math.isnan(value))
+            count = len(values)
+            middle = count // 2
+            self.exam_statistics.append({
+                'exam_name': exam_name,
+                'count': count,
+                'mean': round(sum(values) / count, 2) if count else None,
+                'median': round(values[middle] if count % 2 else (values[middle - 1] + values[middle]) / 2, 2) if count else None,
+                'minimum': round(values[0], 2) if count else None,
+                'maximum': round(values[-1], 2) if count else None,
+            })
+
+    def rows(self):
+        # (student name, [percentage or None per exam], average, rank) for templates
+        width = len(self.exams)
+        for row, (enrollment_id, student_id, name) in enumerate(self.students):
+            cells = [None if math.isnan(value) else round(value, 2) for value in self.scores[row * width:(row + 1) * width]]
+            average = self.averages[row]
+            yield name, cells, None if math.isnan(average) else round(average, 2), self.ranks[row] or None
+
+    def as_dict(self):
+        return {
+            'course_id': self.course_id,
+            'exams': self.exams,
+            'students': [
+                {
+                    'enrollment_id': enrollment_id,
+                    'student_id': student_id,
+                    'name': name,
+                    'scores': cells,
+                    'average': average,
+                    'rank': rank,
+                }
+                for (enrollment_id, student_id, _), (name, cells, average, rank) in zip(self.students, self.rows())
+            ],
+            'exam_statistics': self.exam_statistics,
+        }
+
+
+def build_gradebook(course_id):
+    # Every enrolled student and their results in one LEFT JOIN query
+    rows = Enrollment.objects.filter(
+        course_id=course_id, status__in=GRADEBOOK_STATUSES
+    ).order_by('student__username', 'results__created_at').values_list(
+        'id', 'student_id', 'student__username', 'student__first_name', 'student__last_name',
+        'results__exam_name', 'results__marks_obtained', 'results__total_marks',
+    )
+
+    students, student_index = [], {}
+    cells = []
+    for enrollment_id, student_id, username, first_name, last_name, exam_name, obtained, total in rows:
+        if enrollment_id not in student_index:
+            student_index[enrollment_id] = len(students)
+            students.append((enrollment_id, student_id, f"{first_name} {last_name}".strip() or username))
+        if exam_name is not None:
+            percentage = float(obtained) / float(total) * 100 if total else 0.0
+            cells.append((student_index[enrollment_id], exam_name, percentage))
+
+    exams = sorted({exam_name for row, exam_name, percentage in cells}, key=str.lower)
+    exam_index = {exam_name: column for column, exam_name in enumerate(exams)}
+    scores = array('d', [MISSING]) * (len(students) * len(exams))
+    for row, exam_name, percentage in cells:
+        # Rows arrive oldest first, so a repeated exam keeps its latest result
+        scores[row * len(exams) + exam_index[exam_name]] = percentage
+    return GradebookMatrix(course_id, students, exams, scores)
+
+
+def course_gradebook(course_id):
+    key = _cache_key(course_id)
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = build_gradebook(course_id)
+        cache.set(key, matrix, GRADEBOOK_CACHE_TIMEOUT)
+    return matrix
+
+
+def invalidate_gradebook(course_id):
+    cache.delete(_cache_key(course_id))
@@ -0,0 +1,192 @@
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+import csv
+import math
+
+from django.conf import settings
+from django.db import transaction
+
+from AuthApp.models import AuditLog
+from StudentApp.academic_summary import rebuild_summaries
+from StudentApp.gradebook import invalidate_gradebook
+from StudentApp.models import Enrollment, ExamResult, ExamStatistics
+
+
+# (minimum percentage, grade), checked from the top down
+GRADE_BOUNDARIES = getattr(settings, 'EXAM_GRADE_BOUNDARIES', (
+    (80, 'A+'), (70, 'A'), (60, 'A-'), (50, 'B'), (40, 'C'), (33, 'D'), (0, 'F'),
+))
+PASS_PERCENTAGE = getattr(settings, 'EXAM_PASS_PERCENTAGE', 33)
+
+GRADEBOOK_ENROLLMENT_STATUSES = ('approved', 'ongoing', 'completed')
+
+GradedExam = namedtuple('GradedExam', 'grades passed statistics')
+GradebookResult = namedtuple('GradebookResult', 'created updated statistics errors')
+
+
+class GradebookError(Exception):
+    pass
+
+
+def _percentile(ordered, fraction):
+    # Linear interpolation between the closest ranks of an ascending list
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def grade_exam(marks, total_marks):
+    # Grade a whole exam at once. Marks are sorted a single time; the sorted
+    # order gives the grade bands in one walk and the order statistics for free.
+    total = float(total_marks)
+    count = len(marks)
+    order = sorted(range(count), key=lambda i: marks[i])
+    ascending = sorted(GRADE_BOUNDARIES)
+    grades = [''] * count
+    passed = [False] * count
+    distribution = {grade: 0 for minimum, grade in GRADE_BOUNDARIES}
+
+    ordered = []
+    band = 0
+    running_sum = running_squares = 0.0
+    pass_count = 0
+    for i in order:
+        value = float(marks[i])
+        percentage = value / total * 100 if total else 0
+        # Marks only go up, so the band pointer only moves forward
+        while band + 1 < len(ascending) and percentage >= ascending[band + 1][0]:
+            band += 1
+        grades[i] = ascending[band][1]
+        distribution[grades[i]] += 1
+        passed[i] = percentage >= PASS_PERCENTAGE
+        pass_count += passed[i]
+        running_sum += value
+        running_squares += value * value
+        ordered.append(value)
+
+    mean = running_sum / count if count else 0.0
+    variance = max(running_squares / count - mean * mean, 0.0) if count else 0.0
+    statistics = {
+        'student_count': count,
+        'pass_count': pass_count,
+        'mean': round(mean, 2),
+        'median': round(_percentile(ordered, 0.5), 2),
+        'std_dev': round(math.sqrt(variance), 2),
+        'minimum': ordered[0] if ordered else 0.0,
+        'maximum': ordered[-1] if ordered else 0.0,
+        'percentile_25': round(_percentile(ordered, 0.25), 2),
+        'percentile_75': round(_percentile(ordered, 0.75), 2),
+        'percentile_90': round(_percentile(ordered, 0.9), 2),
+        'grade_distribution': distribution,
+    }
+    return GradedExam(grades, passed, statistics)
+
+
+def parse_marks(value, total_marks):
+    try:
+        marks = Decimal(str(value).strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise GradebookError(f"'{value}' is not a number")
+    if marks < 0 or marks > total_marks:
+        raise GradebookError(f"{marks} is outside 0-{total_marks}")
+    return marks
+
+
+def marks_from_csv(csv_file, course, total_marks):
+    # {enrollment id: (marks, remarks)} for a CSV with username or enrollment_id
+    # and marks columns, plus [(line, error)] for rows that could not be used
+    enrollments = dict(Enrollment.objects.filter(
+        course=course, status__in=GRADEBOOK_ENROLLMENT_STATUSES
+    ).values_list('student__username', 'id'))
+    enrollment_ids = set(enrollments.values())
+
+    marks, errors = {}, []
+    for line, row in enumerate(csv.DictReader(csv_file), start=2):
+        row = {(name or '').strip().lower(): (value or '').strip() for name, value in row.items()}
+        if row.get('enrollment_id', '').isdigit() and int(row['enrollment_id']) in enrollment_ids:
+            enrollment_id = int(row['enrollment_id'])
+        elif row.get('username') in enrollments:
+            enrollment_id = enrollments[row['username']]
+        else:
+            errors.append((line, 'student is not enrolled in this course'))
+            continue
+        if not row.get('marks'):
+            continue
+        try:
+            marks[enrollment_id] = (parse_marks(row['marks'], total_marks), row.get('remarks', ''))
+        except GradebookError as e:
+            errors.append((line, str(e)))
+    return marks, errors
+
+
+def record_exam_marks(course, exam_name, total_marks, marks, recorded_by=None):
+    # Store marks for one exam of a course. marks maps enrollment id to
+    # (marks obtained, remarks); students not in it keep their earlier result.
+    valid_ids = set(Enrollment.objects.filter(
+        course=course, id__in=marks.keys()
+    ).values_list('id', flat=True))
+    errors = [f"Enrollment {enrollment_id} is not in {course.title}" for enrollment_id in marks.keys() - valid_ids]
+
+    with transaction.atomic():
+        existing = {
+            result.enrollment_id: result
+            for result in ExamResult.objects.select_for_update().filter(
+                enrollment__course=course, exam_name=exam_name
+            ).only('id', 'enrollment_id', 'marks_obtained', 'total_marks', 'remarks')
+        }
+        results, new_results = [], []
+        over_total = 0
+        for enrollment_id, result in existing.items():
+            if enrollment_id in valid_ids:
+                result.marks_obtained, remarks = marks[enrollment_id]
+                result.remarks = remarks or result.remarks
+            elif result.marks_obtained > total_marks:
+                over_total += 1
+            result.total_marks = total_marks
+            results.append(result)
+        # Results not re-entered keep their marks, which must fit the new total
+        if over_total:
+            raise GradebookError(
+                f"{over_total} earlier {exam_name} results are above {total_marks} marks; "
+                f"re-enter them or keep the total"
+            )
+        for enrollment_id in valid_ids - existing.keys():
+            obtained, remarks = marks[enrollment_id]
+            result = ExamResult(
+                enrollment_id=enrollment_id, exam_name=exam_name,
+                marks_obtained=obtained, total_marks=total_marks, remarks=remarks
+            )
+            results.append(result)
+            new_results.append(result)
+
+        graded = grade_exam([result.marks_obtained for result in results], total_marks)
+        for result, grade, passed in zip(results, graded.grades, graded.passed):
+            result.grade = grade
+            result.passed = passed
+
+        updated = [result for result in results if result.pk]
+        ExamResult.objects.bulk_update(
+            updated, ['marks_obtained', 'total_marks', 'grade', 'passed', 'remarks'], batch_size=500
+        )
+        ExamResult.objects.bulk_create(new_results, batch_size=1000)
+
+        statistics, created = ExamStatistics.objects.update_or_create(
+            course=course, exam_name=exam_name,
+            defaults=dict(graded.statistics, total_marks=total_marks)
+        )
+
+        # bulk_create and bulk_update send no signals
+        student_ids = list(Enrollment.objects.filter(id__in=existing.keys() | valid_ids).values_list('student_id', flat=True))
+        transaction.on_commit(lambda: invalidate_gradebook(course.pk))
+        transaction.on_commit(lambda: rebuild_summaries(student_ids))
+
+        AuditLog.objects.create(
+            user=recorded_by,
+            action=f"Recorded {exam_name} marks for {len(valid_ids)} students in {course.title}",
+            model_name="ExamResult",
+            object_id="bulk"
+        )
+    return GradebookResult(len(new_results), len(updated), statistics, errors)
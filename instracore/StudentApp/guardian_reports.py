@@ -0,0 +1,187 @@
+from calendar import monthrange
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from AdminApp.working_days import working_days_between
+from AuthApp.models import User, AuditLog
+from AuthApp.mail import enqueue_emails
+from EmployeeApp.models import Attendance
+from StudentApp.models import ExamResult, FeePayment, GuardianReport
+
+
+REPORT_TYPES = ('monthly', 'results', 'payments', 'attendance')
+
+REPORT_TEMPLATES = {
+    report_type: f'StudentApp/guardian_reports/{report_type}.txt' for report_type in REPORT_TYPES
+}
+
+
+def month_bounds(period):
+    start = period.replace(day=1)
+    end = start.replace(day=monthrange(start.year, start.month)[1])
+    return start, end
+
+
+def _attendance_by_student(start, end):
+    rows = Attendance.objects.filter(
+        user__role='student', date__gte=start, date__lte=end
+    ).values('user_id').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(status='present')),
+        absent=Count('id', filter=Q(status='absent')),
+        leave=Count('id', filter=Q(status='leave')),
+        late=Count('id', filter=Q(status='late')),
+    )
+    # Rates are measured against the period's working days, so days without
+    # any record count as missed
+    working_days = working_days_between(start, end)
+    stats = {}
+    for row in rows:
+        expected = working_days or row['total']
+        row['rate'] = row['present'] / expected * 100 if expected else 0
+        stats[row.pop('user_id')] = row
+    return stats
+
+
+def _results_by_student(start, end):
+    start_at = timezone.make_aware(datetime.combine(start, time.min))
+    end_at = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    rows = ExamResult.objects.filter(
+        created_at__gte=start_at, created_at__lt=end_at
+    ).order_by('created_at').values_list(
+        'enrollment__student_id', 'enrollment__course__title', 'exam_name',
+        'marks_obtained', 'total_marks', 'grade', 'passed',
+    )
+    results = defaultdict(list)
+    for student_id, course, exam, marks_obtained, total_marks, grade, passed in rows.iterator(chunk_size=5000):
+        results[student_id].append({
+            'course': course,
+            'exam': exam,
+            'marks_obtained': marks_obtained,
+            'total_marks': total_marks,
+            'grade': grade,
+            'passed': passed,
+        })
+    return results
+
+
+def _payments_by_student(start, end):
+    zero = Decimal('0')
+    rows = FeePayment.objects.filter(
+        due_date__gte=start, due_date__lte=end
+    ).exclude(status='cancelled').values('enrollment__student_id').annotate(
+        due=Sum('amount'),
+        paid=Sum('amount', filter=Q(status='paid')),
+        outstanding=Sum('amount', filter=Q(status__in=['pending', 'overdue'])),
+        overdue=Sum('amount', filter=Q(status='overdue')),
+    )
+    return {
+        row['enrollment__student_id']: {
+            'due': row['due'] or zero,
+            'paid': row['paid'] or zero,
+            'outstanding': row['outstanding'] or zero,
+            'overdue': row['overdue'] or zero,
+        }
+        for row in rows
+    }
+
+
+def generate_guardian_reports(period, report_types=REPORT_TYPES, send_email=True, chunk_size=500, generated_by=None):
+    start, end = month_bounds(period)
+    report_types = [report_type for report_type in REPORT_TYPES if report_type in report_types]
+    templates = {report_type: get_template(REPORT_TEMPLATES[report_type]) for report_type in report_types}
+
+    # A handful of grouped queries for the whole school instead of per-student loops
+    attendance = _attendance_by_student(start, end)
+    results = _results_by_student(start, end)
+    payments = _payments_by_student(start, end)
+    empty_attendance = {'total': 0, 'present': 0, 'absent': 0, 'leave': 0, 'late': 0, 'rate': 0}
+    empty_payments = {'due': Decimal('0'), 'paid': Decimal('0'), 'outstanding': Decimal('0'), 'overdue': Decimal('0')}
+
+    # Re-running a period only fills in reports that are missing
+    already_sent = set(GuardianReport.objects.filter(
+        period=start, report_type__in=report_types
+    ).values_list('student_id', 'report_type'))
+
+    students = User.objects.filter(role='student', is_active=True).exclude(guardian_email='').order_by('id').values_list(
+        'id', 'username', 'first_name', 'last_name', 'guardian_email'
+    )
+
+    created = 0
+    batch = []
+
+    def flush():
+        # The unique constraint rejects reports a concurrent run already made;
+        # those are dropped and the rest inserted again, so each report is
+        # created and mailed once and the count covers only this run's rows
+        reports = list(batch)
+        batch.clear()
+        while True:
+            try:
+                with transaction.atomic():
+                    GuardianReport.objects.bulk_create(reports)
+            except IntegrityError:
+                taken = set(GuardianReport.objects.filter(
+                    period=start, report_type__in=report_types,
+                    student_id__in={report.student_id for report in reports},
+                ).values_list('student_id', 'report_type'))
+                reports = [report for report in reports if (report.student_id, report.report_type) not in taken]
+                continue
+            break
+        if send_email:
+            queue_guardian_report_emails(reports)
+        return len(reports)
+
+    for student_id, username, first_name, last_name, guardian_email in students.iterator(chunk_size=chunk_size):
+        student_name = f"{first_name} {last_name}".strip() or username
+        student_results = results.get(student_id, [])
+        context = {
+            'student_name': student_name,
+            'period': start,
+            'attendance': attendance.get(student_id, empty_attendance),
+            'results': student_results,
+            'passed_exams': sum(1 for result in student_results if result['passed']),
+            'payments': payments.get(student_id, empty_payments),
+        }
+        for report_type in report_types:
+            if (student_id, report_type) in already_sent:
+                continue
+            batch.append(GuardianReport(
+                student_id=student_id,
+                report_type=report_type,
+                period=start,
+                content=templates[report_type].render(context).strip(),
+                sent_to=guardian_email,
+            ))
+        if len(batch) >= chunk_size:
+            created += flush()
+    if batch:
+        created += flush()
+
+    if created:
+        AuditLog.objects.create(
+            user=generated_by,
+            action=f"Generated {created} guardian reports for {start.strftime('%B %Y')}",
+            model_name="GuardianReport",
+            object_id="bulk"
+        )
+    return created
+
+
+def queue_guardian_report_emails(reports):
+    labels = dict(GuardianReport.REPORT_TYPE_CHOICES)
+    return enqueue_emails([
+        {
+            'to_email': report.sent_to,
+            'subject': f"{labels[report.report_type]} - {report.period.strftime('%B %Y')}",
+            'body': report.content,
+            'dedupe_key': f"guardian-report:{report.student_id}:{report.report_type}:{report.period.isoformat()}",
+        }
+        for report in reports
+    ])
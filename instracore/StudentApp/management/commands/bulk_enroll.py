@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from EmployeeApp.models import Course
+from StudentApp.bulk_enrollment import enroll_students, promote_completed, resolve_students, students_from_csv
+from StudentApp.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = 'Enroll many students in a course, or promote everyone who completed another course'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, required=True, help='Course to enroll into')
+        parser.add_argument('--csv', help='CSV with a username, email or student_id column')
+        parser.add_argument('--students', help='Comma separated usernames')
+        parser.add_argument('--promote-from', type=int, help='Enroll every student who completed this course')
+        parser.add_argument(
+            '--status', default='approved', choices=[value for value, label in Enrollment.STATUS_CHOICES],
+            help='Status of the new enrollments'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(pk=options['course'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course']} does not exist")
+
+        if options['promote_from']:
+            try:
+                from_course = Course.objects.get(pk=options['promote_from'])
+            except Course.DoesNotExist:
+                raise CommandError(f"Course {options['promote_from']} does not exist")
+            result = promote_completed(from_course, course, status=options['status'])
+            unknown = []
+        elif options['csv'] or options['students']:
+            if options['csv']:
+                with open(options['csv'], newline='', encoding='utf-8-sig') as f:
+                    student_ids, unknown = students_from_csv(f)
+            else:
+                student_ids, unknown = resolve_students(
+                    usernames=[name.strip() for name in options['students'].split(',') if name.strip()]
+                )
+            result = enroll_students(course, student_ids, status=options['status'])
+        else:
+            raise CommandError('Give --csv, --students or --promote-from')
+
+        for value in unknown:
+            self.stdout.write(self.style.WARNING(f"Unknown student: {value}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Enrolled {result.created} students in {course.title} ({result.skipped} already enrolled)"
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from StudentApp.course_counters import check_course_counters
+
+
+class Command(BaseCommand):
+    help = 'Compare the enrollment, teacher and waitlist counters on Course with real counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Only check these course ids')
+        parser.add_argument('--fix', action='store_true', help='Rewrite counters that are wrong')
+
+    def handle(self, *args, **options):
+        mismatches = check_course_counters(options['courses'], fix=options['fix'])
+        for mismatch in mismatches[:50]:
+            self.stdout.write(self.style.WARNING(
+                f"Course {mismatch.course_id}: {mismatch.field} is {mismatch.stored}, should be {mismatch.actual}"
+            ))
+        if len(mismatches) > 50:
+            self.stdout.write(self.style.WARNING(f"... and {len(mismatches) - 50} more"))
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("All course counters are correct"))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(mismatches)} course counters"))
+        else:
+            self.stdout.write(self.style.ERROR(f"{len(mismatches)} course counters are wrong; run with --fix to repair them"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from StudentApp.absentees import detect_absentees
+
+
+class Command(BaseCommand):
+    help = 'Find students with ongoing enrollments who were absent on a working day and alert teachers and guardians'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to check as YYYY-MM-DD (defaults to today)')
+        parser.add_argument('--no-notify', action='store_true', help='Only report the absentees')
+        parser.add_argument('--force', action='store_true', help='Alert again for a day that was already alerted')
+
+    def handle(self, *args, **options):
+        day = parse_date(options['date']) if options['date'] else timezone.now().date()
+        if not day:
+            raise CommandError('--date must be YYYY-MM-DD')
+
+        result = detect_absentees(day, notify=not options['no_notify'], force=options['force'])
+        for absentee in result.streaks:
+            self.stdout.write(f"{absentee.name}: absent {absentee.streak} working days in a row")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(result.absentees)} absentees on {day}, {len(result.streaks)} on a streak; "
+            f"{result.notified} teacher notifications, {result.emailed} guardian emails queued"
+        ))
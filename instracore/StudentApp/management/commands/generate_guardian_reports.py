@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from StudentApp.guardian_reports import generate_guardian_reports, REPORT_TYPES
+
+
+class Command(BaseCommand):
+    help = 'Generate guardian reports for every student for one month and queue them for email'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Month to report on as YYYY-MM (defaults to last month)')
+        parser.add_argument('--type', action='append', dest='types', choices=REPORT_TYPES,
+                            help='Report types to generate (defaults to all)')
+        parser.add_argument('--no-email', action='store_true', help='Store the reports without queueing emails')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['month']:
+            period = parse_date(options['month'] + '-01')
+            if not period:
+                raise CommandError('--month must be YYYY-MM')
+        else:
+            period = (timezone.now().date().replace(day=1) - timezone.timedelta(days=1)).replace(day=1)
+
+        created = generate_guardian_reports(
+            period,
+            report_types=options['types'] or REPORT_TYPES,
+            send_email=not options['no_email'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Generated {created} guardian reports for {period.strftime('%B %Y')}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from StudentApp.certificates import issue_pending_certificates
+
+
+class Command(BaseCommand):
+    help = 'Issue certificates for every completed enrollment that does not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        issued = issue_pending_certificates(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Issued {issued} certificates"))
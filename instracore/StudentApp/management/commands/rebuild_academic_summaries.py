@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from StudentApp.academic_summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute every student academic summary from attendance, results and enrollments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, action='append', dest='students', help='Only rebuild these student ids')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_summaries(options['students'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} academic summaries"))
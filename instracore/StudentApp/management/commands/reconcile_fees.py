@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from StudentApp.reconciliation import reconcile_fee_payments, ReconciliationError
+
+
+class Command(BaseCommand):
+    help = 'Match a bank or payment gateway CSV export against unpaid fee payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='CSV export to reconcile')
+        parser.add_argument('--report', help='Write unmatched lines to this CSV file for review')
+        parser.add_argument('--method', default='bank', help='Payment method for lines without one')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        report_file = open(options['report'], 'w', newline='') if options['report'] else None
+        try:
+            with open(options['statement'], newline='', encoding='utf-8-sig') as statement:
+                result = reconcile_fee_payments(
+                    statement,
+                    report_file=report_file,
+                    default_method=options['method'],
+                    chunk_size=options['chunk_size'],
+                )
+        except ReconciliationError as e:
+            raise CommandError(str(e))
+        finally:
+            if report_file:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {result.matched} fee payments "
+            f"({result.by_transaction_id} by transaction id, {result.by_reference} by student reference)"
+        ))
+        if result.unmatched:
+            self.stdout.write(self.style.WARNING(f"{result.unmatched} lines need review"))
+        if result.already_settled:
+            self.stdout.write(self.style.WARNING(f"{result.already_settled} lines matched fees that were already settled"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from StudentApp.models import Certificate
+from StudentApp.certificate_rendering import render_certificates
+
+
+class Command(BaseCommand):
+    help = 'Render PDF documents for issued certificates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', action='append', dest='numbers', help='Only render these certificate numbers')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (defaults to CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=100)
+        parser.add_argument('--force', action='store_true', help='Render again even if a cached PDF exists')
+
+    def handle(self, *args, **options):
+        certificates = Certificate.objects.filter(status='issued')
+        if options['numbers']:
+            certificates = certificates.filter(certificate_number__in=options['numbers'])
+
+        result = render_certificates(
+            certificates,
+            workers=options['workers'],
+            force=options['force'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {result.rendered} certificates ({result.cached} already cached)"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from StudentApp.fees import sweep_overdue_fees
+
+
+class Command(BaseCommand):
+    help = 'Mark pending fee payments past their due date as overdue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        swept = sweep_overdue_fees(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Marked {swept} fee payments overdue"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0002_certificatesequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guardianreport',
+            name='period',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0003_guardianreport_period'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feepayment',
+            index=models.Index(fields=['status', 'due_date'], name='StudentApp__status_dc2c45_idx'),
+        ),
+    ]
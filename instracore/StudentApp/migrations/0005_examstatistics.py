@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EmployeeApp', '0003_basesalary'),
+        ('StudentApp', '0004_feepayment_studentapp__status_dc2c45_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam_name', models.CharField(max_length=100)),
+                ('total_marks', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('student_count', models.PositiveIntegerField(default=0)),
+                ('pass_count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('median', models.FloatField(default=0)),
+                ('std_dev', models.FloatField(default=0)),
+                ('minimum', models.FloatField(default=0)),
+                ('maximum', models.FloatField(default=0)),
+                ('percentile_25', models.FloatField(default=0)),
+                ('percentile_75', models.FloatField(default=0)),
+                ('percentile_90', models.FloatField(default=0)),
+                ('grade_distribution', models.JSONField(blank=True, default=dict)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_statistics', to='EmployeeApp.course')),
+            ],
+            options={
+                'unique_together': {('course', 'exam_name')},
+            },
+        ),
+    ]
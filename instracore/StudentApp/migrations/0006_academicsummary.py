@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AuthApp', '0006_emailoutbox'),
+        ('StudentApp', '0005_examstatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AcademicSummary',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='academic_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('attendance_total', models.IntegerField(default=0)),
+                ('attendance_present', models.IntegerField(default=0)),
+                ('attendance_absent', models.IntegerField(default=0)),
+                ('attendance_leave', models.IntegerField(default=0)),
+                ('attendance_late', models.IntegerField(default=0)),
+                ('exams_total', models.IntegerField(default=0)),
+                ('exams_passed', models.IntegerField(default=0)),
+                ('exams_graded', models.IntegerField(default=0)),
+                ('marks_obtained_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('grade_points_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('enrollments_active', models.IntegerField(default=0)),
+                ('enrollments_completed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
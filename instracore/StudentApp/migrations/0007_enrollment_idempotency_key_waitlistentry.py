@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_seats_taken(apps, schema_editor):
+    Course = apps.get_model('EmployeeApp', 'Course')
+    Enrollment = apps.get_model('StudentApp', 'Enrollment')
+    seats = Enrollment.objects.filter(
+        course=OuterRef('pk'), status__in=('pending', 'approved', 'ongoing')
+    ).order_by().values('course').annotate(count=Count('id')).values('count')
+    Course.objects.update(seats_taken=Coalesce(Subquery(seats), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EmployeeApp', '0005_course_capacity_course_seats_taken'),
+        ('StudentApp', '0006_academicsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(blank=True, max_length=64, null=True, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='EmployeeApp.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'id'], name='StudentApp__course__f57cb9_idx')],
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.RunPython(count_seats_taken, migrations.RunPython.noop),
+    ]
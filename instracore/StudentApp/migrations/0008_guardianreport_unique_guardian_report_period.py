@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:43
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_reports(apps, schema_editor):
+    # Keep the first report of each (student, type, period) made by earlier runs
+    GuardianReport = apps.get_model('StudentApp', 'GuardianReport')
+    first_ids = GuardianReport.objects.filter(period__isnull=False).values(
+        'student', 'report_type', 'period'
+    ).order_by().annotate(first_id=Min('id')).values('first_id')
+    GuardianReport.objects.filter(period__isnull=False).exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0007_enrollment_idempotency_key_waitlistentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reports, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='guardianreport',
+            constraint=models.UniqueConstraint(fields=('student', 'report_type', 'period'), name='unique_guardian_report_period'),
+        ),
+    ]
@@ -19,11 +19,29 @@ class Enrollment(models.Model):
     fee_paid = models.BooleanField(default=False)
     enrolled_at = models.DateTimeField(auto_now_add=True)
     completion_date = models.DateField(blank=True, null=True)
+    idempotency_key = models.CharField(max_length=64, unique=True, blank=True, null=True)  # Set by the enroll form
     
     class Meta:
         unique_together = ('student', 'course')
 
 
+class WaitlistEntry(models.Model):
+    # Students waiting for a seat in a full course, served oldest first
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="waitlist_entries")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="waitlist")
+    idempotency_key = models.CharField(max_length=64, unique=True, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['course', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.username} waiting for {self.course.title}"
+
+
 class ExamResult(models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name="results")
     exam_name = models.CharField(max_length=100)
@@ -35,6 +53,68 @@ class ExamResult(models.Model):
     remarks = models.TextField(blank=True)
 
 
+class ExamStatistics(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="exam_statistics")
+    exam_name = models.CharField(max_length=100)
+    total_marks = models.DecimalField(max_digits=5, decimal_places=2)
+    student_count = models.PositiveIntegerField(default=0)
+    pass_count = models.PositiveIntegerField(default=0)
+    # Marks obtained, not percentages
+    mean = models.FloatField(default=0)
+    median = models.FloatField(default=0)
+    std_dev = models.FloatField(default=0)
+    minimum = models.FloatField(default=0)
+    maximum = models.FloatField(default=0)
+    percentile_25 = models.FloatField(default=0)
+    percentile_75 = models.FloatField(default=0)
+    percentile_90 = models.FloatField(default=0)
+    grade_distribution = models.JSONField(default=dict, blank=True)
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('course', 'exam_name')
+    
+    def __str__(self):
+        return f"{self.course.title} - {self.exam_name}"
+
+
+class AcademicSummary(models.Model):
+    # Denormalized per-student totals, kept current by signals (see academic_summary.py)
+    student = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="academic_summary")
+    attendance_total = models.IntegerField(default=0)
+    attendance_present = models.IntegerField(default=0)
+    attendance_absent = models.IntegerField(default=0)
+    attendance_leave = models.IntegerField(default=0)
+    attendance_late = models.IntegerField(default=0)
+    exams_total = models.IntegerField(default=0)
+    exams_passed = models.IntegerField(default=0)
+    exams_graded = models.IntegerField(default=0)
+    marks_obtained_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    grade_points_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    enrollments_active = models.IntegerField(default=0)
+    enrollments_completed = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def attendance_rate(self):
+        return self.attendance_present / self.attendance_total * 100 if self.attendance_total > 0 else 0
+    
+    @property
+    def pass_rate(self):
+        return self.exams_passed / self.exams_total * 100 if self.exams_total > 0 else 0
+    
+    @property
+    def average_marks(self):
+        return self.marks_obtained_sum / self.exams_total if self.exams_total > 0 else 0
+    
+    @property
+    def gpa(self):
+        return round(self.grade_points_sum / self.exams_graded, 2) if self.exams_graded > 0 else 0
+    
+    def __str__(self):
+        return f"{self.student.username} summary"
+
+
 class Certificate(models.Model):
     TYPE_CHOICES = [
         ('online', 'Online Course'),
@@ -70,10 +150,17 @@ class GuardianReport(models.Model):
     
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="guardian_reports")
     report_type = models.CharField(max_length=20, choices=REPORT_TYPE_CHOICES)
+    period = models.DateField(blank=True, null=True)  # First day of the reported month
     content = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
     sent_to = models.EmailField()  # Guardian's email
     is_read = models.BooleanField(default=False)
+    
+    class Meta:
+        constraints = [
+            # One report of each type per student and month, however often generation runs
+            models.UniqueConstraint(fields=['student', 'report_type', 'period'], name='unique_guardian_report_period'),
+        ]
 
 
 class FeePayment(models.Model):
@@ -91,4 +178,16 @@ class FeePayment(models.Model):
     paid_at = models.DateTimeField(blank=True, null=True)
     payment_method = models.CharField(max_length=50, blank=True)
     transaction_id = models.CharField(max_length=100, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'due_date']),
+        ]
+
+class CertificateSequence(models.Model):
+    year = models.PositiveIntegerField(unique=True)
+    last_number = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.year} - {self.last_number}"
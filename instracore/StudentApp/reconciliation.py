@@ -0,0 +1,233 @@
+from collections import defaultdict, deque, namedtuple
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+import csv
+import re
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from AuthApp.models import AuditLog
+from EmployeeApp.models import Transaction
+from StudentApp.fees import UNPAID_STATUSES
+from StudentApp.models import Enrollment, FeePayment
+
+
+# Header names accepted for each field, compared case-insensitively
+COLUMN_ALIASES = {
+    'transaction_id': ('transaction_id', 'transaction id', 'txn_id', 'reference_no', 'bank_reference'),
+    'amount': ('amount', 'credit', 'paid_amount'),
+    'reference': ('reference', 'student', 'student_reference', 'narration', 'description'),
+    'date': ('date', 'value_date', 'paid_at', 'transaction_date'),
+    'method': ('method', 'payment_method', 'channel'),
+}
+
+# Narration text is split on these to find a student username inside it
+REFERENCE_SEPARATORS = re.compile(r'[\s,;/|:]+')
+
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y')
+
+ReconciliationResult = namedtuple('ReconciliationResult', 'matched by_transaction_id by_reference unmatched already_settled')
+
+
+class ReconciliationError(Exception):
+    pass
+
+
+def _resolve_columns(fieldnames):
+    lookup = {name.strip().lower(): name for name in fieldnames or []}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        columns[field] = next((lookup[alias] for alias in aliases if alias in lookup), None)
+    if columns['amount'] is None or (columns['transaction_id'] is None and columns['reference'] is None):
+        raise ReconciliationError('The file needs an amount column and a transaction id or reference column')
+    return columns
+
+
+def _parse_amount(value):
+    try:
+        return Decimal((value or '').replace(',', '').strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def _parse_paid_at(value, default):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if len(value) <= 10:
+            parsed = datetime.combine(parsed.date(), time(12))
+        return timezone.make_aware(parsed)
+    return default
+
+
+class PaymentIndex:
+    # Hash indexes over the unpaid fee payments, built from a single query
+
+    def __init__(self):
+        self.by_transaction_id = {}
+        # (student username, amount) -> payment ids, oldest due date first
+        self.by_reference = defaultdict(deque)
+        # id -> (amount, enrollment id, student id, transaction id) of every payment still unmatched
+        self.payments = {}
+        self.matched = {}
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        rows = FeePayment.objects.filter(status__in=UNPAID_STATUSES).order_by('due_date', 'id').values_list(
+            'id', 'amount', 'transaction_id', 'enrollment_id', 'enrollment__student_id', 'enrollment__student__username'
+        )
+        for payment_id, amount, transaction_id, enrollment_id, student_id, username in rows.iterator(chunk_size=5000):
+            index.payments[payment_id] = (amount, enrollment_id, student_id, transaction_id)
+            if transaction_id:
+                index.by_transaction_id[transaction_id.strip().upper()] = payment_id
+            index.by_reference[(username.lower(), amount)].append(payment_id)
+        return index
+
+    def match(self, transaction_id, reference, amount):
+        # Returns (payment id, how it matched) and takes the payment out of the index
+        if transaction_id:
+            payment_id = self.by_transaction_id.get(transaction_id.upper())
+            if payment_id in self.payments and self.payments[payment_id][0] == amount:
+                return self._take(payment_id), 'transaction_id'
+        if reference:
+            # The whole reference first, then each word of a free-text narration
+            for token in [reference] + REFERENCE_SEPARATORS.split(reference):
+                candidates = self.by_reference.get((token.lower(), amount))
+                while candidates:
+                    payment_id = candidates.popleft()
+                    if payment_id in self.payments:
+                        return self._take(payment_id), 'reference'
+        return None, None
+
+    def _take(self, payment_id):
+        self.matched[payment_id] = self.payments.pop(payment_id)
+        return payment_id
+
+
+def reconcile_fee_payments(csv_file, report_file=None, default_method='bank', chunk_size=1000, reconciled_by=None):
+    # Stream a bank/gateway export, settle the matching unpaid FeePayments and
+    # write every line that could not be matched to report_file for review
+    reader = csv.DictReader(csv_file)
+    columns = _resolve_columns(reader.fieldnames)
+    index = PaymentIndex.build()
+
+    report = None
+    if report_file is not None:
+        report = csv.writer(report_file)
+        report.writerow(['line'] + list(reader.fieldnames) + ['reason'])
+
+    now = timezone.now()
+    seen_transaction_ids = set()
+    matched = {'transaction_id': 0, 'reference': 0}
+    unmatched = 0
+    already_settled = 0
+    enrollment_ids = set()
+    batch = []
+
+    def cell(row, field):
+        return (row.get(columns[field]) or '').strip() if columns[field] else ''
+
+    def write_review(line, row, reason):
+        if report:
+            report.writerow([line] + [row.get(name, '') for name in reader.fieldnames] + [reason])
+
+    def flush():
+        nonlocal already_settled
+        settled = _apply_matches([payment for payment, matched_by, line, row in batch], index)
+        for payment, matched_by, line, row in batch:
+            if payment.id in settled:
+                matched[matched_by] += 1
+                enrollment_ids.add(index.matched[payment.id][1])
+            else:
+                # Paid by someone else after the index was built
+                already_settled += 1
+                write_review(line, row, 'already settled')
+        batch.clear()
+
+    for line, row in enumerate(reader, start=2):
+        transaction_id = cell(row, 'transaction_id')
+        amount = _parse_amount(cell(row, 'amount'))
+        reason = None
+        if amount is None or amount <= 0:
+            reason = 'invalid amount'
+        elif transaction_id and transaction_id.upper() in seen_transaction_ids:
+            reason = 'duplicate transaction id in file'
+        else:
+            payment_id, matched_by = index.match(transaction_id, cell(row, 'reference'), amount)
+            if payment_id is None:
+                reason = 'no matching unpaid fee'
+            else:
+                batch.append((FeePayment(
+                    id=payment_id,
+                    status='paid',
+                    paid_at=_parse_paid_at(cell(row, 'date'), now),
+                    payment_method=(cell(row, 'method') or default_method)[:50],
+                    transaction_id=(transaction_id or index.matched[payment_id][3])[:100],
+                ), matched_by, line, row))
+        if transaction_id:
+            seen_transaction_ids.add(transaction_id.upper())
+
+        if reason:
+            unmatched += 1
+            write_review(line, row, reason)
+        if len(batch) >= chunk_size:
+            flush()
+    if batch:
+        flush()
+
+    _mark_enrollments_paid(enrollment_ids)
+
+    total = matched['transaction_id'] + matched['reference']
+    if total:
+        AuditLog.objects.create(
+            user=reconciled_by,
+            action=f"Reconciled {total} fee payments from a bank statement ({unmatched} lines unmatched, {already_settled} already settled)",
+            model_name="FeePayment",
+            object_id="bulk"
+        )
+    return ReconciliationResult(total, matched['transaction_id'], matched['reference'], unmatched, already_settled)
+
+
+def _apply_matches(payments, index):
+    with transaction.atomic():
+        # Payments settled by someone else since the index was built are left alone
+        still_unpaid = set(FeePayment.objects.select_for_update().filter(
+            id__in=[payment.id for payment in payments], status__in=UNPAID_STATUSES
+        ).values_list('id', flat=True))
+        payments = [payment for payment in payments if payment.id in still_unpaid]
+
+        # Statement lines share a handful of dates and methods, so one UPDATE per
+        # (paid_at, method) pair is far cheaper than a per-row CASE bulk_update
+        groups = defaultdict(list)
+        for payment in payments:
+            groups[(payment.paid_at, payment.payment_method)].append(payment.id)
+        for (paid_at, payment_method), ids in groups.items():
+            FeePayment.objects.filter(id__in=ids).update(status='paid', paid_at=paid_at, payment_method=payment_method)
+        new_transaction_ids = [
+            payment for payment in payments if payment.transaction_id != index.matched[payment.id][3]
+        ]
+        FeePayment.objects.bulk_update(new_transaction_ids, ['transaction_id'])
+
+        Transaction.objects.bulk_create([
+            Transaction(
+                user_id=index.matched[payment.id][2],
+                amount=index.matched[payment.id][0],
+                transaction_type='fee',
+                description=f"Fee payment {payment.transaction_id}".strip(),
+                date=timezone.localtime(payment.paid_at).date(),
+            )
+            for payment in payments
+        ])
+    return still_unpaid
+
+
+def _mark_enrollments_paid(enrollment_ids):
+    # Enrollments with nothing left to pay are flagged in one UPDATE
+    unpaid = FeePayment.objects.filter(enrollment=OuterRef('pk'), status__in=UNPAID_STATUSES)
+    return Enrollment.objects.filter(id__in=enrollment_ids, fee_paid=False).exclude(Exists(unpaid)).update(fee_paid=True)
@@ -0,0 +1,144 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from AdminApp.working_days import next_working_day
+from AuthApp.models import Notification, AuditLog
+from EmployeeApp.models import Course
+from StudentApp.models import Enrollment, FeePayment, WaitlistEntry
+
+
+# Enrollments in these statuses occupy one of the course's seats
+SEAT_HOLDING_STATUSES = ('pending', 'approved', 'ongoing')
+ENROLLMENT_FEE_DUE_DAYS = getattr(settings, 'ENROLLMENT_FEE_DUE_DAYS', 30)
+
+SeatRequest = namedtuple('SeatRequest', 'enrollment waitlist_entry created')
+
+
+def fee_due_date(today=None):
+    return next_working_day((today or timezone.now().date()) + timedelta(days=ENROLLMENT_FEE_DUE_DAYS))
+
+
+def claim_seat(course_id):
+    # One conditional UPDATE: the row lock it takes serializes concurrent
+    # claims, and the WHERE clause makes the last seat go to exactly one
+    return Course.objects.filter(
+        Q(capacity__isnull=True) | Q(seats_taken__lt=F('capacity')), pk=course_id
+    ).update(seats_taken=F('seats_taken') + 1) == 1
+
+
+def take_seat(course_id, count=1):
+    # Counts seats without checking capacity, for admin and bulk enrollments
+    Course.objects.filter(pk=course_id).update(seats_taken=F('seats_taken') + count)
+
+
+def release_seat(course_id):
+    Course.objects.filter(pk=course_id, seats_taken__gt=0).update(seats_taken=F('seats_taken') - 1)
+    transaction.on_commit(lambda: promote_waitlist(course_id))
+
+
+def enrollment_seat_change(previous, enrollment):
+    # Keep Course.seats_taken in step with an enrollment save; previous is the
+    # (course id, status) it had before, or None for a new enrollment
+    if previous is None and getattr(enrollment, '_seat_claimed', False):
+        return
+    held = previous is not None and previous[1] in SEAT_HOLDING_STATUSES
+    holds = enrollment.status in SEAT_HOLDING_STATUSES
+    moved = previous is not None and previous[0] != enrollment.course_id
+    if held and (moved or not holds):
+        release_seat(previous[0])
+    if holds and (moved or not held):
+        take_seat(enrollment.course_id)
+
+
+def _create_enrollment(student_id, course, idempotency_key=None, created_by=None):
+    enrollment = Enrollment(student_id=student_id, course=course, status='pending', idempotency_key=idempotency_key)
+    # The seat was claimed up front, so the post_save signal must not count it again
+    enrollment._seat_claimed = True
+    enrollment.save()
+    if course.price > 0:
+        FeePayment.objects.create(enrollment=enrollment, amount=course.price, due_date=fee_due_date())
+    AuditLog.objects.create(
+        user=created_by,
+        action=f"Enrolled in course: {course.title}",
+        model_name="Enrollment",
+        object_id=str(enrollment.id)
+    )
+    return enrollment
+
+
+def _existing_request(student, course, idempotency_key=None):
+    if idempotency_key:
+        enrollment = Enrollment.objects.filter(idempotency_key=idempotency_key, student=student).first()
+        if enrollment:
+            return SeatRequest(enrollment, None, False)
+    enrollment = Enrollment.objects.filter(student=student, course=course).first()
+    if enrollment:
+        return SeatRequest(enrollment, None, False)
+    entry = WaitlistEntry.objects.filter(student=student, course=course).first()
+    if entry:
+        return SeatRequest(None, entry, False)
+    return None
+
+
+def request_enrollment(student, course, idempotency_key=None):
+    # Enroll a student if a seat is free, otherwise put them on the waitlist.
+    # Re-submitting with the same idempotency key, or racing a duplicate
+    # submit, returns what the first submit made with created=False.
+    existing = _existing_request(student, course, idempotency_key)
+    if existing:
+        return existing
+    try:
+        with transaction.atomic():
+            if claim_seat(course.pk):
+                return SeatRequest(_create_enrollment(student.pk, course, idempotency_key, created_by=student), None, True)
+            entry = WaitlistEntry.objects.create(student=student, course=course, idempotency_key=idempotency_key)
+            return SeatRequest(None, entry, True)
+    except IntegrityError:
+        # A concurrent submit of the same request won; rolling back the
+        # savepoint also gave back the seat claimed above
+        existing = _existing_request(student, course, idempotency_key)
+        if existing is None:
+            raise
+        return existing
+
+
+def clear_waitlist(course_id, student_ids):
+    # Students who got a seat some other way no longer wait for one; deleted
+    # one by one so the waitlist counter signal sees each entry
+    return WaitlistEntry.objects.filter(course_id=course_id, student_id__in=student_ids).delete()[0]
+
+
+def waitlist_position(entry):
+    return WaitlistEntry.objects.filter(course_id=entry.course_id, id__lte=entry.id).count()
+
+
+def promote_waitlist(course_id):
+    # Give freed seats to waiting students, oldest entry first. Entries are
+    # claimed with SKIP LOCKED so concurrent promoters never serve one twice.
+    promoted = []
+    while True:
+        with transaction.atomic():
+            entry = WaitlistEntry.objects.select_for_update(skip_locked=True).filter(
+                course_id=course_id
+            ).select_related('course').order_by('id').first()
+            if entry is None:
+                break
+            if Enrollment.objects.filter(student_id=entry.student_id, course_id=course_id).exists():
+                entry.delete()
+                continue
+            if not claim_seat(course_id):
+                break
+            course = entry.course
+            enrollment = _create_enrollment(entry.student_id, course, entry.idempotency_key)
+            entry.delete()
+            Notification.objects.create(
+                user_id=entry.student_id,
+                message=f"A seat opened up in {course.title} and you have been enrolled from the waitlist"
+            )
+        promoted.append(enrollment)
+    return promoted
@@ -0,0 +1,189 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from EmployeeApp.models import Attendance, Course, CourseTeacher
+from StudentApp.academic_summary import (
+    apply_change, attendance_contribution, enrollment_contribution, exam_contribution
+)
+from StudentApp.gradebook import invalidate_gradebook
+from StudentApp.course_counters import ENROLLMENT_COUNTERS, enrollment_count_change, shift_counters
+from StudentApp.models import Certificate, Enrollment, ExamResult, WaitlistEntry
+from StudentApp.seats import SEAT_HOLDING_STATUSES, enrollment_seat_change, promote_waitlist, release_seat
+from StudentApp.verification import invalidate_certificate
+
+
+@receiver([post_save, post_delete], sender=Certificate)
+def refresh_certificate_verification(sender, instance, **kwargs):
+    invalidate_certificate(instance.certificate_number)
+
+
+@receiver([post_save, post_delete], sender=ExamResult)
+def refresh_gradebook_for_result(sender, instance, **kwargs):
+    course_id = Enrollment.objects.filter(pk=instance.enrollment_id).values_list('course_id', flat=True).first()
+    if course_id:
+        invalidate_gradebook(course_id)
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def refresh_gradebook_for_enrollment(sender, instance, **kwargs):
+    invalidate_gradebook(instance.course_id)
+
+
+# Academic summaries: pre_save remembers what a row contributed before the
+# change so post_save can apply the difference
+
+def _cached_role(attendance):
+    # Staff check-ins are Attendance rows too, but only students have
+    # summaries. The role is only read from an already loaded user: when it
+    # is not, apply_change's summary UPDATE matches nothing for staff.
+    if Attendance._meta.get_field('user').is_cached(attendance):
+        return attendance.user.role
+    return None
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance(sender, instance, **kwargs):
+    previous = Attendance.objects.filter(pk=instance.pk).values_list(
+        'user_id', 'status', 'user__role'
+    ).first() if instance.pk else None
+    role = _cached_role(instance)
+    if role is None and previous and previous[0] == instance.user_id:
+        role = previous[2]
+    instance._summary_previous = previous[:2] if previous and previous[2] == 'student' else None
+    instance._summary_skip = instance._summary_previous is None and role not in (None, 'student')
+
+
+@receiver(post_save, sender=Attendance)
+def summarize_attendance(sender, instance, **kwargs):
+    if getattr(instance, '_summary_skip', False):
+        return
+    previous = getattr(instance, '_summary_previous', None)
+    apply_change(
+        instance.user_id,
+        old=attendance_contribution(previous[1]) if previous else None,
+        new=attendance_contribution(instance.status),
+        old_student_id=previous[0] if previous else None,
+    )
+
+
+@receiver(post_delete, sender=Attendance)
+def unsummarize_attendance(sender, instance, **kwargs):
+    if _cached_role(instance) not in (None, 'student'):
+        return
+    apply_change(instance.user_id, old=attendance_contribution(instance.status))
+
+
+@receiver(pre_save, sender=ExamResult)
+def remember_exam_result(sender, instance, **kwargs):
+    instance._summary_previous = ExamResult.objects.filter(pk=instance.pk).values_list(
+        'enrollment__student_id', 'passed', 'marks_obtained', 'grade'
+    ).first() if instance.pk else None
+
+
+@receiver(post_save, sender=ExamResult)
+def summarize_exam_result(sender, instance, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    student_id = Enrollment.objects.filter(pk=instance.enrollment_id).values_list('student_id', flat=True).first()
+    apply_change(
+        student_id,
+        old=exam_contribution(*previous[1:]) if previous else None,
+        new=exam_contribution(instance.passed, instance.marks_obtained, instance.grade),
+        old_student_id=previous[0] if previous else None,
+    )
+
+
+@receiver(post_delete, sender=ExamResult)
+def unsummarize_exam_result(sender, instance, **kwargs):
+    student_id = Enrollment.objects.filter(pk=instance.enrollment_id).values_list('student_id', flat=True).first()
+    apply_change(student_id, old=exam_contribution(instance.passed, instance.marks_obtained, instance.grade))
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment(sender, instance, **kwargs):
+    previous = Enrollment.objects.filter(pk=instance.pk).values_list(
+        'student_id', 'status', 'course_id'
+    ).first() if instance.pk else None
+    instance._summary_previous = previous[:2] if previous else None
+    instance._course_previous = (previous[2], previous[1]) if previous else None
+
+
+@receiver(post_save, sender=Enrollment)
+def summarize_enrollment(sender, instance, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    apply_change(
+        instance.student_id,
+        old=enrollment_contribution(previous[1]) if previous else None,
+        new=enrollment_contribution(instance.status),
+        old_student_id=previous[0] if previous else None,
+    )
+
+
+@receiver(post_delete, sender=Enrollment)
+def unsummarize_enrollment(sender, instance, **kwargs):
+    apply_change(instance.student_id, old=enrollment_contribution(instance.status))
+
+
+# Course seats: counted on every enrollment save, and a freed seat goes to
+# the waitlist once the transaction commits
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment_seat(sender, instance, **kwargs):
+    enrollment_seat_change(getattr(instance, '_course_previous', None), instance)
+
+
+@receiver(post_delete, sender=Enrollment)
+def free_enrollment_seat(sender, instance, **kwargs):
+    if instance.status in SEAT_HOLDING_STATUSES:
+        release_seat(instance.course_id)
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_capacity(sender, instance, **kwargs):
+    instance._capacity_previous = Course.objects.filter(pk=instance.pk).values_list(
+        'capacity', flat=True
+    ).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Course)
+def fill_course_seats(sender, instance, created, **kwargs):
+    # Only a raised (or removed) capacity can free seats for the waitlist
+    previous = getattr(instance, '_capacity_previous', None)
+    if created or previous is None or instance.capacity == previous:
+        return
+    if instance.capacity is None or instance.capacity > previous:
+        transaction.on_commit(lambda: promote_waitlist(instance.pk))
+
+
+# Course counters
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, **kwargs):
+    enrollment_count_change(getattr(instance, '_course_previous', None), instance)
+
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    shift_counters(instance.course_id, **{ENROLLMENT_COUNTERS[instance.status]: -1})
+
+
+@receiver(post_save, sender=CourseTeacher)
+def count_course_teacher(sender, instance, created, **kwargs):
+    if created:
+        shift_counters(instance.course_id, teacher_count=1)
+
+
+@receiver(post_delete, sender=CourseTeacher)
+def uncount_course_teacher(sender, instance, **kwargs):
+    shift_counters(instance.course_id, teacher_count=-1)
+
+
+@receiver(post_save, sender=WaitlistEntry)
+def count_waitlist_entry(sender, instance, created, **kwargs):
+    if created:
+        shift_counters(instance.course_id, waitlist_count=1)
+
+
+@receiver(post_delete, sender=WaitlistEntry)
+def uncount_waitlist_entry(sender, instance, **kwargs):
+    shift_counters(instance.course_id, waitlist_count=-1)
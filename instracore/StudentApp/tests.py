@@ -1,3 +1,805 @@
-from django.test import TestCase
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+import io
+import os
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from AdminApp.working_days import invalidate_working_days
+from AuthApp.models import EmailOutbox, Notification, User
+from EmployeeApp.models import Attendance, Course, CourseTeacher
+from StudentApp import guardian_reports, verification
+from StudentApp.absentees import Absentee, detect_absentees, find_absentees
+from StudentApp.academic_summary import SUMMARY_FIELDS, rebuild_summaries
+from StudentApp.bulk_enrollment import enroll_students
+from StudentApp.catalog import (
+    CATALOG_PAGE_SIZE, build_catalog_facets, catalog_courses, catalog_facets, catalog_filters, course_catalog,
+)
+from StudentApp.certificate_rendering import certificate_cache_dir, certificate_pdf_path, render_certificates
+from StudentApp.certificates import (
+    allocate_certificate_numbers, courses_without_certificate, issue_pending_certificates,
+    pending_certificate_enrollments,
+)
+from StudentApp.course_counters import check_course_counters
+from StudentApp.fees import sweep_overdue_fees
+from StudentApp.gradebook import build_gradebook, course_gradebook
+from StudentApp.grading import GradebookError, grade_exam, marks_from_csv, record_exam_marks
+from StudentApp.models import (
+    AcademicSummary, Certificate, Enrollment, ExamResult, ExamStatistics, FeePayment, GuardianReport, WaitlistEntry,
+)
+from StudentApp.reconciliation import PaymentIndex, reconcile_fee_payments
+from StudentApp.seats import claim_seat, request_enrollment, waitlist_position
+
+
+def make_course(title='Course', capacity=None, price=0):
+    return Course.objects.create(
+        title=title, description='', course_type='online', duration='8 weeks',
+        status='active', capacity=capacity, price=price,
+    )
+
+
+def make_students(count, prefix='student'):
+    return [
+        User.objects.create(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', role='student')
+        for i in range(count)
+    ]
+
+
+class ReconciliationTests(TestCase):
+
+    def setUp(self):
+        course = make_course(price=100)
+        self.students = make_students(3)
+        self.payments = []
+        for student in self.students:
+            enrollment = Enrollment.objects.create(student=student, course=course, status='approved')
+            self.payments.append(FeePayment.objects.create(enrollment=enrollment, amount=Decimal('100.00'), due_date=date(2027, 1, 31)))
+        FeePayment.objects.filter(pk=self.payments[0].pk).update(transaction_id='TXN-1')
+
+    def reconcile(self, lines, **kwargs):
+        report = io.StringIO()
+        result = reconcile_fee_payments(io.StringIO('\n'.join(lines)), report, **kwargs)
+        return result, report.getvalue().splitlines()
+
+    def status(self, payment):
+        payment.refresh_from_db()
+        return payment.status
+
+    def test_matches_by_transaction_id_and_reference(self):
+        result, report = self.reconcile([
+            'transaction_id,amount,reference,date',
+            'txn-1,100.00,,2027-01-10',
+            'BANK-7,"1,00.00",paid by student1 ,2027-01-11',
+            'BANK-8,250.00,student2,2027-01-11',
+            'BANK-9,abc,student2,2027-01-11',
+        ])
+        self.assertEqual(result, (2, 1, 1, 2, 0))
+        self.assertEqual([self.status(payment) for payment in self.payments], ['paid', 'paid', 'pending'])
+        self.assertEqual(self.payments[1].transaction_id, 'BANK-7')
+        self.assertTrue(Enrollment.objects.get(pk=self.payments[1].enrollment_id).fee_paid)
+        self.assertEqual([line.split(',')[-1] for line in report[1:]], ['no matching unpaid fee', 'invalid amount'])
+
+    def test_duplicate_transaction_id_is_matched_once(self):
+        result, report = self.reconcile([
+            'transaction_id,amount,reference',
+            'BANK-1,100.00,student1',
+            'BANK-1,100.00,student2',
+        ])
+        self.assertEqual((result.matched, result.unmatched), (1, 1))
+        self.assertEqual(self.status(self.payments[2]), 'pending')
+        self.assertTrue(report[-1].endswith('duplicate transaction id in file'))
+
+    def test_payments_settled_during_the_run_are_reported(self):
+        build = PaymentIndex.build
+
+        def build_then_settle():
+            index = build()
+            # Someone else records the payment after the index was read
+            FeePayment.objects.filter(pk=self.payments[1].pk).update(status='paid', transaction_id='CASH-1')
+            return index
+
+        with mock.patch.object(PaymentIndex, 'build', side_effect=build_then_settle):
+            result, report = self.reconcile([
+                'transaction_id,amount,reference',
+                'BANK-1,100.00,student1',
+                'BANK-2,100.00,student2',
+            ], chunk_size=1)
+
+        self.assertEqual((result.matched, result.unmatched, result.already_settled), (1, 0, 1))
+        self.payments[1].refresh_from_db()
+        self.assertEqual(self.payments[1].transaction_id, 'CASH-1')
+        self.assertTrue(report[-1].endswith('already settled'))
+
+
+class BulkEnrollmentTests(TestCase):
+
+    def setUp(self):
+        self.course = make_course(capacity=2, price=50)
+        self.students = make_students(4)
+
+    def test_enrolls_and_skips(self):
+        Enrollment.objects.create(student=self.students[0], course=self.course, status='ongoing')
+        staff = User.objects.create(username='staff', role='employee')
+        inactive = User.objects.create(username='gone', role='student', is_active=False)
+        ids = [student.pk for student in self.students] + [staff.pk, inactive.pk]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = enroll_students(self.course, ids)
+
+        self.assertEqual(result, (3, 1))
+        created = Enrollment.objects.filter(course=self.course, status='approved')
+        self.assertEqual(created.count(), 3)
+        self.assertEqual(FeePayment.objects.filter(enrollment__in=created, amount=50).count(), 3)
+        # Admin enrollments are counted against the capacity but not refused by it
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.seats_taken, self.course.enrollments_approved), (4, 3))
+        self.assertEqual(check_course_counters([self.course.pk]), [])
+
+    def test_running_twice_enrolls_nobody_twice(self):
+        ids = [student.pk for student in self.students]
+        enroll_students(self.course, ids[:2])
+        self.assertEqual(enroll_students(self.course, ids), (2, 2))
+        self.assertEqual(enroll_students(self.course, ids), (0, 4))
+        self.assertEqual(FeePayment.objects.count(), 4)
+
+    def test_enrolled_students_leave_the_waitlist(self):
+        for student in self.students:
+            request_enrollment(student, self.course)
+        waiting = [entry.student_id for entry in WaitlistEntry.objects.all()]
+
+        enroll_students(self.course, waiting)
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.waitlist_count, 0)
+        self.assertEqual(check_course_counters([self.course.pk]), [])
+
+
+class SeatTests(TestCase):
+
+    def setUp(self):
+        self.course = make_course(capacity=2)
+        self.students = make_students(4)
+
+    def test_claim_stops_at_capacity(self):
+        self.assertTrue(claim_seat(self.course.pk))
+        self.assertTrue(claim_seat(self.course.pk))
+        self.assertFalse(claim_seat(self.course.pk))
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 2)
+
+    def test_unlimited_course_always_has_a_seat(self):
+        course = make_course('Open')
+        for i in range(5):
+            self.assertTrue(claim_seat(course.pk))
+
+    def test_full_course_waitlists_in_order(self):
+        results = [request_enrollment(student, self.course) for student in self.students]
+        self.assertEqual([bool(result.enrollment) for result in results], [True, True, False, False])
+        self.assertEqual([waitlist_position(result.waitlist_entry) for result in results[2:]], [1, 2])
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.seats_taken, self.course.waitlist_count), (2, 2))
+
+    def test_resubmitting_returns_the_first_request(self):
+        first = request_enrollment(self.students[0], self.course, idempotency_key='abc')
+        again = request_enrollment(self.students[0], self.course, idempotency_key='abc')
+        self.assertTrue(first.created)
+        self.assertFalse(again.created)
+        self.assertEqual(again.enrollment, first.enrollment)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 1)
+
+    def test_freed_seat_goes_to_the_oldest_waiting_student(self):
+        results = [request_enrollment(student, self.course) for student in self.students]
+        with self.captureOnCommitCallbacks(execute=True):
+            results[0].enrollment.delete()
+
+        self.assertTrue(Enrollment.objects.filter(student=self.students[2], course=self.course).exists())
+        self.assertEqual(list(WaitlistEntry.objects.values_list('student', flat=True)), [self.students[3].pk])
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.seats_taken, self.course.waitlist_count), (2, 1))
+
+    def test_dropping_frees_a_seat(self):
+        results = [request_enrollment(student, self.course) for student in self.students[:3]]
+        enrollment = results[1].enrollment
+        enrollment.status = 'dropped'
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.save()
+        self.assertTrue(Enrollment.objects.filter(student=self.students[2], course=self.course).exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_raising_capacity_promotes(self):
+        for student in self.students:
+            request_enrollment(student, self.course)
+        self.course.capacity = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save(update_fields=['capacity'])
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 3)
+        self.assertEqual(WaitlistEntry.objects.count(), 1)
+
+    def test_saving_without_a_capacity_change_does_not_promote(self):
+        for student in self.students[:3]:
+            request_enrollment(student, self.course)
+        # A seat freed behind the counter's back is not handed out by an unrelated edit
+        Course.objects.filter(pk=self.course.pk).update(seats_taken=1)
+        self.course.refresh_from_db()
+        self.course.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+        self.assertEqual(WaitlistEntry.objects.count(), 1)
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.course = make_course(capacity=1)
+        self.students = make_students(3)
+
+    def test_counters_follow_enrollments(self):
+        request_enrollment(self.students[0], self.course)
+        request_enrollment(self.students[1], self.course)
+        enrollment = Enrollment.objects.get(student=self.students[0])
+        enrollment.status = 'approved'
+        enrollment.save()
+        teacher = User.objects.create(username='teacher', role='employee', sub_role='teacher')
+        CourseTeacher.objects.create(course=self.course, teacher=teacher)
+
+        self.course.refresh_from_db()
+        self.assertEqual(
+            (self.course.enrollments_pending, self.course.enrollments_approved, self.course.waitlist_count, self.course.teacher_count),
+            (0, 1, 1, 1),
+        )
+        self.assertEqual(check_course_counters(), [])
+
+    def test_counters_after_moves_and_deletes(self):
+        other = make_course('Other')
+        enrollment = Enrollment.objects.create(student=self.students[0], course=self.course, status='ongoing')
+        enrollment.course = other
+        enrollment.status = 'completed'
+        enrollment.save()
+        Enrollment.objects.create(student=self.students[1], course=other, status='pending').delete()
+        self.assertEqual(check_course_counters(), [])
+
+    def test_drift_is_reported_and_fixed(self):
+        Enrollment.objects.create(student=self.students[0], course=self.course, status='ongoing')
+        Course.objects.filter(pk=self.course.pk).update(enrollments_ongoing=5, waitlist_count=2)
+
+        mismatches = check_course_counters([self.course.pk], fix=True)
+        self.assertEqual(
+            {(mismatch.field, mismatch.stored, mismatch.actual) for mismatch in mismatches},
+            {('enrollments_ongoing', 5, 1), ('waitlist_count', 2, 0)},
+        )
+        self.assertEqual(check_course_counters([self.course.pk]), [])
+
+
+class CertificateTests(TestCase):
+
+    def setUp(self):
+        self.online = make_course('Online')
+        self.diploma = Course.objects.create(title='Diploma', description='', course_type='diploma', duration='1 year', status='active')
+        self.students = make_students(3)
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.online, status='completed')
+        Enrollment.objects.create(student=self.students[0], course=self.diploma, status='completed')
+        Enrollment.objects.create(student=self.students[1], course=self.diploma, status='ongoing')
+
+    def test_numbers_are_contiguous_per_year(self):
+        self.assertEqual(allocate_certificate_numbers(2, year=2027), ['IC-2027-000001', 'IC-2027-000002'])
+        self.assertEqual(allocate_certificate_numbers(1, year=2027), ['IC-2027-000003'])
+        self.assertEqual(allocate_certificate_numbers(1, year=2028), ['IC-2028-000001'])
+
+    def test_pending_enrollments_are_completed_ones_without_a_certificate(self):
+        Certificate.objects.create(student=self.students[2], course=self.online, certificate_type='online', certificate_number='X-1')
+        pending = set(pending_certificate_enrollments().values_list('student_id', 'course_id'))
+        self.assertEqual(pending, {
+            (self.students[0].id, self.online.id), (self.students[1].id, self.online.id), (self.students[0].id, self.diploma.id),
+        })
+        self.assertEqual(list(courses_without_certificate(self.students[2])), [])
+        self.assertEqual(set(courses_without_certificate(self.students[0])), {self.online, self.diploma})
+
+    def test_issuing_in_batches_covers_everyone_once(self):
+        self.assertEqual(issue_pending_certificates(batch_size=2), 4)
+        self.assertEqual(issue_pending_certificates(batch_size=2), 0)
+
+        certificates = Certificate.objects.all()
+        self.assertEqual(certificates.count(), 4)
+        self.assertEqual(len({certificate.certificate_number for certificate in certificates}), 4)
+        self.assertEqual(certificates.get(course=self.diploma).certificate_type, 'diploma')
+        self.assertEqual(set(certificates.values_list('status', flat=True)), {'issued'})
+        self.assertEqual(Notification.objects.filter(user=self.students[0]).count(), 2)
+
+
+class CertificateRenderingTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        course = make_course('Python')
+        self.student = make_students(1)[0]
+        self.certificates = [
+            Certificate.objects.create(
+                student=self.student, course=course, certificate_type='online', status='issued',
+                issue_date=date(2027, 1, 4), certificate_number=f'IC-2027-00000{i}',
+            )
+            for i in range(1, 4)
+        ]
+
+    def test_renders_once_and_serves_from_the_cache(self):
+        self.assertEqual(render_certificates(), (3, 0))
+        self.assertEqual(render_certificates(), (0, 3))
+        self.assertEqual(render_certificates(force=True), (3, 0))
+        with open(os.path.join(certificate_cache_dir(), 'IC-2027-000001.pdf'), 'rb') as f:
+            self.assertTrue(f.read().startswith(b'%PDF'))
+
+    def test_process_pool_renders_every_chunk(self):
+        self.assertEqual(render_certificates(workers=2, chunk_size=1), (3, 0))
+        self.assertEqual(len(os.listdir(certificate_cache_dir())), 3)
+
+    def test_pdf_path_renders_on_first_request(self):
+        path = certificate_pdf_path(self.certificates[0])
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(os.listdir(certificate_cache_dir()), ['IC-2027-000001.pdf'])
+
+    def test_certificate_without_a_number_has_no_pdf(self):
+        certificate = self.certificates[0]
+        certificate.certificate_number = ''
+        certificate.save()
+        self.assertIsNone(certificate_pdf_path(certificate))
+
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('student:certificate_pdf', args=[certificate.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('student:certificate_pdf', args=[self.certificates[1].pk]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        response.close()
+
+
+class VerificationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        verification._certificates.clear()
+        self.certificate = Certificate.objects.create(
+            student=make_students(1)[0], course=make_course('Python'), certificate_type='online',
+            status='issued', issue_date=date(2027, 1, 4), certificate_number='IC-2027-000001',
+        )
+
+    def tearDown(self):
+        verification._certificates.clear()
+
+    def test_lru_cache_evicts_and_expires(self):
+        lru = verification.LRUCache(2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+        self.assertIs(lru.get('b'), verification._MISSING)
+        lru.set('d', 4, -1)
+        self.assertIs(lru.get('d'), verification._MISSING)
+
+    def test_lookup_is_served_from_the_cache(self):
+        self.assertEqual(verification.lookup_certificate(' ic-2027-000001 ')['course_title'], 'Python')
+        with self.assertNumQueries(0):
+            self.assertTrue(verification.lookup_certificate('IC-2027-000001')['valid'])
+            self.assertIsNone(verification.lookup_certificate(''))
+
+    def test_saving_a_certificate_refreshes_its_entry(self):
+        verification.lookup_certificate('IC-2027-000001')
+        self.certificate.status = 'rejected'
+        self.certificate.save()
+        self.assertFalse(verification.lookup_certificate('IC-2027-000001')['valid'])
+
+    def test_unknown_numbers_are_cached_too(self):
+        self.assertIsNone(verification.lookup_certificate('IC-2027-999999'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(verification.lookup_certificate('IC-2027-999999'))
+
+    def test_rate_limit_per_client(self):
+        with mock.patch.object(verification, 'VERIFICATION_RATE_LIMIT', 2):
+            self.assertEqual(
+                [verification.allow_verification_request('10.0.0.1') for i in range(3)], [True, True, False]
+            )
+            self.assertTrue(verification.allow_verification_request('10.0.0.2'))
+
+    def test_page_and_api_responses(self):
+        page = reverse('student:verify_certificate')
+        response = self.client.get(page, {'number': 'IC-2027-000001'})
+        self.assertContains(response, 'Python')
+        self.assertEqual(self.client.get(page, {'number': 'nope'}).status_code, 404)
+        response = self.client.get(reverse('student:verify_certificate_api', args=['IC-2027-000001']))
+        self.assertEqual(response.json()['student_name'], 'student0')
+        self.assertIn('max-age=', response['Cache-Control'])
+
+    def test_rate_limited_page_is_html_and_api_is_json(self):
+        with mock.patch.object(verification, 'VERIFICATION_RATE_LIMIT', 0):
+            response = self.client.get(reverse('student:verify_certificate'), {'number': 'IC-2027-000001'})
+            self.assertEqual(response.status_code, 429)
+            self.assertTrue(response['Content-Type'].startswith('text/html'))
+            self.assertIn('Retry-After', response)
+            response = self.client.get(reverse('student:verify_certificate_api', args=['IC-2027-000001']))
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('error', response.json())
+
+
+class GuardianReportTests(TestCase):
+
+    def setUp(self):
+        invalidate_working_days()
+        self.students = make_students(3)
+        for student in self.students[:2]:
+            student.guardian_email = f'guardian-{student.username}@example.com'
+            student.save()
+        course = make_course(price=80)
+        enrollment = Enrollment.objects.create(student=self.students[0], course=course, status='ongoing')
+        FeePayment.objects.create(enrollment=enrollment, amount=80, due_date=date(2027, 1, 20), status='overdue')
+        ExamResult.objects.create(enrollment=enrollment, exam_name='Midterm', marks_obtained=70, total_marks=100, grade='B', passed=True)
+        Attendance.objects.create(user=self.students[0], date=date(2027, 1, 4), status='present')
+        self.period = date(2027, 1, 15)
+
+    def tearDown(self):
+        invalidate_working_days()
+
+    def test_one_report_per_type_for_students_with_a_guardian(self):
+        ExamResult.objects.update(created_at=datetime(2027, 1, 10, 12, tzinfo=dt_timezone.utc))
+        created = guardian_reports.generate_guardian_reports(self.period, report_types=('results', 'payments'), chunk_size=1)
+        self.assertEqual(created, 4)
+        self.assertEqual(set(GuardianReport.objects.values_list('student_id', flat=True)), {self.students[0].id, self.students[1].id})
+        self.assertEqual(set(GuardianReport.objects.values_list('period', flat=True)), {date(2027, 1, 1)})
+        self.assertIn('Midterm', GuardianReport.objects.get(student=self.students[0], report_type='results').content)
+        self.assertEqual(EmailOutbox.objects.count(), 4)
+
+    def test_rerunning_a_period_creates_nothing(self):
+        self.assertEqual(guardian_reports.generate_guardian_reports(self.period), 8)
+        self.assertEqual(guardian_reports.generate_guardian_reports(self.period), 0)
+        self.assertEqual(GuardianReport.objects.count(), 8)
+        self.assertEqual(EmailOutbox.objects.count(), 8)
+
+    def test_reports_made_by_a_concurrent_run_are_skipped(self):
+        get_template = guardian_reports.get_template
+        student = self.students[1]
+
+        class RacingTemplate:
+            # Another run stores this student's report after ours read what exists
+            def __init__(self, template):
+                self.template = template
+
+            def render(self, context):
+                if not GuardianReport.objects.filter(student=student).exists():
+                    GuardianReport.objects.create(
+                        student=student, report_type='monthly', period=date(2027, 1, 1), content='', sent_to='x@example.com'
+                    )
+                return self.template.render(context)
+
+        with mock.patch.object(guardian_reports, 'get_template', lambda name: RacingTemplate(get_template(name))):
+            created = guardian_reports.generate_guardian_reports(self.period, report_types=('monthly',))
+
+        self.assertEqual(created, 1)
+        self.assertEqual(GuardianReport.objects.filter(student=student).count(), 1)
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+
+class OverdueSweepTests(TestCase):
+
+    def setUp(self):
+        course = make_course(price=40)
+        self.students = make_students(2)
+        self.payments = {}
+        for student in self.students:
+            enrollment = Enrollment.objects.create(student=student, course=course, status='approved')
+            for due_date in (date(2027, 1, 1), date(2027, 1, 5), date(2027, 2, 1)):
+                self.payments[(student.username, due_date)] = FeePayment.objects.create(
+                    enrollment=enrollment, amount=40, due_date=due_date
+                )
+        FeePayment.objects.filter(pk=self.payments[('student1', date(2027, 1, 1))].pk).update(status='paid')
+
+    def test_only_past_due_pending_payments_move(self):
+        self.assertEqual(sweep_overdue_fees(today=date(2027, 1, 10), chunk_size=2), 3)
+        overdue = set(FeePayment.objects.filter(status='overdue').values_list('enrollment__student__username', 'due_date'))
+        self.assertEqual(overdue, {
+            ('student0', date(2027, 1, 1)), ('student0', date(2027, 1, 5)), ('student1', date(2027, 1, 5)),
+        })
+        self.assertEqual(FeePayment.objects.get(pk=self.payments[('student1', date(2027, 1, 1))].pk).status, 'paid')
+
+    def test_one_notification_per_student_and_safe_to_rerun(self):
+        sweep_overdue_fees(today=date(2027, 1, 10))
+        self.assertEqual(
+            Notification.objects.get(user=self.students[0]).message, '2 fee payments totalling 80.00 are now overdue'
+        )
+        self.assertEqual(Notification.objects.get(user=self.students[1]).message, '1 fee payment totalling 40.00 is now overdue')
+        self.assertEqual(sweep_overdue_fees(today=date(2027, 1, 10)), 0)
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class GradingTests(TestCase):
+
+    def setUp(self):
+        self.course = make_course('Maths')
+        self.students = make_students(4)
+        self.enrollments = [
+            Enrollment.objects.create(student=student, course=self.course, status='ongoing')
+            for student in self.students
+        ]
+
+    def marks(self, *values):
+        return {enrollment.id: (Decimal(value), '') for enrollment, value in zip(self.enrollments, values)}
+
+    def test_grade_exam_matches_grading_each_mark_alone(self):
+        marks = [Decimal(value) for value in ('95', '12', '70', '33', '49.5', '60', '0', '80')]
+        graded = grade_exam(marks, Decimal('100'))
+        self.assertEqual(graded.grades, ['A+', 'F', 'A', 'D', 'C', 'A-', 'F', 'A+'])
+        self.assertEqual(graded.passed, [True, False, True, True, True, True, False, True])
+        stats = graded.statistics
+        self.assertEqual((stats['student_count'], stats['pass_count'], stats['minimum'], stats['maximum']), (8, 6, 0.0, 95.0))
+        self.assertEqual((stats['mean'], stats['median']), (49.94, 54.75))
+        self.assertEqual(stats['grade_distribution']['F'], 2)
+        self.assertEqual(grade_exam([], Decimal('100')).statistics['student_count'], 0)
+
+    def test_recording_creates_then_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = record_exam_marks(self.course, 'Final', Decimal('50'), self.marks('45', '10', '25'))
+        self.assertEqual((result.created, result.updated, result.errors), (3, 0, []))
+        self.assertEqual(result.statistics.pass_count, 2)
+
+        # Students not re-entered keep their marks but are graded with the rest
+        result = record_exam_marks(self.course, 'Final', Decimal('50'), {self.enrollments[1].id: (Decimal('30'), 'Re-sit')})
+        self.assertEqual((result.created, result.updated), (0, 3))
+        resit = ExamResult.objects.get(enrollment=self.enrollments[1])
+        self.assertEqual((resit.marks_obtained, resit.grade, resit.remarks), (Decimal('30.00'), 'A-', 'Re-sit'))
+        self.assertEqual(ExamStatistics.objects.get(course=self.course, exam_name='Final').pass_count, 3)
+
+    def test_enrollments_of_other_courses_are_reported(self):
+        other = Enrollment.objects.create(student=self.students[0], course=make_course('Other'), status='ongoing')
+        result = record_exam_marks(self.course, 'Quiz', Decimal('10'), {other.id: (Decimal('5'), '')})
+        self.assertEqual(result.created, 0)
+        self.assertEqual(result.errors, [f"Enrollment {other.id} is not in Maths"])
+
+    def test_lowering_the_total_below_earlier_marks_is_refused(self):
+        record_exam_marks(self.course, 'Final', Decimal('100'), self.marks('90', '80', '40'))
+        with self.assertRaises(GradebookError):
+            record_exam_marks(self.course, 'Final', Decimal('50'), self.marks('45'))
+        self.assertEqual(ExamResult.objects.get(enrollment=self.enrollments[0]).marks_obtained, Decimal('90.00'))
+        # Re-entering the high marks makes the new total valid
+        record_exam_marks(self.course, 'Final', Decimal('50'), self.marks('45', '20'))
+        self.assertEqual(set(ExamResult.objects.values_list('total_marks', flat=True)), {Decimal('50.00')})
+
+    def test_marks_from_csv(self):
+        csv_file = io.StringIO('\n'.join([
+            'username,enrollment_id,marks,remarks',
+            'student0,,18,Good',
+            f',{self.enrollments[1].id},7.5,',
+            'student2,,,',
+            'student3,,25,',
+            'nobody,,5,',
+            'student1,,abc,',
+        ]))
+        marks, errors = marks_from_csv(csv_file, self.course, Decimal('20'))
+        self.assertEqual(marks, {
+            self.enrollments[0].id: (Decimal('18.00'), 'Good'),
+            self.enrollments[1].id: (Decimal('7.50'), ''),
+        })
+        self.assertEqual([line for line, error in errors], [5, 6, 7])
+
+
+class GradebookTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.course = make_course('Maths')
+        self.students = make_students(3)
+        self.enrollments = [
+            Enrollment.objects.create(student=student, course=self.course, status='ongoing')
+            for student in self.students
+        ]
+        Enrollment.objects.create(student=make_students(1, 'dropped')[0], course=self.course, status='dropped')
+        for enrollment, quiz, final in zip(self.enrollments, (8, 6, None), (80, 90, 40)):
+            if quiz is not None:
+                ExamResult.objects.create(enrollment=enrollment, exam_name='quiz', marks_obtained=quiz, total_marks=10)
+            ExamResult.objects.create(enrollment=enrollment, exam_name='Final', marks_obtained=final, total_marks=100)
+
+    def test_matrix_rows_and_statistics(self):
+        matrix = build_gradebook(self.course.id)
+        self.assertEqual(matrix.exams, ['Final', 'quiz'])
+        self.assertEqual(list(matrix.rows()), [
+            ('student0', [80.0, 80.0], 80.0, 1),
+            ('student1', [90.0, 60.0], 75.0, 2),
+            ('student2', [40.0, None], 40.0, 3),
+        ])
+        final, quiz = matrix.exam_statistics
+        self.assertEqual((final['count'], final['mean'], final['median']), (3, 70.0, 80.0))
+        self.assertEqual((quiz['count'], quiz['median'], quiz['minimum']), (2, 70.0, 60.0))
+
+    def test_equal_averages_share_a_rank(self):
+        ExamResult.objects.filter(enrollment=self.enrollments[1], exam_name='Final').update(marks_obtained=100)
+        ranks = [rank for name, cells, average, rank in build_gradebook(self.course.id).rows()]
+        self.assertEqual(ranks, [1, 1, 3])
+
+    def test_cached_until_a_result_changes(self):
+        course_gradebook(self.course.id)
+        with self.assertNumQueries(0):
+            course_gradebook(self.course.id)
+
+        result = ExamResult.objects.get(enrollment=self.enrollments[2], exam_name='Final')
+        result.marks_obtained = 100
+        result.save()
+        self.assertEqual(course_gradebook(self.course.id).as_dict()['students'][2]['average'], 100.0)
+
+    def test_new_enrollment_refreshes_the_cache(self):
+        course_gradebook(self.course.id)
+        Enrollment.objects.create(student=make_students(1, 'late')[0], course=self.course, status='approved')
+        self.assertEqual(len(course_gradebook(self.course.id).students), 4)
+
+    def test_bulk_marks_entry_refreshes_the_cache(self):
+        course_gradebook(self.course.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            record_exam_marks(self.course, 'quiz', Decimal('10'), {self.enrollments[2].id: (Decimal('10'), '')})
+        self.assertEqual(course_gradebook(self.course.id).as_dict()['students'][2]['scores'], [40.0, 100.0])
+
+
+class AcademicSummaryTests(TestCase):
+
+    def setUp(self):
+        self.course = make_course()
+        self.student = make_students(1)[0]
+        self.staff = User.objects.create(username='guard', email='guard@example.com', role='employee')
+
+    def summary_values(self):
+        summary = AcademicSummary.objects.get(student=self.student)
+        return {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+
+    def assertMatchesRebuild(self):
+        kept = self.summary_values()
+        AcademicSummary.objects.all().delete()
+        rebuild_summaries([self.student.id])
+        self.assertEqual(kept, self.summary_values())
+
+    def test_signals_keep_the_summary_current(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course, status='ongoing')
+        Attendance.objects.create(user=self.student, date=date(2026, 9, 1), status='present')
+        absent = Attendance.objects.create(user=self.student, date=date(2026, 9, 2), status='absent')
+        result = ExamResult.objects.create(enrollment=enrollment, exam_name='Final', marks_obtained=70, total_marks=100, passed=True, grade='B')
+        self.assertMatchesRebuild()
+
+        absent = Attendance.objects.get(pk=absent.pk)
+        absent.status = 'late'
+        absent.save()
+        result.grade = 'A'
+        result.save()
+        enrollment.status = 'completed'
+        enrollment.save()
+        self.assertMatchesRebuild()
+        summary = AcademicSummary.objects.get(student=self.student)
+        self.assertEqual((summary.attendance_late, summary.grade_points_sum, summary.enrollments_completed), (1, 4, 1))
+
+        Attendance.objects.filter(date=date(2026, 9, 1)).get().delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(AcademicSummary.objects.get(student=self.student).attendance_total, 1)
+
+    def test_staff_attendance_skips_the_summary_without_a_user_query(self):
+        # Only the INSERT: the role comes from the user passed in
+        with self.assertNumQueries(1):
+            attendance = Attendance.objects.create(user=self.staff, date=date(2026, 9, 1), status='present')
+
+        # The pre_save lookup of the old row already carries the role
+        attendance = Attendance.objects.get(pk=attendance.pk)
+        attendance.status = 'late'
+        with self.assertNumQueries(2):
+            attendance.save()
+
+        with self.assertNumQueries(2):
+            Attendance.objects.select_related('user').get(pk=attendance.pk).delete()
+        self.assertFalse(AcademicSummary.objects.filter(student=self.staff).exists())
+
+
+class AbsenteeTests(TestCase):
+    # Friday 15 January 2027; Saturdays and Sundays are the weekly off days
+
+    def setUp(self):
+        invalidate_working_days()
+        self.day = date(2027, 1, 15)
+        course = make_course('Physics')
+        self.teacher = User.objects.create(username='teacher', email='teacher@example.com', role='employee')
+        CourseTeacher.objects.create(course=course, teacher=self.teacher)
+        self.students = make_students(4)
+        for student in self.students[:3]:
+            Enrollment.objects.create(student=student, course=course, status='ongoing')
+        Enrollment.objects.create(student=self.students[3], course=course, status='dropped')
+        Enrollment.objects.filter(student__in=self.students).update(enrolled_at=datetime(2026, 12, 1, tzinfo=dt_timezone.utc))
+        Enrollment.objects.filter(student=self.students[2]).update(enrolled_at=datetime(2027, 1, 14, 9, tzinfo=dt_timezone.utc))
+        User.objects.filter(pk=self.students[1].pk).update(guardian_email='guardian1@example.com')
+
+        Attendance.objects.create(user=self.students[0], date=self.day, status='present')
+        Attendance.objects.create(user=self.students[1], date=date(2027, 1, 11), status='present')
+        Attendance.objects.create(user=self.students[1], date=self.day, status='absent')
+
+    def tearDown(self):
+        invalidate_working_days()
+
+    def test_streaks_count_working_days_since_last_attended_or_enrolled(self):
+        self.assertEqual(find_absentees(self.day), [
+            Absentee(self.students[1].id, 'student1', 'guardian1@example.com', 4),
+            Absentee(self.students[2].id, 'student2', '', 2),
+        ])
+
+    def test_alerts_go_out_once_per_day(self):
+        result = detect_absentees(self.day)
+        self.assertEqual((len(result.absentees), len(result.streaks), result.notified, result.emailed), (2, 1, 1, 1))
+        notification = Notification.objects.get(user=self.teacher)
+        self.assertIn('2 absent from Physics on 15 Jan 2027: student1 (4 days), student2', notification.message)
+        self.assertEqual(EmailOutbox.objects.get().to_email, 'guardian1@example.com')
+
+        self.assertEqual(detect_absentees(self.day)[2:], (0, 0))
+        # Forced again, teachers are told again but guardians are not emailed twice
+        self.assertEqual(detect_absentees(self.day, force=True)[2:], (1, 0))
+
+    def test_off_days_have_no_absentees(self):
+        self.assertEqual(detect_absentees(date(2027, 1, 16)), ([], [], 0, 0))
+
+
+class CatalogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(username='tutor', email='tutor@example.com', role='employee', first_name='Tess')
+        self.free = make_course('Art', price=0)
+        self.cheap = make_course('Biology', capacity=2, price=500)
+        self.pricey = Course.objects.create(
+            title='Cooking', description='Knife skills', course_type='regular', duration='3 months',
+            status='active', price=8000,
+        )
+        Course.objects.filter(pk=make_course('Drafting').pk).update(status='draft')
+        CourseTeacher.objects.create(course=self.cheap, teacher=self.teacher)
+        CourseTeacher.objects.create(course=self.pricey, teacher=self.teacher)
+        self.student = make_students(1)[0]
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_facet_counts_cover_active_courses(self):
+        facets = build_catalog_facets()
+        self.assertEqual(facets['type'], [('online', 'Online', 2), ('regular', 'Regular', 1)])
+        self.assertEqual(facets['price'], [('free', 'Free', 1), ('low', 'Up to 1,000', 1), ('high', 'Over 5,000', 1)])
+        self.assertEqual(facets['duration'], [('3 months', '3 months', 1), ('8 weeks', '8 weeks', 2)])
+        self.assertEqual(facets['teacher'], [(self.teacher.id, 'Tess', 2)])
+
+    def test_facets_are_cached(self):
+        catalog_facets()
+        with self.assertNumQueries(0):
+            catalog_facets()
+
+    def test_filters(self):
+        self.assertEqual(catalog_filters({'type': 'bogus', 'price': 'low', 'teacher': 'x', 'search': ' knife '}), {
+            'type': '', 'price': 'low', 'duration': '', 'teacher': None, 'search': 'knife',
+        })
+
+        def titles(**params):
+            return [course.title for course in catalog_courses(self.student, catalog_filters(params))]
+
+        self.assertEqual(titles(), ['Art', 'Biology', 'Cooking'])
+        self.assertEqual(titles(type='regular'), ['Cooking'])
+        self.assertEqual(titles(price='free'), ['Art'])
+        self.assertEqual(titles(duration='8 weeks', teacher=str(self.teacher.id)), ['Biology'])
+        self.assertEqual(titles(search='knife'), ['Cooking'])
+
+    def test_rows_carry_enrollment_flags_and_seats(self):
+        Enrollment.objects.create(student=self.student, course=self.cheap, status='approved')
+        Course.objects.filter(pk=self.cheap.pk).update(seats_taken=2)
+        WaitlistEntry.objects.create(student=self.student, course=self.pricey)
+        with self.assertNumQueries(1):
+            rows = [
+                (course.title, course.is_enrolled, course.is_waitlisted, course.seats_left)
+                for course in catalog_courses(self.student, catalog_filters({}))
+            ]
+        self.assertEqual(rows, [('Art', False, False, None), ('Biology', True, False, 0), ('Cooking', False, True, None)])
+
+    def test_course_catalog_pages(self):
+        for number in range(CATALOG_PAGE_SIZE):
+            make_course(f'Extra {number}')
+        result = course_catalog(self.student, {}, page_number=2)
+        self.assertEqual((result.page.number, len(result.page.object_list)), (2, 3))
+        self.assertEqual(result.filters['type'], '')
+        self.assertIn('teacher', result.facets)
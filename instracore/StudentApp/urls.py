@@ -12,7 +12,11 @@ urlpatterns = [
     path('resources/', views.resources, name='resources'),
     path('certificates/', views.certificates, name='certificates'),
     path('certificates/apply/', views.apply_certificate, name='apply_certificate'),
+    path('certificates/<int:pk>/pdf/', views.certificate_pdf, name='certificate_pdf'),
+    path('verify/', views.verify_certificate, name='verify_certificate'),
+    path('api/verify/<str:number>/', views.verify_certificate_api, name='verify_certificate_api'),
     path('courses/', views.courses, name='courses'),
     path('courses/<int:pk>/', views.course_detail, name='course_detail'),
     path('courses/<int:pk>/enroll/', views.enroll_course, name='enroll_course'),
+    path('courses/<int:pk>/waitlist/leave/', views.leave_waitlist, name='leave_waitlist'),
 ]
\ No newline at end of file
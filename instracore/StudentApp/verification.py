@@ -0,0 +1,112 @@
+from collections import OrderedDict
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from StudentApp.models import Certificate
+
+
+VERIFICATION_CACHE_SIZE = getattr(settings, 'CERTIFICATE_VERIFICATION_CACHE_SIZE', 10000)
+VERIFICATION_CACHE_TTL = getattr(settings, 'CERTIFICATE_VERIFICATION_CACHE_TTL', 300)
+# Unknown numbers are cached for less time so newly issued certificates show up quickly
+VERIFICATION_NEGATIVE_TTL = getattr(settings, 'CERTIFICATE_VERIFICATION_NEGATIVE_TTL', 60)
+VERIFICATION_RATE_LIMIT = getattr(settings, 'CERTIFICATE_VERIFICATION_RATE_LIMIT', 30)
+VERIFICATION_RATE_WINDOW = getattr(settings, 'CERTIFICATE_VERIFICATION_RATE_WINDOW', 60)
+
+_MISSING = object()
+
+
+class LRUCache:
+    # Bounded, thread-safe LRU map with a per-entry expiry
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_certificates = LRUCache(VERIFICATION_CACHE_SIZE)
+
+
+def normalize_certificate_number(number):
+    return (number or '').strip().upper()
+
+
+def _load_certificate(number):
+    row = Certificate.objects.filter(certificate_number=number).values(
+        'certificate_number', 'certificate_type', 'status', 'issue_date', 'verified',
+        'student__first_name', 'student__last_name', 'student__username', 'course__title',
+    ).first()
+    if row is None:
+        return None
+
+    full_name = f"{row['student__first_name']} {row['student__last_name']}".strip()
+    return {
+        'certificate_number': row['certificate_number'],
+        'valid': row['status'] == 'issued',
+        'status': row['status'],
+        'verified': row['verified'],
+        'certificate_type': dict(Certificate.TYPE_CHOICES).get(row['certificate_type'], ''),
+        'student_name': full_name or row['student__username'],
+        'course_title': row['course__title'],
+        'issue_date': row['issue_date'].isoformat() if row['issue_date'] else None,
+    }
+
+
+def lookup_certificate(number):
+    # Public details of a certificate, or None if the number is unknown
+    number = normalize_certificate_number(number)
+    if not number:
+        return None
+    result = _certificates.get(number)
+    if result is _MISSING:
+        result = _load_certificate(number)
+        _certificates.set(number, result, VERIFICATION_CACHE_TTL if result else VERIFICATION_NEGATIVE_TTL)
+    return result
+
+
+def invalidate_certificate(number):
+    _certificates.delete(normalize_certificate_number(number))
+
+
+def allow_verification_request(client_ip):
+    # Fixed-window counter per client IP in the shared cache
+    window = int(time.time() // VERIFICATION_RATE_WINDOW)
+    key = f"certificate-verify-rate:{client_ip}:{window}"
+    cache.add(key, 0, VERIFICATION_RATE_WINDOW)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # The counter expired between add() and incr()
+        cache.set(key, 1, VERIFICATION_RATE_WINDOW)
+        count = 1
+    return count <= VERIFICATION_RATE_LIMIT
@@ -3,7 +3,8 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.db.models import Count, Sum, Q, Avg
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.http import HttpResponse, JsonResponse, FileResponse, Http404
 from django.core.paginator import Paginator
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
@@ -11,15 +12,30 @@ from django.urls import reverse_lazy
 from django.db.models import F
 from django.utils.dateparse import parse_date
 from datetime import datetime, date, timedelta
+from calendar import monthrange
+from uuid import uuid4
 import json
 import csv
 
+from AdminApp.working_days import working_days_between
 from AuthApp.models import User, Notification, AuditLog
 from EmployeeApp.models import Course, Attendance, ClassRoutine
-from StudentApp.models import Enrollment, ExamResult, Certificate, GuardianReport, FeePayment
+from StudentApp.models import Enrollment, ExamResult, Certificate, GuardianReport, FeePayment, WaitlistEntry
 from StudentApp.forms import (
     EnrollmentForm, ExamResultForm, CertificateForm, GuardianReportForm, FeePaymentForm
 )
+from StudentApp.certificates import (
+    certificate_type_for, courses_without_certificate, generate_certificate_number
+)
+from StudentApp.academic_summary import academic_summary
+from StudentApp.catalog import course_catalog
+from StudentApp.certificate_rendering import certificate_pdf_path
+from StudentApp.fees import UNPAID_STATUSES
+from StudentApp.seats import request_enrollment, waitlist_position
+from StudentApp.verification import (
+    lookup_certificate, allow_verification_request, VERIFICATION_CACHE_TTL, VERIFICATION_NEGATIVE_TTL,
+    VERIFICATION_RATE_WINDOW
+)
 
 
 def is_student(user):
@@ -31,9 +47,9 @@ def is_student(user):
 def dashboard(request):
     student = request.user
     
-    # Get active courses
-    active_enrollments = Enrollment.objects.filter(student=student, status='ongoing')
-    active_courses = active_enrollments.count()
+    # Counters come from the student's academic summary
+    summary = academic_summary(student)
+    active_courses = summary.enrollments_active
     
     # Get certificates
     certificates = Certificate.objects.filter(student=student)
@@ -43,7 +59,7 @@ def dashboard(request):
     # Get unpaid fees
     unpaid_fees = FeePayment.objects.filter(
         enrollment__student=student,
-        status='pending'
+        status__in=UNPAID_STATUSES
     ).aggregate(total=Sum('amount'))['total'] or 0
     
     # Get upcoming classes
@@ -77,6 +93,7 @@ def dashboard(request):
         'upcoming_classes': upcoming_classes,
         'recent_results': recent_results,
         'my_courses': my_courses,
+        'summary': summary,
         'active_page': 'dashboard',
     }
     return render(request, 'StudentApp/dashboard.html', context)
@@ -87,20 +104,9 @@ def dashboard(request):
 def academics(request):
     student = request.user
     
-    # Get attendance data
+    # Attendance and exam figures are kept up to date in the academic summary
+    summary = academic_summary(student)
     attendance_records = Attendance.objects.filter(user=student)
-    total_days = attendance_records.count()
-    present_days = attendance_records.filter(status='present').count()
-    attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
-    
-    # Get exam results
-    exam_results = ExamResult.objects.filter(enrollment__student=student)
-    total_exams = exam_results.count()
-    passed_exams = exam_results.filter(passed=True).count()
-    pass_rate = (passed_exams / total_exams * 100) if total_exams > 0 else 0
-    
-    # Get average marks
-    avg_marks = exam_results.aggregate(avg=Avg('marks_obtained'))['avg'] or 0
     
     # Get class schedule
     today = timezone.now().date()
@@ -118,9 +124,10 @@ def academics(request):
     leave_records = attendance_records.filter(status='leave').order_by('-date')[:5]
     
     context = {
-        'attendance_rate': attendance_rate,
-        'pass_rate': pass_rate,
-        'avg_marks': avg_marks,
+        'attendance_rate': summary.attendance_rate,
+        'pass_rate': summary.pass_rate,
+        'avg_marks': summary.average_marks,
+        'gpa': summary.gpa,
         'schedules_by_day': schedules_by_day,
         'leave_records': leave_records,
         'active_page': 'academics',
@@ -138,6 +145,7 @@ def attendance_detail(request):
     
     # Filter by month
     month_filter = request.GET.get('month')
+    filter_month = None
     if month_filter:
         try:
             filter_month = parse_date(month_filter + '-01')
@@ -149,14 +157,38 @@ def attendance_detail(request):
         except ValueError:
             pass
     
-    # Calculate attendance statistics
-    total_days = attendance_list.count()
-    present_days = attendance_list.filter(status='present').count()
-    absent_days = attendance_list.filter(status='absent').count()
-    leave_days = attendance_list.filter(status='leave').count()
-    late_days = attendance_list.filter(status='late').count()
-    
-    attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
+    # Calculate attendance statistics: all-time figures come from the summary,
+    # a single month needs one grouped query
+    if filter_month:
+        stats = attendance_list.aggregate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='present')),
+            absent=Count('id', filter=Q(status='absent')),
+            leave=Count('id', filter=Q(status='leave')),
+            late=Count('id', filter=Q(status='late')),
+        )
+    else:
+        summary = academic_summary(student)
+        stats = {
+            'total': summary.attendance_total,
+            'present': summary.attendance_present,
+            'absent': summary.attendance_absent,
+            'leave': summary.attendance_leave,
+            'late': summary.attendance_late,
+        }
+    total_days = stats['total']
+    present_days = stats['present']
+    absent_days = stats['absent']
+    leave_days = stats['leave']
+    late_days = stats['late']
+    
+    # A single month is measured against its working days so far, not just the days with a record
+    working_days = None
+    if filter_month:
+        month_end = filter_month.replace(day=monthrange(filter_month.year, filter_month.month)[1])
+        working_days = working_days_between(filter_month, min(month_end, timezone.now().date()))
+    expected_days = working_days if working_days else total_days
+    attendance_rate = (present_days / expected_days * 100) if expected_days > 0 else 0
     
     # Pagination
     paginator = Paginator(attendance_list, 20)  # Show 20 attendance records per page
@@ -172,6 +204,7 @@ def attendance_detail(request):
         'leave_days': leave_days,
         'late_days': late_days,
         'attendance_rate': attendance_rate,
+        'working_days': working_days,
         'active_page': 'academics',
     }
     return render(request, 'StudentApp/attendance_detail.html', context)
@@ -220,7 +253,8 @@ def finance(request):
     # Calculate totals
     total_fees = fee_payments.aggregate(total=Sum('amount'))['total'] or 0
     paid_fees = fee_payments.filter(status='paid').aggregate(total=Sum('amount'))['total'] or 0
-    unpaid_fees = fee_payments.filter(status='pending').aggregate(total=Sum('amount'))['total'] or 0
+    unpaid_fees = fee_payments.filter(status__in=UNPAID_STATUSES).aggregate(total=Sum('amount'))['total'] or 0
+    overdue_fees = fee_payments.filter(status='overdue').aggregate(total=Sum('amount'))['total'] or 0
     
     # Get upcoming payments
     upcoming_payments = fee_payments.filter(
@@ -235,6 +269,7 @@ def finance(request):
         'total_fees': total_fees,
         'paid_fees': paid_fees,
         'unpaid_fees': unpaid_fees,
+        'overdue_fees': overdue_fees,
         'upcoming_payments': upcoming_payments,
         'payment_history': payment_history,
         'active_page': 'finance',
@@ -292,28 +327,31 @@ def certificates(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # Get completed courses for certificate application
-    completed_enrollments = Enrollment.objects.filter(
-        student=student,
-        status='completed'
-    )
-    
-    # Get courses that don't have a certificate yet
-    courses_without_certificate = []
-    for enrollment in completed_enrollments:
-        if not Certificate.objects.filter(student=student, course=enrollment.course).exists():
-            courses_without_certificate.append(enrollment.course)
-    
     context = {
         'page_obj': page_obj,
         'status_filter': status_filter,
         'type_filter': type_filter,
-        'courses_without_certificate': courses_without_certificate,
+        'courses_without_certificate': courses_without_certificate(student),
         'active_page': 'student_certificates',
     }
     return render(request, 'StudentApp/certificates.html', context)
 
 
+@login_required
+@user_passes_test(is_student)
+def certificate_pdf(request, pk):
+    certificate = get_object_or_404(Certificate, pk=pk, student=request.user, status='issued')
+    path = certificate_pdf_path(certificate)
+    if path is None:
+        raise Http404('This certificate has no PDF yet')
+    return FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=f"{certificate.certificate_number}.pdf",
+        content_type='application/pdf'
+    )
+
+
 @login_required
 @user_passes_test(is_student)
 def apply_certificate(request):
@@ -321,25 +359,13 @@ def apply_certificate(request):
     
     if request.method == 'POST':
         form = CertificateForm(request.POST)
+        # Only completed courses without a certificate are valid choices
+        form.fields['course'].queryset = courses_without_certificate(student)
         if form.is_valid():
             certificate = form.save(commit=False)
             certificate.student = student
-            
-            # Check if the student has completed the course
-            enrollment = Enrollment.objects.get(
-                student=student,
-                course=certificate.course,
-                status='completed'
-            )
-            
-            # Set certificate type based on course type
-            if certificate.course.course_type == 'online':
-                certificate.certificate_type = 'online'
-            elif certificate.course.course_type == 'diploma':
-                certificate.certificate_type = 'diploma'
-            else:
-                certificate.certificate_type = 'offline'
-            
+            certificate.certificate_type = certificate_type_for(certificate.course.course_type)
+            certificate.certificate_number = generate_certificate_number()
             certificate.save()
             
             # Log the action
@@ -354,20 +380,8 @@ def apply_certificate(request):
             return redirect('student:certificates')
     else:
         form = CertificateForm()
-        # Filter courses to only show courses the student has completed
-        completed_enrollments = Enrollment.objects.filter(
-            student=student,
-            status='completed'
-        )
-        completed_course_ids = [enrollment.course.id for enrollment in completed_enrollments]
-        
-        # Exclude courses that already have a certificate
-        existing_certificate_course_ids = Certificate.objects.filter(
-            student=student
-        ).values_list('course_id', flat=True)
-        
-        available_course_ids = set(completed_course_ids) - set(existing_certificate_course_ids)
-        form.fields['course'].queryset = Course.objects.filter(id__in=available_course_ids)
+        # Filter courses to only show completed courses without a certificate
+        form.fields['course'].queryset = courses_without_certificate(student)
     
     context = {
         'form': form,
@@ -382,21 +396,8 @@ def apply_certificate(request):
 def courses(request):
     student = request.user
     
-    # Get course type filter
-    course_type_filter = request.GET.get('type')
-    
-    # Get available courses
-    available_courses = Course.objects.filter(status='active')
-    
-    if course_type_filter:
-        available_courses = available_courses.filter(course_type=course_type_filter)
-    
-    # Exclude courses the student is already enrolled in
-    enrolled_course_ids = Enrollment.objects.filter(
-        student=student
-    ).values_list('course_id', flat=True)
-    
-    available_courses = available_courses.exclude(id__in=enrolled_course_ids)
+    # Active courses with facet counts; enrolled courses are flagged, not hidden
+    catalog = course_catalog(student, request.GET, request.GET.get('page1'))
     
     # Get my enrollments
     my_enrollments = Enrollment.objects.filter(student=student)
@@ -408,20 +409,17 @@ def courses(request):
     
     my_enrollments = my_enrollments.order_by('-enrolled_at')
     
-    # Pagination for available courses
-    paginator1 = Paginator(available_courses, 6)  # Show 6 courses per page
-    page_number = request.GET.get('page1')
-    available_page_obj = paginator1.get_page(page_number)
-    
     # Pagination for my enrollments
     paginator2 = Paginator(my_enrollments, 10)  # Show 10 enrollments per page
     page_number = request.GET.get('page2')
     enrollments_page_obj = paginator2.get_page(page_number)
     
     context = {
-        'available_page_obj': available_page_obj,
+        'available_page_obj': catalog.page,
         'enrollments_page_obj': enrollments_page_obj,
-        'course_type_filter': course_type_filter,
+        'facets': catalog.facets,
+        'filters': catalog.filters,
+        'course_type_filter': catalog.filters['type'],
         'status_filter': status_filter,
         'active_page': 'student_courses',
     }
@@ -465,40 +463,94 @@ def enroll_course(request, pk):
     student = request.user
     course = get_object_or_404(Course, pk=pk, status='active')
     
-    # Check if student is already enrolled
-    if Enrollment.objects.filter(student=student, course=course).exists():
-        messages.error(request, 'You are already enrolled in this course')
-        return redirect('student:course_detail', pk=course.pk)
-    
     if request.method == 'POST':
-        # Create enrollment
-        enrollment = Enrollment.objects.create(
-            student=student,
-            course=course,
-            status='pending'
-        )
+        # Seats are claimed atomically; a full course puts the student on the
+        # waitlist, and a double submit with the same key is answered once
+        idempotency_key = request.POST.get('idempotency_key', '').strip()[:64] or None
+        seat = request_enrollment(student, course, idempotency_key=idempotency_key)
         
-        # Create fee payment if course has a price
-        if course.price > 0:
-            FeePayment.objects.create(
-                enrollment=enrollment,
-                amount=course.price,
-                due_date=timezone.now().date() + timedelta(days=30)  # Due in 30 days
-            )
+        if seat.waitlist_entry:
+            position = waitlist_position(seat.waitlist_entry)
+            if seat.created:
+                messages.info(request, f'{course.title} is full. You are number {position} on the waitlist')
+            else:
+                messages.info(request, f'You are already number {position} on the waitlist for {course.title}')
+            return redirect('student:course_detail', pk=course.pk)
         
-        # Log the action
-        AuditLog.objects.create(
-            user=request.user,
-            action=f"Enrolled in course: {course.title}",
-            model_name="Enrollment",
-            object_id=str(enrollment.id)
-        )
+        if seat.created or (idempotency_key and seat.enrollment.idempotency_key == idempotency_key):
+            messages.success(request, f'Enrollment in {course.title} submitted successfully')
+            return redirect('student:courses')
         
-        messages.success(request, f'Enrollment in {course.title} submitted successfully')
-        return redirect('student:courses')
+        messages.error(request, 'You are already enrolled in this course')
+        return redirect('student:course_detail', pk=course.pk)
+    
+    # Check if student is already enrolled
+    if Enrollment.objects.filter(student=student, course=course).exists():
+        messages.error(request, 'You are already enrolled in this course')
+        return redirect('student:course_detail', pk=course.pk)
     
     context = {
         'course': course,
+        'seats_left': max(course.capacity - course.seats_taken, 0) if course.capacity is not None else None,
+        'waitlist_entry': WaitlistEntry.objects.filter(student=student, course=course).first(),
+        'idempotency_key': uuid4().hex,
         'active_page': 'student_courses',
     }
-    return render(request, 'StudentApp/enroll_course.html', context)
\ No newline at end of file
+    return render(request, 'StudentApp/enroll_course.html', context)
+
+
+@login_required
+@user_passes_test(is_student)
+def leave_waitlist(request, pk):
+    if request.method == 'POST':
+        deleted, _ = WaitlistEntry.objects.filter(student=request.user, course_id=pk).delete()
+        if deleted:
+            messages.success(request, 'You have left the waitlist')
+    return redirect('student:course_detail', pk=pk)
+
+# Public certificate verification (no login required)
+def _verification_response(request, number, render_response, render_rate_limited):
+    if not allow_verification_request(request.META.get('REMOTE_ADDR', '')):
+        response = render_rate_limited()
+        response['Retry-After'] = str(VERIFICATION_RATE_WINDOW)
+        return response
+    
+    certificate = lookup_certificate(number) if number else None
+    response = render_response(certificate)
+    
+    max_age = VERIFICATION_CACHE_TTL if certificate else VERIFICATION_NEGATIVE_TTL
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def verify_certificate(request):
+    number = request.GET.get('number', '').strip()
+    
+    def render_page(certificate):
+        context = {
+            'number': number,
+            'certificate': certificate,
+        }
+        status = 404 if number and certificate is None else 200
+        return render(request, 'StudentApp/verify_certificate.html', context, status=status)
+    
+    def render_rate_limited():
+        context = {
+            'number': number,
+            'rate_limited': True,
+        }
+        return render(request, 'StudentApp/verify_certificate.html', context, status=429)
+    
+    return _verification_response(request, number, render_page, render_rate_limited)
+
+
+def verify_certificate_api(request, number):
+    def render_json(certificate):
+        if certificate is None:
+            return JsonResponse({'certificate_number': number, 'found': False}, status=404)
+        return JsonResponse({'found': True, **certificate})
+    
+    def render_rate_limited():
+        return JsonResponse({'error': 'Too many verification requests. Please try again later.'}, status=429)
+    
+    return _verification_response(request, number, render_json, render_rate_limited)
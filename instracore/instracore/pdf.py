@@ -0,0 +1,81 @@
+A4_PORTRAIT = (595, 842)
+A4_LANDSCAPE = (842, 595)
+
+FONTS = {
+    'regular': ('F1', 'Helvetica'),
+    'bold': ('F2', 'Helvetica-Bold'),
+    'mono': ('F3', 'Courier'),
+}
+
+
+def _escape(text):
+    text = str(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return text.encode('latin-1', 'replace')
+
+
+def text_width(text, size, font='regular'):
+    # Rough width for centring; Courier is exactly 0.6em per glyph
+    return len(str(text)) * size * (0.6 if font == 'mono' else 0.5)
+
+
+class PDFDocument:
+    # Minimal PDF writer for text-only documents using the standard Type 1
+    # fonts, so certificates and registers need no third-party PDF library
+
+    def __init__(self, page_size=A4_PORTRAIT, title=''):
+        self.page_size = page_size
+        self.title = title
+        self.pages = []
+
+    def add_page(self):
+        self.pages.append([])
+
+    def text(self, x, y, text, size=12, font='regular'):
+        if not self.pages:
+            self.add_page()
+        name = FONTS[font][0].encode()
+        self.pages[-1].append(
+            b'BT /' + name + b' %d Tf %.2f %.2f Td (' % (size, x, y) + _escape(text) + b') Tj ET'
+        )
+
+    def centered_text(self, y, text, size=12, font='regular'):
+        x = (self.page_size[0] - text_width(text, size, font)) / 2
+        self.text(max(x, 0), y, text, size, font)
+
+    def render(self):
+        if not self.pages:
+            self.add_page()
+        objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None]
+        font_refs = []
+        for name, base_font in FONTS.values():
+            objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /' + base_font.encode()
+                           + b' /Encoding /WinAnsiEncoding >>')
+            font_refs.append(b'/' + name.encode() + b' %d 0 R' % len(objects))
+        resources = b'<< /Font << ' + b' '.join(font_refs) + b' >> >>'
+
+        page_refs = []
+        for operations in self.pages:
+            stream = b'\n'.join(operations)
+            objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+            objects.append(
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources ' % self.page_size
+                + resources + b' /Contents %d 0 R >>' % len(objects)
+            )
+            page_refs.append(b'%d 0 R' % len(objects))
+        objects[1] = b'<< /Type /Pages /Kids [' + b' '.join(page_refs) + b'] /Count %d >>' % len(page_refs)
+        objects.append(b'<< /Title (' + _escape(self.title) + b') /Producer (InstaCore) >>')
+        info_ref = len(objects)
+
+        output = bytearray(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        for offset in offsets:
+            output += b'%010d 00000 n \n' % offset
+        output += b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+            len(objects) + 1, info_ref, xref
+        )
+        return bytes(output)